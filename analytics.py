@@ -0,0 +1,127 @@
+"""
+Аналитика по ответам: доля ответов "Нет" по формам и месяцам,
+вопросы с наибольшим числом ответов "Нет"
+Запросы идут к сводной таблице answer_stats, которую триггеры
+обновляют при сохранении и удалении отчетов (см. database.py)
+"""
+
+import csv
+from connection import connection
+from database import month_name, month_number
+
+
+def _period_filters(form_name=None, year=None, month_from=1, month_to=12, alias="s"):
+    """Условия WHERE по форме, году и диапазону месяцев (номерами или названиями)"""
+    conditions = [f"{alias}.answer_count > 0", f"{alias}.month BETWEEN ? AND ?"]
+    params = [month_number(month_from), month_number(month_to)]
+    if form_name:
+        conditions.append(f"{alias}.form_name = ?")
+        params.append(form_name)
+    if year is not None:
+        conditions.append(f"{alias}.year = ?")
+        params.append(int(year))
+    return " AND ".join(conditions), params
+
+
+def _rate(no_count, answer_count):
+    """Доля ответов "Нет" в процентах"""
+    return round(100.0 * no_count / answer_count, 1) if answer_count else 0.0
+
+
+def no_rate_by_month(form_name=None, year=None, month_from=1, month_to=12):
+    """
+    Доля ответов "Нет" по форме и месяцу.
+    Возвращает список словарей: form_name, year, month, answers, no_count, no_rate.
+    """
+    where, params = _period_filters(form_name, year, month_from, month_to)
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT s.form_name, s.year, s.month,
+                   SUM(s.answer_count) AS answers, SUM(s.no_count) AS no_count
+            FROM answer_stats s
+            WHERE {where}
+            GROUP BY s.form_name, s.year, s.month
+            ORDER BY s.form_name, s.year, s.month
+        ''', params).fetchall()
+
+    return [{
+        'form_name': row['form_name'],
+        'year': row['year'],
+        'month': month_name(row['month']),
+        'answers': row['answers'],
+        'no_count': row['no_count'],
+        'no_rate': _rate(row['no_count'], row['answers'])
+    } for row in rows]
+
+
+def top_failing_questions(form_name=None, year=None, month_from=1, month_to=12, limit=20):
+    """
+    Вопросы с наибольшим числом ответов "Нет" за период.
+    Возвращает список словарей: form_name, question_text, answers, no_count, no_rate.
+    """
+    where, params = _period_filters(form_name, year, month_from, month_to)
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT q.form_name, q.question_text, t.answers, t.no_count
+            FROM (
+                SELECT s.question_id, SUM(s.answer_count) AS answers, SUM(s.no_count) AS no_count
+                FROM answer_stats s
+                WHERE {where}
+                GROUP BY s.question_id
+                HAVING SUM(s.no_count) > 0
+                ORDER BY no_count DESC, answers DESC
+                LIMIT ?
+            ) t
+            JOIN questions q ON q.id = t.question_id
+            ORDER BY t.no_count DESC, t.answers DESC
+        ''', params + [limit]).fetchall()
+
+    return [{
+        'form_name': row['form_name'],
+        'question_text': row['question_text'],
+        'answers': row['answers'],
+        'no_count': row['no_count'],
+        'no_rate': _rate(row['no_count'], row['answers'])
+    } for row in rows]
+
+
+MONTHLY_HEADERS = ["Форма", "Год", "Месяц", "Ответов", "Ответов \"Нет\"", "Доля \"Нет\", %"]
+QUESTION_HEADERS = ["Форма", "Вопрос", "Ответов", "Ответов \"Нет\"", "Доля \"Нет\", %"]
+
+
+def monthly_rows(rates):
+    """Строки таблицы доли "Нет" по месяцам для экспорта"""
+    return [[r['form_name'], r['year'], r['month'], r['answers'], r['no_count'], r['no_rate']] for r in rates]
+
+
+def question_rows(questions):
+    """Строки таблицы проблемных вопросов для экспорта"""
+    return [[q['form_name'], q['question_text'], q['answers'], q['no_count'], q['no_rate']] for q in questions]
+
+
+def export_summary_csv(file_path, rates, questions):
+    """Сводка в CSV (разделитель ';', кодировка для Excel)"""
+    with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(MONTHLY_HEADERS)
+        writer.writerows(monthly_rows(rates))
+        writer.writerow([])
+        writer.writerow(QUESTION_HEADERS)
+        writer.writerows(question_rows(questions))
+    return file_path
+
+
+def export_summary(file_path, form_name=None, year=None, month_from=1, month_to=12, limit=20):
+    """Выгрузить сводку в .xlsx или .csv (по расширению файла)"""
+    rates = no_rate_by_month(form_name, year, month_from, month_to)
+    questions = top_failing_questions(form_name, year, month_from, month_to, limit)
+
+    if file_path.lower().endswith(".csv"):
+        return export_summary_csv(file_path, rates, questions)
+
+    from export_excel import create_analytics_workbook
+    return create_analytics_workbook(
+        file_path,
+        [("Доля Нет по месяцам", MONTHLY_HEADERS, monthly_rows(rates)),
+         ("Проблемные вопросы", QUESTION_HEADERS, question_rows(questions))]
+    )
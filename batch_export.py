@@ -0,0 +1,152 @@
+"""
+Пакетная выгрузка отчетов в Excel
+Отчеты читаются из БД порциями, книги формируются в пуле процессов;
+сводная книга за период пишется потоково в одном процессе
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from database import get_reports_by_period, get_reports_with_answers, month_name, month_number
+from export_excel import create_consolidated_report
+from export_store import export_store
+
+
+READ_CHUNK_SIZE = 200
+
+
+def safe_file_name(text):
+    """Имя файла без символов, запрещенных в Windows"""
+    return re.sub(r'[\\/:*?"<>|]+', '_', text).strip()
+
+
+def report_file_name(report_data):
+    """Имя файла пакетной выгрузки; ID отчета делает его уникальным"""
+    base = f"{report_data['form_name']} {report_data['month']} {report_data['year']}"
+    return f"{safe_file_name(base)}_id{report_data['id']}.xlsx"
+
+
+def _render_report(report_data, output_dir):
+    """
+    Сформировать книгу одного отчета (выполняется в дочернем процессе); неизмененный отчет копируется из хранилища.
+    Дочерние процессы в БД не пишут, а копии в output_dir не вносятся в манифест:
+    файлом хранилища для этого содержимого остается выгрузка, на которую ссылается отчет.
+    """
+    try:
+        report_name = f"Отчет: {report_data['form_name']} {report_data['month']} {report_data['year']}"
+        file_path, _ = export_store.render(
+            report_name=report_name,
+            form_name=report_data['form_name'],
+            month=report_data['month'],
+            year=report_data['year'],
+            answers=report_data['answers'],
+            filename=os.path.join(output_dir, report_file_name(report_data))
+        )
+        return {'report_id': report_data['id'], 'ok': True, 'file': file_path}
+    except Exception as e:
+        return {'report_id': report_data['id'], 'ok': False, 'error': str(e)}
+
+
+def select_report_ids(form_name=None, year=None, month_from=1, month_to=12):
+    """ID отчетов по форме, году и диапазону месяцев"""
+    return [report['id'] for report in get_reports_by_period(form_name, year, month_from, month_to)]
+
+
+def _iter_reports(report_ids):
+    """Отчеты с ответами, прочитанные из БД порциями"""
+    for start in range(0, len(report_ids), READ_CHUNK_SIZE):
+        yield from get_reports_with_answers(report_ids[start:start + READ_CHUNK_SIZE])
+
+
+def export_reports_batch(report_ids=None, form_name=None, year=None, month_from=1, month_to=12,
+                         output_dir="отчеты", workers=None, progress=None):
+    """
+    Выгрузить отчеты по списку ID или по фильтру (форма, год, месяцы).
+    progress(done, total, result) вызывается после каждого файла.
+    Ошибка одного файла не прерывает выгрузку.
+    Возвращает список результатов {'report_id', 'ok', 'file' | 'error'}.
+    """
+    if report_ids is None:
+        report_ids = select_report_ids(form_name, year, month_from, month_to)
+    report_ids = list(report_ids)
+
+    os.makedirs(output_dir, exist_ok=True)
+    total = len(report_ids)
+    results = []
+    if not total:
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    started = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            report_id = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'report_id': report_id, 'ok': False, 'error': str(e)}
+            results.append(result)
+            if progress:
+                progress(len(results), total, result)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for report_data in _iter_reports(report_ids):
+            # Ограничиваем число отчетов в памяти
+            while len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[pool.submit(_render_report, report_data, output_dir)] = report_data['id']
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    found = {result['report_id'] for result in results}
+    for report_id in report_ids:
+        if report_id not in found:
+            result = {'report_id': report_id, 'ok': False, 'error': "Отчет не найден в БД"}
+            results.append(result)
+            if progress:
+                progress(len(results), total, result)
+
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for result in results if not result['ok'])
+    print(f"Выгружено отчетов: {total - failed} из {total}, ошибок: {failed}, время: {elapsed:.1f} с")
+    return results
+
+
+def _period_title(form_name, year, month_from, month_to):
+    """Описание периода для заголовка и имени файла"""
+    month_from, month_to = month_number(month_from), month_number(month_to)
+    months = month_name(month_from) if month_from == month_to else f"{month_name(month_from)}-{month_name(month_to)}"
+    parts = [form_name or "все формы", months]
+    if year is not None:
+        parts.append(str(year))
+    return " ".join(parts)
+
+
+def export_consolidated(form_name=None, year=None, month_from=1, month_to=12, filename=None, output_dir="отчеты"):
+    """
+    Все отчеты за период в одной книге: сводка и по листу на отчет.
+    Возвращает (путь к файлу, число отчетов).
+    """
+    reports_meta = get_reports_by_period(form_name, year, month_from, month_to)
+    if not reports_meta:
+        raise ValueError("За выбранный период нет отчетов")
+
+    period = _period_title(form_name, year, month_from, month_to)
+    if filename is None:
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(output_dir, f"{safe_file_name('Сводный отчет ' + period)}_{timestamp}.xlsx")
+
+    started = time.perf_counter()
+    report_ids = [report['id'] for report in reports_meta]
+    create_consolidated_report(f"Сводный отчет: {period}", reports_meta, _iter_reports(report_ids), filename)
+    print(f"Сводная книга: {len(report_ids)} отчетов за {time.perf_counter() - started:.1f} с -> {filename}")
+    return filename, len(report_ids)
@@ -0,0 +1,4 @@
+"""
+Замеры производительности системы автоматизации отчетов
+Запуск модулей: python -m benchmarks.<модуль>
+"""
@@ -0,0 +1,117 @@
+"""
+Память ответов: словари против AnswerRecord
+python -m benchmarks.answer_records --answers 100000 --questions 200
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from connection import configure_pool, close_pool, connection
+from database import init_database, save_reports_bulk, get_reports_with_answers
+from records import QuestionDef, AnswerRecord
+
+
+def make_questions(count):
+    """Вопросы формы с текстами характерной длины"""
+    return [QuestionDef(
+        f"Вопрос {i + 1}: мероприятия по плану управления оборудованием выполняются в срок?",
+        f"Пункт 7.1.{i % 9}: Организация должна обеспечивать техническое обслуживание инфраструктуры.",
+        f"Раздел {i % 12}.{i % 7} ПП.О2: ГИ ежеквартально осуществляет проверку и актуализацию графика ППР.",
+        "График ППР оборудования" if i % 3 else ""
+    ) for i in range(count)]
+
+
+def answers_as_dicts(questions):
+    """Прежний формат ReportLogic.init_report"""
+    return [{
+        'question_text': q.question,
+        'answer_yes_no': 'Да',
+        'comment': '',
+        'gost_text': q.gost,
+        'quality_text': q.quality,
+        'documents_text': q.documents
+    } for q in questions]
+
+
+def answers_as_records(questions):
+    """Текущий формат ReportLogic.init_report"""
+    return [AnswerRecord(q, 'Да', '') for q in questions]
+
+
+def reports_as_dicts(report_ids):
+    """Прежнее чтение из БД: словарь с копиями текстов на каждую строку"""
+    reports = {}
+    with connection() as conn:
+        placeholders = ", ".join("?" for _ in report_ids)
+        for row in conn.execute(f'''
+            SELECT a.report_id, q.question_text, a.answer_yes_no, a.comment,
+                   q.gost_text, q.quality_text, q.documents_text
+            FROM answers a
+            JOIN questions q ON q.id = a.question_id
+            WHERE a.report_id IN ({placeholders})
+            ORDER BY a.report_id, a.id
+        ''', report_ids):
+            reports.setdefault(row['report_id'], []).append({
+                'question_text': row['question_text'],
+                'answer_yes_no': row['answer_yes_no'],
+                'comment': row['comment'],
+                'gost_text': row['gost_text'],
+                'quality_text': row['quality_text'],
+                'documents_text': row['documents_text'] or ''
+            })
+    return reports
+
+
+def retained_memory(build):
+    """Память, занятая результатом build() после завершения построения"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер памяти ответов")
+    parser.add_argument("--answers", type=int, default=100000)
+    parser.add_argument("--questions", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    questions = make_questions(args.questions)
+    copies = args.answers // args.questions
+    results = []
+
+    # Ответы в памяти ReportLogic: несколько открытых отчетов одной формы
+    results.append(("init_report, словари", retained_memory(
+        lambda: [answers_as_dicts(questions) for _ in range(copies)])))
+    results.append(("init_report, AnswerRecord", retained_memory(
+        lambda: [answers_as_records(questions) for _ in range(copies)])))
+
+    # Ответы, прочитанные из БД
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+        save_reports_bulk(
+            ({'form_name': "Форма", 'month': "Январь", 'year': 2024, 'report_date': "01.01.2024"},
+             answers_as_records(questions), "")
+            for _ in range(copies)
+        )
+        report_ids = list(range(1, copies + 1))
+        results.append(("БД, словари", retained_memory(lambda: reports_as_dicts(report_ids))))
+        results.append(("БД, AnswerRecord", retained_memory(lambda: get_reports_with_answers(report_ids))))
+        close_pool()
+
+    print(f"Ответов: {copies * args.questions}, вопросов в форме: {args.questions}")
+    print(f"{'Способ':>28} {'Память, МБ':>12} {'Байт на ответ':>15}")
+    for name, size in results:
+        print(f"{name:>28} {size / 1024 / 1024:>12.1f} {size / (copies * args.questions):>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
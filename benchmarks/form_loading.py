@@ -0,0 +1,89 @@
+"""
+Сравнение полной и потоковой загрузки форм
+python -m benchmarks.form_loading --rows 1000 10000 100000
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+from form_reader import iter_questions
+
+
+def generate_form(file_path, rows):
+    """Сгенерировать форму с заданным числом вопросов"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Вопросы")
+    ws.append(["Вопрос", "ГОСТ ИСО 9001", "Руководство по качеству", "Связанные документы"])
+    for i in range(rows):
+        ws.append([
+            f"Вопрос {i + 1}: мероприятия по плану управления оборудованием выполняются в срок?",
+            f"Пункт 7.1.{i % 9}: Организация должна обеспечивать техническое обслуживание инфраструктуры.",
+            f"Раздел {i % 12}.{i % 7} ПП.О2: ГИ ежеквартально осуществляет проверку и актуализацию графика ППР.",
+            "График ППР оборудования" if i % 3 else ""
+        ])
+    wb.save(file_path)
+
+
+def load_full(file_path):
+    """Прежний способ: полная модель книги со стилями"""
+    wb = openpyxl.load_workbook(file_path)
+    ws = wb.active
+    questions = []
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if row[0]:
+            questions.append({
+                'question': row[0],
+                'gost': row[1] or "",
+                'quality': row[2] or "",
+                'documents': row[3] or ""
+            })
+    wb.close()
+    return questions
+
+
+def load_streaming(file_path):
+    """Потоковое чтение через form_reader"""
+    return list(iter_questions(file_path))
+
+
+def measure(loader, file_path):
+    """Время загрузки и пиковая память Python-объектов (отдельным прогоном)"""
+    gc.collect()
+    started = time.perf_counter()
+    questions = loader(file_path)
+    elapsed = time.perf_counter() - started
+    count = len(questions)
+    del questions
+
+    gc.collect()
+    tracemalloc.start()
+    loader(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер загрузки форм")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args(argv)
+
+    print(f"{'Строк':>8} {'Способ':>10} {'Время, с':>10} {'Пик памяти, МБ':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            file_path = os.path.join(tmp, f"form_{rows}.xlsx")
+            generate_form(file_path, rows)
+            for name, loader in (("полная", load_full), ("потоковая", load_streaming)):
+                count, elapsed, peak = measure(loader, file_path)
+                assert count == rows
+                print(f"{rows:>8} {name:>10} {elapsed:>10.2f} {peak / 1024 / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
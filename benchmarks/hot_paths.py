@@ -0,0 +1,190 @@
+"""
+Замеры основных операций без графического интерфейса
+Результаты сохраняются в JSON для сравнения версий:
+
+python -m benchmarks.hot_paths --questions 20 1000 10000 --reports 1000 10000 --output results.json
+python -m benchmarks.hot_paths --baseline old.json --output new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import build_database, write_form, synthetic_questions, synthetic_answers
+from connection import close_pool, connection
+from database import save_report_to_db, get_all_reports, get_report_by_id, get_reports_page
+from export_excel import create_excel_report
+from form_cache import form_cache
+from logic import ReportLogic
+
+
+def timed(func, repeat):
+    """Время выполнения func() в секундах для каждого из repeat запусков"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def summarize(name, params, runs):
+    """Запись результата: минимум, медиана и среднее"""
+    return {
+        'name': name,
+        'params': params,
+        'runs': len(runs),
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'mean': statistics.fmean(runs)
+    }
+
+
+def clear_form_cache():
+    """Сбросить кэш форм в памяти и в БД, чтобы форма разбиралась заново"""
+    form_cache.clear()
+    with connection() as conn:
+        conn.execute("DELETE FROM form_cache")
+        conn.commit()
+
+
+def bench_forms(workdir, question_counts, repeat):
+    """Загрузка формы, сохранение отчета и экспорт в Excel для разных размеров формы"""
+    results = []
+    rng = random.Random(1)
+
+    for count in question_counts:
+        form_path = write_form(os.path.join(workdir, f"form_{count}.xlsx"), count)
+        logic = ReportLogic()
+        params = {'questions': count}
+
+        def load_cold():
+            clear_form_cache()
+            assert logic.load_questions_from_excel(form_path)
+
+        def load_disk_cache():
+            form_cache.clear()
+            assert logic.load_questions_from_excel(form_path)
+
+        def load_memory_cache():
+            assert logic.load_questions_from_excel(form_path)
+
+        results.append(summarize("load_questions_from_excel.cold", params, timed(load_cold, repeat)))
+        results.append(summarize("load_questions_from_excel.disk_cache", params, timed(load_disk_cache, repeat)))
+        results.append(summarize("load_questions_from_excel.memory_cache", params, timed(load_memory_cache, repeat)))
+
+        answers = synthetic_answers(synthetic_questions(count), rng)
+        report_data = {'form_name': f"Форма {count}", 'month': "Январь", 'year': 2024, 'report_date': "01.01.2024"}
+        results.append(summarize("save_report_to_db", params, timed(
+            lambda: save_report_to_db(report_data, answers, form_path), repeat)))
+
+        excel_path = os.path.join(workdir, f"report_{count}.xlsx")
+        results.append(summarize("create_excel_report", params, timed(
+            lambda: create_excel_report("Отчет", report_data['form_name'], "Январь", 2024, answers, excel_path), repeat)))
+
+    return results
+
+
+def bench_database(workdir, report_counts, questions_per_report, repeat, reuse):
+    """Чтение списков и отчетов на базах разного размера"""
+    results = []
+    for count in report_counts:
+        db_path = os.path.join(workdir, f"reports_{count}x{questions_per_report}.db")
+        started = time.perf_counter()
+        build_database(db_path, count, questions_per_report, reuse=reuse)
+        print(f"База {os.path.basename(db_path)} готова за {time.perf_counter() - started:.1f} с")
+        params = {'reports': count, 'questions': questions_per_report}
+
+        results.append(summarize("get_all_reports", params, timed(get_all_reports, repeat)))
+        results.append(summarize("get_reports_page", params, timed(
+            lambda: get_reports_page(limit=100), repeat)))
+        middle = max(1, count // 2)
+        results.append(summarize("get_report_by_id", params, timed(
+            lambda: get_report_by_id(middle), repeat)))
+        close_pool()
+
+    return results
+
+
+def environment():
+    """Сведения о среде для сравнения результатов"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def _result_key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def print_results(results, baseline=None):
+    """Таблица результатов; при наличии базового прогона - отношение медиан"""
+    previous = {_result_key(r): r for r in baseline['results']} if baseline else {}
+    print(f"{'Операция':<40} {'Параметры':<30} {'Медиана, мс':>12} {'Было, мс':>10} {'Отношение':>10}")
+    for result in results:
+        params = ", ".join(f"{k}={v}" for k, v in result['params'].items())
+        line = f"{result['name']:<40} {params:<30} {result['median'] * 1000:>12.2f}"
+        old = previous.get(_result_key(result))
+        if old:
+            line += f" {old['median'] * 1000:>10.2f} {result['median'] / old['median']:>10.2f}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры основных операций")
+    parser.add_argument("--questions", type=int, nargs="+", default=[20, 1000, 10000],
+                        help="Размеры форм (число вопросов)")
+    parser.add_argument("--reports", type=int, nargs="+", default=[1000, 10000],
+                        help="Размеры баз (число отчетов)")
+    parser.add_argument("--report-questions", type=int, default=20, help="Вопросов в отчете синтетической базы")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов каждого замера")
+    parser.add_argument("--workdir", help="Папка для форм и баз; созданные базы используются повторно")
+    parser.add_argument("--output", help="Файл JSON с результатами")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+
+        build_database(os.path.join(workdir, "forms.db"), 0, 0, reuse=False)
+        results = bench_forms(workdir, args.questions, args.repeat)
+        close_pool()
+
+        results += bench_database(workdir, args.reports, args.report_questions, args.repeat,
+                                  reuse=args.workdir is not None)
+
+    report = {'environment': environment(), 'results': results}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
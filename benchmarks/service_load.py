@@ -0,0 +1,198 @@
+"""
+Нагрузочная проверка сервиса отчетов (service.py)
+Несколько клиентов одновременно заполняют и сохраняют отчеты и читают список;
+проверяется, что ни один запрос не завершился ошибкой (в том числе "database is locked")
+
+python -m benchmarks.service_load --clients 16 --reports 10 --questions 200
+python -m benchmarks.service_load --url http://127.0.0.1:8765 --form "Главный инженер"
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from benchmarks.synthetic import write_form
+from connection import configure_pool, close_pool, connection
+from database import MONTHS, init_database
+
+
+class Client:
+    """Клиент HTTP/JSON с постоянным соединением"""
+
+    def __init__(self, host, port, timings):
+        self.connection = http.client.HTTPConnection(host, port, timeout=120)
+        self.timings = timings
+
+    def request(self, method, path, payload=None, name=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        started = time.perf_counter()
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = json.loads(response.read() or b"{}")
+        self.timings[name or f"{method} {path}"].append((time.perf_counter() - started, response.status))
+        return response.status, data
+
+    def close(self):
+        self.connection.close()
+
+
+def run_client(number, host, port, form_name, reports, chunk, timings, errors):
+    """Один инспектор: reports отчетов подряд, ответы порциями по chunk"""
+    client = Client(host, port, timings)
+    saved = 0
+    try:
+        for i in range(reports):
+            month = MONTHS[(number + i) % 12]
+            status, session = client.request("POST", "/drafts", {
+                'form_name': form_name, 'month': month, 'year': 2000 + number % 30, 'report_date': "01.01.2024"
+            }, name="POST /drafts")
+            if status != 201:
+                errors.append(f"клиент {number}: POST /drafts -> {status} {session}")
+                continue
+
+            path = f"/sessions/{session['session']}"
+            total = session['total']
+            for start in range(0, total, chunk):
+                answers = [{'index': index, 'answer': "Нет" if (index + number) % 7 == 0 else "Да",
+                            'comment': f"Клиент {number}" if index % 10 == 0 else ""}
+                           for index in range(start, min(start + chunk, total))]
+                status, result = client.request("POST", f"{path}/answers", {'answers': answers},
+                                                name="POST /sessions/<id>/answers")
+                if status != 200:
+                    errors.append(f"клиент {number}: answers -> {status} {result}")
+
+            status, result = client.request("POST", f"{path}/save", {}, name="POST /sessions/<id>/save")
+            if status != 201:
+                errors.append(f"клиент {number}: save -> {status} {result}")
+                continue
+            saved += 1
+
+            status, page = client.request("GET", "/reports?limit=20", name="GET /reports")
+            if status != 200:
+                errors.append(f"клиент {number}: GET /reports -> {status} {page}")
+            status, report = client.request("GET", f"/reports/{result['report_id']}", name="GET /reports/<id>")
+            if status != 200 or len(report.get('answers', [])) != total:
+                errors.append(f"клиент {number}: отчет {result['report_id']} прочитан с ошибкой ({status})")
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        errors.append(f"клиент {number}: {e}")
+    finally:
+        client.close()
+    return saved
+
+
+def start_local_service(workdir, questions):
+    """Сервис в отдельном потоке на свободном порту; форма и база - во временной папке"""
+    from service import ReportService
+
+    os.chdir(workdir)
+    os.makedirs("формы", exist_ok=True)
+    os.makedirs("отчеты", exist_ok=True)
+    write_form(os.path.join("формы", "Нагрузка.xlsx"), questions)
+    configure_pool(os.path.join(workdir, "reports.db"))
+    init_database()
+
+    ready = threading.Event()
+    state = {}
+
+    def on_ready(port):
+        state['port'] = port
+        ready.set()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state['loop'] = loop
+        state['task'] = loop.create_task(ReportService().serve("127.0.0.1", 0, ready=on_ready))
+        try:
+            loop.run_until_complete(state['task'])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        state['loop'].call_soon_threadsafe(state['task'].cancel)
+        thread.join()
+
+    return "127.0.0.1", state['port'], "Нагрузка", stop
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочная проверка сервиса отчетов")
+    parser.add_argument("--clients", type=int, default=16, help="Одновременных клиентов")
+    parser.add_argument("--reports", type=int, default=5, help="Отчетов на клиента")
+    parser.add_argument("--questions", type=int, default=200, help="Вопросов в синтетической форме")
+    parser.add_argument("--chunk", type=int, default=20, help="Ответов в одном запросе")
+    parser.add_argument("--url", help="Адрес работающего сервиса (иначе сервис запускается во временной папке)")
+    parser.add_argument("--form", help="Форма на работающем сервисе")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        if args.url:
+            url = urlsplit(args.url)
+            host, port, form_name, stop = url.hostname, url.port or 80, args.form, None
+        else:
+            host, port, form_name, stop = start_local_service(workdir, args.questions)
+
+        timings = defaultdict(list)
+        errors = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            saved = sum(pool.map(
+                lambda n: run_client(n, host, port, form_name, args.reports, args.chunk, timings, errors),
+                range(args.clients)
+            ))
+        elapsed = time.perf_counter() - started
+
+        client = Client(host, port, timings)
+        _, service_metrics = client.request("GET", "/metrics")
+        _, form = client.request("GET", f"/forms/{quote(form_name)}", name="GET /forms/<форма>")
+        client.close()
+
+        if stop:
+            stop()
+            with connection() as conn:
+                stored = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+            close_pool()
+            if stored != saved:
+                errors.append(f"в БД {stored} отчетов, сохранено клиентами {saved}")
+        os.chdir(cwd)
+
+    print(f"Клиентов: {args.clients}, отчетов: {saved} из {args.clients * args.reports}, "
+          f"вопросов в форме: {len(form.get('questions', []))}")
+    print(f"Время: {elapsed:.1f} с, {saved / elapsed:.1f} отчетов/с, очередь записи в конце: {service_metrics.get('write_queue')}")
+    print(f"{'Запрос':<32} {'Число':>7} {'Медиана, мс':>12} {'95%, мс':>10} {'Макс., мс':>10} {'Не 2xx':>7}")
+    for name, samples in sorted(timings.items()):
+        durations = [duration for duration, _ in samples]
+        failed = sum(1 for _, status in samples if status >= 300)
+        print(f"{name:<32} {len(samples):>7} {statistics.median(durations) * 1000:>12.1f} "
+              f"{percentile(durations, 0.95) * 1000:>10.1f} {max(durations) * 1000:>10.1f} {failed:>7}")
+
+    locked = [error for error in errors if "locked" in error]
+    print(f"Ошибок: {len(errors)}, из них \"database is locked\": {len(locked)}")
+    for error in errors[:20]:
+        print("  " + error)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
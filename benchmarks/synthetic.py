@@ -0,0 +1,94 @@
+"""
+Синтетические формы и базы данных для замеров
+Вопросы строятся по образцу формы Главного инженера (create_sample_excel.py)
+"""
+
+import os
+import random
+
+import openpyxl
+
+from connection import configure_pool
+from create_sample_excel import QUESTIONS_DATA
+from database import MONTHS, init_database, save_reports_bulk
+from records import QuestionDef, AnswerRecord
+
+
+FORM_HEADERS = ["Вопрос", "ГОСТ ИСО 9001", "Руководство по качеству", "Связанные документы"]
+
+COMMENTS = [
+    "Замечание устранено в срок",
+    "Требуется актуализация журнала ППР",
+    "Поверка СИ перенесена на следующий месяц",
+    "Ответственный ознакомлен под подпись"
+]
+
+
+def synthetic_questions(count):
+    """Вопросы формы: образцы из формы Главного инженера с порядковыми номерами"""
+    questions = []
+    for i in range(count):
+        item = QUESTIONS_DATA[i % len(QUESTIONS_DATA)]
+        questions.append(QuestionDef(
+            f"{i + 1}. {item['question']}",
+            item['gost'],
+            item['quality'],
+            item['documents']
+        ))
+    return questions
+
+
+def write_form(file_path, count):
+    """Записать форму .xlsx с count вопросами"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Вопросы")
+    ws.append(FORM_HEADERS)
+    for question in synthetic_questions(count):
+        ws.append([question.question, question.gost, question.quality, question.documents])
+    wb.save(file_path)
+    return file_path
+
+
+def synthetic_answers(questions, rng, no_rate=0.1, comment_rate=0.2):
+    """Ответы на вопросы формы: доля "Нет" и доля комментариев задаются"""
+    return [AnswerRecord(
+        question,
+        "Нет" if rng.random() < no_rate else "Да",
+        rng.choice(COMMENTS) if rng.random() < comment_rate else ""
+    ) for question in questions]
+
+
+def iter_reports(report_count, questions_per_report, forms=3, first_year=2015, seed=1):
+    """Отчеты (report_data, answers, file_path) для save_reports_bulk"""
+    rng = random.Random(seed)
+    form_questions = [
+        (f"Синтетическая форма {n + 1}", synthetic_questions(questions_per_report))
+        for n in range(forms)
+    ]
+    for i in range(report_count):
+        form_name, questions = form_questions[i % forms]
+        year = first_year + (i // (12 * forms)) % 10
+        month = MONTHS[(i // forms) % 12]
+        report_data = {
+            'form_name': form_name,
+            'month': month,
+            'year': year,
+            'report_date': f"01.{MONTHS.index(month) + 1:02d}.{year}"
+        }
+        yield report_data, synthetic_answers(questions, rng), f"отчеты/synthetic_{i + 1}.xlsx"
+
+
+def build_database(db_path, report_count, questions_per_report, forms=3, reuse=True):
+    """
+    Создать базу с report_count отчетами и подключить к ней пул соединений.
+    При reuse=True уже созданный файл используется повторно.
+    """
+    exists = reuse and os.path.exists(db_path)
+    if not reuse and os.path.exists(db_path):
+        os.remove(db_path)
+
+    configure_pool(db_path)
+    init_database()
+    if not exists and report_count:
+        save_reports_bulk(iter_reports(report_count, questions_per_report, forms), batch_size=1000)
+    return db_path
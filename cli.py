@@ -0,0 +1,182 @@
+"""
+Командная строка системы автоматизации отчетов
+Пакетные операции без графического интерфейса
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+from database import init_database
+
+
+def cmd_import(args):
+    """Импорт папки с отчетами Excel в базу данных"""
+    from report_import import import_reports_from_directory
+
+    stats = import_reports_from_directory(args.directory, batch_size=args.batch_size)
+    return 0 if stats['reports'] else 1
+
+
+def _parse_months(text):
+    """Диапазон месяцев: "3" или "1-6" """
+    first, _, last = text.partition("-")
+    return int(first), int(last or first)
+
+
+def cmd_export(args):
+    """Пакетная выгрузка отчетов в Excel"""
+    from batch_export import export_reports_batch
+
+    month_from, month_to = _parse_months(args.months)
+
+    def progress(done, total, result):
+        status = result['file'] if result['ok'] else f"ОШИБКА: {result['error']}"
+        print(f"[{done}/{total}] отчет {result['report_id']}: {status}")
+
+    results = export_reports_batch(
+        report_ids=args.ids,
+        form_name=args.form,
+        year=args.year,
+        month_from=month_from,
+        month_to=month_to,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        progress=progress
+    )
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+def cmd_consolidate(args):
+    """Сводная книга за период"""
+    from batch_export import export_consolidated
+
+    month_from, month_to = _parse_months(args.months)
+    try:
+        export_consolidated(args.form, args.year, month_from, month_to, filename=args.output, output_dir=args.output_dir)
+    except ValueError as e:
+        print(e)
+        return 1
+    return 0
+
+
+def cmd_analytics(args):
+    """Сводка по ответам "Нет" в .xlsx или .csv"""
+    from analytics import export_summary
+
+    month_from, month_to = _parse_months(args.months)
+    file_path = export_summary(args.output, args.form, args.year, month_from, month_to, limit=args.top)
+    print(f"Сводка сохранена: {file_path}")
+    return 0
+
+
+def cmd_generate(args):
+    """Отчеты из файлов ответов CSV/JSON"""
+    from report_generate import generate_reports
+
+    defaults = {key: value for key, value in
+                (('month', args.month), ('year', args.year), ('report_date', args.date)) if value is not None}
+
+    def progress(done, total, result):
+        name = os.path.basename(result['file'])
+        if not result['ok']:
+            print(f"[{done}/{total}] {name}: ОШИБКА")
+            for error in result['errors']:
+                print(f"    {error}")
+        elif args.dry_run:
+            print(f"[{done}/{total}] {name}: проверен")
+        else:
+            print(f"[{done}/{total}] {name}: отчет {result['report_id']} -> {result['output']}")
+
+    results = generate_reports(
+        args.paths,
+        form_name=args.form,
+        defaults=defaults,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        progress=progress
+    )
+    return 0 if results and all(result['ok'] for result in results) else 1
+
+
+def cmd_gc(args):
+    """Удаление неиспользуемых файлов выгрузок"""
+    from export_store import ExportStore, GC_MIN_AGE
+
+    min_age = GC_MIN_AGE if args.min_age is None else args.min_age
+    stats = ExportStore(args.directory).collect_garbage(dry_run=args.dry_run, min_age=min_age)
+    for path in stats['files']:
+        print(path)
+    action = "Будет удалено" if args.dry_run else "Удалено"
+    print(f"{action} файлов: {len(stats['files'])} ({stats['bytes'] / 1024 / 1024:.1f} МБ), "
+          f"записей манифеста без отчета или файла: {stats['stale_entries']}")
+    return 0
+
+
+def build_parser():
+    """Описание команд и аргументов"""
+    parser = argparse.ArgumentParser(description="Система автоматизации отчетов: пакетные операции")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Импортировать папку с отчетами .xlsx в БД")
+    import_parser.add_argument("directory", help="Папка с файлами отчетов")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Количество отчетов на одну фиксацию")
+    import_parser.set_defaults(func=cmd_import)
+
+    export_parser = subparsers.add_parser("export", help="Пакетно выгрузить отчеты из БД в Excel")
+    export_parser.add_argument("--ids", type=int, nargs="+", help="ID отчетов (иначе - по фильтру)")
+    export_parser.add_argument("--form", help="Название формы")
+    export_parser.add_argument("--year", type=int, help="Год")
+    export_parser.add_argument("--months", default="1-12", help="Месяц или диапазон, например 1-3")
+    export_parser.add_argument("--output-dir", default="отчеты", help="Папка для файлов")
+    export_parser.add_argument("--workers", type=int, help="Число процессов (по умолчанию - число ядер)")
+    export_parser.set_defaults(func=cmd_export)
+
+    consolidate_parser = subparsers.add_parser("consolidate", help="Все отчеты за период в одной книге Excel")
+    consolidate_parser.add_argument("--form", help="Название формы (по умолчанию - все формы)")
+    consolidate_parser.add_argument("--year", type=int, help="Год")
+    consolidate_parser.add_argument("--months", default="1-12", help="Месяц или диапазон, например 4-6 для второго квартала")
+    consolidate_parser.add_argument("--output", help="Файл книги (по умолчанию - в папке --output-dir)")
+    consolidate_parser.add_argument("--output-dir", default="отчеты", help="Папка для файла")
+    consolidate_parser.set_defaults(func=cmd_consolidate)
+
+    analytics_parser = subparsers.add_parser("analytics", help="Сводка по ответам \"Нет\" по формам и месяцам")
+    analytics_parser.add_argument("output", help="Файл сводки .xlsx или .csv")
+    analytics_parser.add_argument("--form", help="Название формы")
+    analytics_parser.add_argument("--year", type=int, help="Год")
+    analytics_parser.add_argument("--months", default="1-12", help="Месяц или диапазон, например 1-3")
+    analytics_parser.add_argument("--top", type=int, default=20, help="Число проблемных вопросов в сводке")
+    analytics_parser.set_defaults(func=cmd_analytics)
+
+    generate_parser = subparsers.add_parser("generate", help="Создать отчеты из файлов ответов .csv/.json")
+    generate_parser.add_argument("paths", nargs="+", help="Файлы ответов или папки с ними")
+    generate_parser.add_argument("--form", help="Название формы (если не указано в файле)")
+    generate_parser.add_argument("--month", help="Месяц (если не указан в файле)")
+    generate_parser.add_argument("--year", type=int, help="Год (если не указан в файле)")
+    generate_parser.add_argument("--date", help="Дата отчета ДД.ММ.ГГГГ (по умолчанию - сегодня)")
+    generate_parser.add_argument("--output-dir", default="отчеты", help="Папка для файлов Excel")
+    generate_parser.add_argument("--workers", type=int, help="Число процессов (по умолчанию - число ядер)")
+    generate_parser.add_argument("--dry-run", action="store_true", help="Только проверить файлы, не создавая отчеты")
+    generate_parser.set_defaults(func=cmd_generate)
+
+    gc_parser = subparsers.add_parser("gc", help="Удалить файлы выгрузок, на которые не ссылаются отчеты в БД")
+    gc_parser.add_argument("--directory", default="отчеты", help="Папка выгрузок")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Только показать файлы, не удаляя их")
+    gc_parser.add_argument("--min-age", type=int,
+                           help="Не трогать файлы моложе указанного числа секунд (по умолчанию - час)")
+    gc_parser.set_defaults(func=cmd_gc)
+
+    return parser
+
+
+def main(argv=None):
+    """Точка входа командной строки"""
+    args = build_parser().parse_args(argv)
+    init_database()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
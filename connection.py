@@ -0,0 +1,147 @@
+"""
+Менеджер соединений с базой данных SQLite
+Потокобезопасный пул долгоживущих соединений
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+DB_PATH = 'reports.db'
+POOL_SIZE = 4
+
+# WAL позволяет читать во время записи. Для reports.db на сетевом диске,
+# где общая память SQLite недоступна, следует указать режим 'DELETE'.
+JOURNAL_MODE = 'WAL'
+SYNCHRONOUS = 'NORMAL'
+CACHE_SIZE_KB = 16000
+MMAP_SIZE = 64 * 1024 * 1024
+BUSY_TIMEOUT = 30
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """Пул соединений с одной базой данных"""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, journal_mode=JOURNAL_MODE):
+        self.path = path
+        self.size = size
+        self.journal_mode = journal_mode
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_connection(self):
+        """Открыть и настроить новое соединение"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        return conn
+
+    def acquire(self):
+        """Взять соединение из пула, при необходимости открыв новое"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        return self._idle.get()
+
+    def release(self, conn):
+        """Вернуть соединение в пул"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        """Закрыть все свободные соединения"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Получить общий пул соединений"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def configure_pool(path=DB_PATH, size=POOL_SIZE, journal_mode=JOURNAL_MODE):
+    """Пересоздать общий пул с другими параметрами"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(path, size, journal_mode)
+    return _pool
+
+
+def close_pool():
+    """Закрыть общий пул соединений"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def connection():
+    """Соединение из пула на время блока with"""
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction():
+    """Соединение из пула с фиксацией или откатом транзакции"""
+    with connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
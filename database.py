@@ -3,205 +3,534 @@
 Управление отчетами и ответами
 """
 
-import sqlite3
+import hashlib
+import re
+import time
 from datetime import datetime
 
+from connection import connection, transaction
+from metrics import timed, measure
+from records import QuestionDef, AnswerRecord
 
-def get_connection():
-    """Получить соединение с БД"""
-    conn = sqlite3.connect('reports.db')
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
 
+MONTHS = ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+          "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"]
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DISPLAY_TIMESTAMP_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+REPORT_COLUMNS = ("id, form_name, month, year, report_date, created_at, file_path, "
+                  "question_count, yes_count, no_count, comment_count")
+
+# Сколько самых новых совпадений в комментариях ранжируется по релевантности
+SEARCH_RANK_WINDOW = 1000
+
+# Ключи сортировки для постраничной выборки; id замыкает ключ для уникальности
+REPORT_SORT_KEYS = {
+    'id': ('id',),
+    'form_name': ('form_name', 'id'),
+    'period': ('year', 'month', 'id'),
+    'created_at': ('created_at', 'id'),
+    'no_count': ('no_count', 'id')
+}
+
+
+@timed()
 def init_database():
-    """Инициализация базы данных - создание таблиц"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    """Создать или обновить схему базы данных (см. migrations.py)"""
+    from migrations import migrate
 
-    # Таблица отчетов
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            form_name TEXT NOT NULL,
-            month TEXT NOT NULL,
-            year INTEGER NOT NULL,
-            report_date TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            file_path TEXT NOT NULL
-        )
-    ''')
-
-    # Таблица ответов
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS answers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            answer_yes_no TEXT NOT NULL,
-            comment TEXT,
-            gost_text TEXT,
-            quality_text TEXT,
-            documents_text TEXT,
-            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE
-        )
-    ''')
-
-    # Индексы
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_answers_report_id 
-        ON answers(report_id)
-    ''')
+    migrate()
 
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_reports_created_at 
-        ON reports(created_at)
-    ''')
 
-    conn.commit()
-    conn.close()
-    print("База данных инициализирована")
+def month_number(month):
+    """Номер месяца (1-12) по названию или числу, 0 если не распознан"""
+    if month in MONTHS:
+        return MONTHS.index(month) + 1
+    try:
+        number = int(month)
+    except (TypeError, ValueError):
+        return 0
+    return number if 1 <= number <= 12 else 0
+
+
+def month_name(number):
+    """Название месяца по номеру"""
+    if 1 <= number <= 12:
+        return MONTHS[number - 1]
+    return str(number)
+
+
+def _display_timestamp(value):
+    """Отметка времени ISO-8601 в формате для отображения"""
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT).strftime(DISPLAY_TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return value
+
+
+def _report_row_to_dict(row):
+    """Строка таблицы reports в словарь отчета"""
+    return {
+        'id': row['id'],
+        'form_name': row['form_name'],
+        'month': month_name(row['month']),
+        'year': row['year'],
+        'report_date': row['report_date'],
+        'created_at': _display_timestamp(row['created_at']),
+        'file_path': row['file_path'],
+        'question_count': row['question_count'],
+        'yes_count': row['yes_count'],
+        'no_count': row['no_count'],
+        'comment_count': row['comment_count']
+    }
+
+
+def question_hash(form_name, question_text, gost_text, quality_text, documents_text):
+    """Ключ вопроса в каталоге: хеш формы, вопроса и справочных текстов"""
+    parts = (form_name, question_text, gost_text, quality_text, documents_text)
+    payload = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _get_question_id(cursor, form_name, answer, question_ids=None):
+    """Найти или добавить вопрос в каталог, вернуть его ID"""
+    key = question_hash(
+        form_name,
+        answer['question_text'],
+        answer['gost_text'],
+        answer['quality_text'],
+        answer.get('documents_text', '')
+    )
+
+    if question_ids is not None and key in question_ids:
+        return question_ids[key]
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO questions (question_hash, form_name, question_text, gost_text, quality_text, documents_text)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        key,
+        form_name,
+        answer['question_text'],
+        answer['gost_text'] or '',
+        answer['quality_text'] or '',
+        answer.get('documents_text') or ''
+    ))
+
+    cursor.execute('SELECT id FROM questions WHERE question_hash = ?', (key,))
+    question_id = cursor.fetchone()['id']
+
+    if question_ids is not None:
+        question_ids[key] = question_id
+    return question_id
+
+
+def _insert_report(cursor, report_data, answers_list, file_path, question_ids=None):
+    """Вставить отчет и его ответы в рамках текущей транзакции"""
+    cursor.execute('''
+        INSERT INTO reports (form_name, month, year, report_date, created_at, file_path)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        report_data['form_name'],
+        month_number(report_data['month']),
+        report_data['year'],
+        report_data['report_date'],
+        report_data.get('created_at') or datetime.now().strftime(TIMESTAMP_FORMAT),
+        file_path
+    ))
+
+    report_id = cursor.lastrowid
+
+    rows = [(
+        report_id,
+        _get_question_id(cursor, report_data['form_name'], answer, question_ids),
+        answer['answer_yes_no'],
+        answer['comment']
+    ) for answer in answers_list]
+
+    cursor.executemany('''
+        INSERT INTO answers (report_id, question_id, answer_yes_no, comment)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+
+    return report_id, len(rows)
 
 
 def save_report_to_db(report_data, answers_list, file_path):
     """Сохранить отчет и ответы в базу данных"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('''
-            INSERT INTO reports (form_name, month, year, report_date, created_at, file_path)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            report_data['form_name'],
-            report_data['month'],
-            report_data['year'],
-            report_data['report_date'],
-            datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
-            file_path
-        ))
-
-        report_id = cursor.lastrowid
-
-        for answer in answers_list:
-            cursor.execute('''
-                INSERT INTO answers (report_id, question_text, answer_yes_no, comment, gost_text, quality_text, documents_text)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                report_id,
-                answer['question_text'],
-                answer['answer_yes_no'],
-                answer['comment'],
-                answer['gost_text'],
-                answer['quality_text'],
-                answer.get('documents_text', '')
-            ))
-
-        conn.commit()
+        with measure("database.save_report_to_db") as m, transaction() as conn:
+            report_id, m.rows = _insert_report(conn.cursor(), report_data, answers_list, file_path)
+
         print(f"Отчет сохранен в БД с ID: {report_id}")
         return report_id
 
     except Exception as e:
-        conn.rollback()
         print(f"Ошибка при сохранении в БД: {e}")
         raise
-    finally:
-        conn.close()
 
 
-def get_all_reports():
-    """Получить список всех отчетов"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT id, form_name, month, year, report_date, created_at, file_path
-        FROM reports
-        ORDER BY created_at DESC
-    ''')
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    reports = []
-    for row in rows:
-        reports.append({
-            'id': row['id'],
-            'form_name': row['form_name'],
-            'month': row['month'],
-            'year': row['year'],
-            'report_date': row['report_date'],
-            'created_at': row['created_at'],
-            'file_path': row['file_path']
-        })
+@timed(rows=lambda stats: stats['answers'])
+def save_reports_bulk(reports, batch_size=500):
+    """
+    Массовое сохранение отчетов.
+    reports - итерируемый набор кортежей (report_data, answers_list, file_path).
+    Фиксация выполняется каждые batch_size отчетов.
+    Возвращает словарь со статистикой загрузки.
+    """
+    started = time.perf_counter()
+    report_count = 0
+    answer_count = 0
+    committed = 0
+    question_ids = {}
 
-    return reports
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            for report_data, answers_list, file_path in reports:
+                _, inserted = _insert_report(cursor, report_data, answers_list, file_path, question_ids)
+                report_count += 1
+                answer_count += inserted
 
+                if batch_size and report_count % batch_size == 0:
+                    conn.commit()
+                    committed = report_count
 
-def get_report_by_id(report_id):
-    """Получить отчет по ID со всеми ответами"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    except Exception as e:
+        print(f"Ошибка при массовом сохранении (зафиксировано отчетов: {committed}): {e}")
+        raise
 
-    cursor.execute('''
-        SELECT id, form_name, month, year, report_date, created_at, file_path
-        FROM reports
-        WHERE id = ?
-    ''', (report_id,))
+    elapsed = time.perf_counter() - started
+    stats = {
+        'reports': report_count,
+        'answers': answer_count,
+        'seconds': elapsed,
+        'reports_per_second': report_count / elapsed if elapsed else 0.0,
+        'answers_per_second': answer_count / elapsed if elapsed else 0.0
+    }
+    print(f"Сохранено отчетов: {report_count}, ответов: {answer_count} за {elapsed:.2f} с "
+          f"({stats['reports_per_second']:.0f} отчетов/с, {stats['answers_per_second']:.0f} ответов/с)")
+    return stats
 
-    report_row = cursor.fetchone()
 
-    if not report_row:
-        conn.close()
-        return None
+@timed(rows=len)
+def get_all_reports():
+    """Получить список всех отчетов"""
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT {REPORT_COLUMNS}
+            FROM reports
+            ORDER BY created_at DESC, id DESC
+        ''').fetchall()
+
+    return [_report_row_to_dict(row) for row in rows]
+
+
+@timed()
+def has_reports():
+    """Есть ли в базе хотя бы один отчет"""
+    with connection() as conn:
+        return conn.execute('SELECT 1 FROM reports LIMIT 1').fetchone() is not None
+
+
+def get_report_file_paths():
+    """Пути к файлам всех отчетов в БД"""
+    with connection() as conn:
+        return {row[0] for row in conn.execute('SELECT DISTINCT file_path FROM reports')}
+
+
+@timed(rows=lambda page: len(page[0]))
+def get_reports_page(limit=100, after=None, sort='created_at', descending=True, form_filter=None):
+    """
+    Страница списка отчетов с keyset-пагинацией.
+    after - курсор, возвращенный предыдущим вызовом (None для первой страницы).
+    form_filter - подстрока названия формы.
+    Возвращает (список отчетов, курсор следующей страницы или None).
+    """
+    keys = REPORT_SORT_KEYS[sort]
+    direction = "DESC" if descending else "ASC"
+    conditions = []
+    params = []
+
+    if form_filter:
+        conditions.append("form_name LIKE ? ESCAPE '\\'")
+        escaped = form_filter.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params.append(f"%{escaped}%")
+
+    if after is not None:
+        placeholders = ", ".join("?" for _ in keys)
+        conditions.append(f"({', '.join(keys)}) {'<' if descending else '>'} ({placeholders})")
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = ", ".join(f"{key} {direction}" for key in keys)
+    params.append(limit)
+
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT {REPORT_COLUMNS}
+            FROM reports
+            {where}
+            ORDER BY {order}
+            LIMIT ?
+        ''', params).fetchall()
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = tuple(rows[-1][key] for key in keys)
+
+    return [_report_row_to_dict(row) for row in rows], next_cursor
+
+
+@timed(rows=len)
+def get_reports_by_period(form_name=None, year=None, month_from=1, month_to=12):
+    """
+    Отчеты за период: форма, год и диапазон месяцев (включительно).
+    Например, второй квартал: month_from=4, month_to=6.
+    """
+    conditions = ["month BETWEEN ? AND ?"]
+    params = [month_number(month_from), month_number(month_to)]
+
+    if form_name is not None:
+        conditions.append("form_name = ?")
+        params.append(form_name)
+    if year is not None:
+        conditions.append("year = ?")
+        params.append(int(year))
+
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT {REPORT_COLUMNS}
+            FROM reports
+            WHERE {" AND ".join(conditions)}
+            ORDER BY year, month, created_at
+        ''', params).fetchall()
+
+    return [_report_row_to_dict(row) for row in rows]
+
+
+@timed(rows=len)
+def get_reports_created_between(start, end):
+    """Отчеты, созданные в интервале [start, end) - даты datetime или ISO-строки"""
+    if isinstance(start, datetime):
+        start = start.strftime(TIMESTAMP_FORMAT)
+    if isinstance(end, datetime):
+        end = end.strftime(TIMESTAMP_FORMAT)
+
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT {REPORT_COLUMNS}
+            FROM reports
+            WHERE created_at >= ? AND created_at < ?
+            ORDER BY created_at
+        ''', (start, end)).fetchall()
+
+    return [_report_row_to_dict(row) for row in rows]
+
+
+@timed(rows=lambda report: len(report['answers']) if report else 0)
+def get_report_by_id(report_id):
+    """Получить отчет по ID со всеми ответами"""
+    with connection() as conn:
+        report_row = conn.execute(f'''
+            SELECT {REPORT_COLUMNS}
+            FROM reports
+            WHERE id = ?
+        ''', (report_id,)).fetchone()
+
+        if not report_row:
+            return None
+
+        answer_rows = conn.execute('''
+            SELECT a.question_id, q.question_text, a.answer_yes_no, a.comment, q.gost_text, q.quality_text, q.documents_text
+            FROM answers a
+            JOIN questions q ON q.id = a.question_id
+            WHERE a.report_id = ?
+            ORDER BY a.id
+        ''', (report_id,)).fetchall()
+
+    report_data = _report_row_to_dict(report_row)
+    questions = {}
+    report_data['answers'] = [_answer_row_to_record(row, questions) for row in answer_rows]
+    return report_data
 
-    cursor.execute('''
-        SELECT question_text, answer_yes_no, comment, gost_text, quality_text, documents_text
-        FROM answers
-        WHERE report_id = ?
-        ORDER BY id
-    ''', (report_id,))
-
-    answer_rows = cursor.fetchall()
-    conn.close()
-
-    report_data = {
-        'id': report_row['id'],
-        'form_name': report_row['form_name'],
-        'month': report_row['month'],
-        'year': report_row['year'],
-        'report_date': report_row['report_date'],
-        'created_at': report_row['created_at'],
-        'file_path': report_row['file_path'],
-        'answers': []
-    }
 
-    for answer_row in answer_rows:
-        report_data['answers'].append({
-            'question_text': answer_row['question_text'],
-            'answer_yes_no': answer_row['answer_yes_no'],
-            'comment': answer_row['comment'],
-            'gost_text': answer_row['gost_text'],
-            'quality_text': answer_row['quality_text'],
-            'documents_text': answer_row.get('documents_text', '')
+def _answer_row_to_record(row, questions):
+    """
+    Строка ответа (с текстами из каталога) в AnswerRecord.
+    questions - словарь question_id -> QuestionDef: ответы на один вопрос
+    каталога ссылаются на один объект вопроса.
+    """
+    question = questions.get(row['question_id'])
+    if question is None:
+        question = QuestionDef(row['question_text'], row['gost_text'], row['quality_text'], row['documents_text'])
+        questions[row['question_id']] = question
+    return AnswerRecord(question, row['answer_yes_no'], row['comment'])
+
+
+@timed(rows=lambda reports: sum(len(r['answers']) for r in reports))
+def get_reports_with_answers(report_ids, chunk_size=500):
+    """
+    Массовое чтение отчетов с ответами: по два запроса на порцию ID
+    вместо двух запросов на каждый отчет. Порядок соответствует report_ids,
+    несуществующие ID пропускаются.
+    """
+    report_ids = list(report_ids)
+    reports = {}
+    questions = {}
+
+    with connection() as conn:
+        for start in range(0, len(report_ids), chunk_size):
+            chunk = report_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+
+            for row in conn.execute(f'''
+                SELECT {REPORT_COLUMNS}
+                FROM reports
+                WHERE id IN ({placeholders})
+            ''', chunk):
+                report_data = _report_row_to_dict(row)
+                report_data['answers'] = []
+                reports[row['id']] = report_data
+
+            for row in conn.execute(f'''
+                SELECT a.report_id, a.question_id, q.question_text, a.answer_yes_no, a.comment,
+                       q.gost_text, q.quality_text, q.documents_text
+                FROM answers a
+                JOIN questions q ON q.id = a.question_id
+                WHERE a.report_id IN ({placeholders})
+                ORDER BY a.report_id, a.id
+            ''', chunk):
+                reports[row['report_id']]['answers'].append(_answer_row_to_record(row, questions))
+
+    return [reports[report_id] for report_id in report_ids if report_id in reports]
+
+
+def _fts_query(text):
+    """Запрос пользователя в синтаксис FTS5: все слова, поиск по началу слова"""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+@timed(rows=len)
+def search_answers(query, form=None, year=None, limit=50):
+    """
+    Полнотекстовый поиск по комментариям и тексту вопросов.
+    Сначала идут совпадения в комментариях (по релевантности среди
+    SEARCH_RANK_WINDOW самых новых совпадений), затем ответы на вопросы,
+    в тексте которых найден запрос (от новых к старым).
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    filters = ""
+    filter_params = []
+    if form is not None:
+        filters += " AND r.form_name = ?"
+        filter_params.append(form)
+    if year is not None:
+        filters += " AND r.year = ?"
+        filter_params.append(int(year))
+
+    with connection() as conn:
+        comment_ids = [row['answer_id'] for row in conn.execute(f'''
+            SELECT answer_id FROM (
+                SELECT f.rowid AS answer_id, f.rank AS score
+                FROM answers_fts f
+                JOIN answers a ON a.id = f.rowid
+                JOIN reports r ON r.id = a.report_id
+                WHERE answers_fts MATCH ?{filters}
+                ORDER BY f.rowid DESC
+                LIMIT ?
+            )
+            ORDER BY score
+            LIMIT ?
+        ''', [match, *filter_params, SEARCH_RANK_WINDOW, limit])]
+
+        question_ids = []
+        if len(comment_ids) < limit:
+            question_ids = [row['id'] for row in conn.execute(f'''
+                SELECT a.id
+                FROM answers a
+                JOIN reports r ON r.id = a.report_id
+                WHERE a.question_id IN (
+                    SELECT rowid FROM questions_fts WHERE questions_fts MATCH ?
+                ){filters}
+                ORDER BY a.id DESC
+                LIMIT ?
+            ''', [match, *filter_params, limit])]
+
+        seen = set(comment_ids)
+        question_ids = [answer_id for answer_id in question_ids if answer_id not in seen]
+        hit_ids = (comment_ids + question_ids)[:limit]
+        if not hit_ids:
+            return []
+
+        # FTS5 не использует rowid IN (...) вместе с MATCH, а диапазон - использует
+        comment_snippets = {}
+        if comment_ids:
+            wanted = set(comment_ids)
+            for rowid, snippet in conn.execute('''
+                SELECT rowid, snippet(answers_fts, 0, '[', ']', '...', 12)
+                FROM answers_fts
+                WHERE answers_fts MATCH ? AND rowid BETWEEN ? AND ?
+            ''', (match, min(comment_ids), max(comment_ids))):
+                if rowid in wanted:
+                    comment_snippets[rowid] = snippet
+
+        question_snippets = {}
+        if question_ids:
+            question_snippets = dict(conn.execute('''
+                SELECT rowid, snippet(questions_fts, 0, '[', ']', '...', 12)
+                FROM questions_fts
+                WHERE questions_fts MATCH ?
+            ''', (match,)).fetchall())
+
+        placeholders = ", ".join("?" for _ in hit_ids)
+        rows = {row['answer_id']: row for row in conn.execute(f'''
+            SELECT a.id AS answer_id, a.question_id, r.id AS report_id, r.form_name, r.month, r.year,
+                   r.created_at, q.question_text, a.answer_yes_no, a.comment
+            FROM answers a
+            JOIN reports r ON r.id = a.report_id
+            JOIN questions q ON q.id = a.question_id
+            WHERE a.id IN ({placeholders})
+        ''', hit_ids)}
+
+    results = []
+    for answer_id in hit_ids:
+        row = rows[answer_id]
+        in_comment = answer_id in comment_snippets
+        results.append({
+            'report_id': row['report_id'],
+            'form_name': row['form_name'],
+            'month': month_name(row['month']),
+            'year': row['year'],
+            'created_at': _display_timestamp(row['created_at']),
+            'question_text': row['question_text'],
+            'answer_yes_no': row['answer_yes_no'],
+            'comment': row['comment'],
+            'matched': 'comment' if in_comment else 'question',
+            'snippet': comment_snippets[answer_id] if in_comment else question_snippets.get(row['question_id'], '')
         })
 
-    return report_data
+    return results
 
 
+@timed()
 def delete_report(report_id):
-    """Удалить отчет из базы данных"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
+    """Удалить отчет из базы данных; файл отчета перестает числиться в манифесте выгрузок"""
     try:
-        cursor.execute('DELETE FROM reports WHERE id = ?', (report_id,))
-        conn.commit()
+        with transaction() as conn:
+            # Файл без отчетов собирается командой gc (export_store.py)
+            conn.execute('''
+                DELETE FROM export_files
+                WHERE file_path = (SELECT file_path FROM reports WHERE id = :id)
+                  AND NOT EXISTS (SELECT 1 FROM reports r WHERE r.file_path = export_files.file_path AND r.id <> :id)
+            ''', {'id': report_id})
+            conn.execute('DELETE FROM reports WHERE id = ?', (report_id,))
         print(f"Отчет {report_id} удален из БД")
     except Exception as e:
-        conn.rollback()
         print(f"Ошибка при удалении: {e}")
         raise
-    finally:
-        conn.close()
\ No newline at end of file
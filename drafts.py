@@ -0,0 +1,235 @@
+"""
+Журнал черновиков незаполненных отчетов
+Каждое изменение ответа дописывается в таблицу draft_journal;
+записи накапливаются и сбрасываются в БД пакетами с задержкой,
+периодически журнал сворачивается в снимок в таблице drafts
+"""
+
+import json
+import threading
+from datetime import datetime
+from connection import connection, transaction
+from database import TIMESTAMP_FORMAT, DISPLAY_TIMESTAMP_FORMAT
+from metrics import measure
+
+
+FLUSH_DELAY = 2.0
+MAX_PENDING = 50
+COMPACT_EVERY = 500
+
+
+def _now():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def _merge_journal(conn, draft_id):
+    """Снимок черновика с примененными записями журнала: {индекс: (ответ, комментарий)}"""
+    row = conn.execute("SELECT snapshot FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+    if not row:
+        return None, 0
+
+    answers = {int(index): tuple(value) for index, value in json.loads(row['snapshot']).items()}
+
+    last_id = 0
+    for entry in conn.execute('''
+        SELECT id, question_index, answer_yes_no, comment FROM draft_journal
+        WHERE draft_id = ? ORDER BY id
+    ''', (draft_id,)):
+        answers[entry['question_index']] = (entry['answer_yes_no'] or '', entry['comment'] or '')
+        last_id = entry['id']
+
+    return answers, last_id
+
+
+class DraftJournal:
+    """Журнал изменений текущего черновика с отложенной пакетной записью"""
+
+    def __init__(self, flush_delay=FLUSH_DELAY):
+        # flush_delay=None - без таймера: изменения записывает только явный flush()
+        self.flush_delay = flush_delay
+        self.draft_id = None
+        self._new_draft = None
+        self._pending = {}
+        self._journal_rows = 0
+        self._timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def start(self, report_data, question_keys):
+        """
+        Начать новый черновик; строка в БД появится при первом сбросе изменений.
+        question_keys - ключи вопросов формы (database.question_hash) по порядку.
+        """
+        self.close()
+        self._new_draft = (dict(report_data), list(question_keys))
+        self._journal_rows = 0
+
+    def _create_draft(self, conn, new_draft):
+        """Создать строку черновика при первом сбросе"""
+        report_data, question_keys = new_draft
+        now = _now()
+        cursor = conn.execute('''
+            INSERT INTO drafts (form_name, month, year, report_date, question_count, question_keys, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (report_data['form_name'], report_data['month'], report_data['year'],
+              report_data.get('report_date'), len(question_keys), json.dumps(question_keys), now, now))
+        return cursor.lastrowid
+
+    def attach(self, draft_id):
+        """Продолжить запись в существующий черновик"""
+        self.close()
+        with connection() as conn:
+            self._journal_rows = conn.execute(
+                "SELECT COUNT(*) FROM draft_journal WHERE draft_id = ?", (draft_id,)
+            ).fetchone()[0]
+        self.draft_id = draft_id
+
+    def record(self, question_index, answer_yes_no, comment):
+        """
+        Запомнить изменение ответа. В БД оно попадет при следующем сбросе;
+        повторные изменения одного вопроса до сброса схлопываются.
+        """
+        if self.draft_id is None and self._new_draft is None:
+            return
+
+        with self._lock:
+            self._pending[question_index] = (answer_yes_no or '', comment or '')
+            flush_now = len(self._pending) >= MAX_PENDING
+            if not flush_now and self._timer is None and self.flush_delay is not None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Записать накопленные изменения одной транзакцией"""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, {}
+                draft_id = self.draft_id
+                new_draft = self._new_draft
+
+            if not pending or (draft_id is None and new_draft is None):
+                return
+
+            try:
+                with measure("drafts.DraftJournal.flush") as m, transaction() as conn:
+                    m.rows = len(pending)
+                    if draft_id is None:
+                        draft_id = self._create_draft(conn, new_draft)
+                    conn.executemany('''
+                        INSERT INTO draft_journal (draft_id, question_index, answer_yes_no, comment)
+                        VALUES (?, ?, ?, ?)
+                    ''', [(draft_id, index, answer, comment) for index, (answer, comment) in pending.items()])
+                    conn.execute("UPDATE drafts SET updated_at = ? WHERE id = ?", (_now(), draft_id))
+
+                    self._journal_rows += len(pending)
+                    if self._journal_rows >= COMPACT_EVERY:
+                        self._compact(conn, draft_id)
+
+                if new_draft is not None:
+                    with self._lock:
+                        self.draft_id = draft_id
+                        self._new_draft = None
+            except Exception as e:
+                print(f"Ошибка записи черновика: {e}")
+                # Изменения не теряются: вернем их в очередь, если новых для тех же вопросов нет
+                with self._lock:
+                    for index, value in pending.items():
+                        self._pending.setdefault(index, value)
+
+    def _compact(self, conn, draft_id):
+        """Свернуть журнал черновика в снимок"""
+        answers, last_id = _merge_journal(conn, draft_id)
+        if answers is None:
+            return
+        snapshot = json.dumps({str(index): value for index, value in answers.items()},
+                              ensure_ascii=False, separators=(',', ':'))
+        conn.execute("UPDATE drafts SET snapshot = ? WHERE id = ?", (snapshot, draft_id))
+        conn.execute("DELETE FROM draft_journal WHERE draft_id = ? AND id <= ?", (draft_id, last_id))
+        self._journal_rows = 0
+
+    def discard(self):
+        """Удалить текущий черновик (отчет сохранен)"""
+        # Под блокировкой записи: идущий сброс успеет создать строку черновика до удаления
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._pending = {}
+                self._new_draft = None
+                draft_id, self.draft_id = self.draft_id, None
+
+            if draft_id is not None:
+                delete_draft(draft_id)
+
+    def close(self):
+        """Сбросить несохраненные изменения и отвязаться от черновика"""
+        self.flush()
+        self.draft_id = None
+        self._new_draft = None
+
+
+def list_drafts():
+    """Черновики, начиная с последнего измененного"""
+    with connection() as conn:
+        rows = conn.execute('''
+            SELECT id, form_name, month, year, report_date, question_count, created_at, updated_at
+            FROM drafts ORDER BY updated_at DESC, id DESC
+        ''').fetchall()
+
+    drafts = []
+    for row in rows:
+        draft = dict(row)
+        draft['updated_at'] = datetime.strptime(draft['updated_at'], TIMESTAMP_FORMAT).strftime(DISPLAY_TIMESTAMP_FORMAT)
+        drafts.append(draft)
+    return drafts
+
+
+def has_drafts():
+    """Есть ли незавершенные черновики"""
+    with connection() as conn:
+        return conn.execute("SELECT 1 FROM drafts LIMIT 1").fetchone() is not None
+
+
+def load_draft(draft_id):
+    """
+    Черновик с ответами {индекс: (ответ, комментарий)} или None.
+    question_keys - ключи вопросов формы на момент создания (None у черновиков ранних версий).
+    """
+    with connection() as conn:
+        row = conn.execute('''
+            SELECT id, form_name, month, year, report_date, question_count, question_keys FROM drafts WHERE id = ?
+        ''', (draft_id,)).fetchone()
+        if not row:
+            return None
+        answers, _ = _merge_journal(conn, draft_id)
+
+    draft = dict(row)
+    draft['question_keys'] = json.loads(row['question_keys']) if row['question_keys'] else None
+    draft['answers'] = answers
+    return draft
+
+
+def rebase_draft(draft_id, answers, question_keys):
+    """Переписать черновик под новую версию формы: снимок с новыми индексами вопросов, журнал очищается"""
+    snapshot = json.dumps({str(index): value for index, value in answers.items()},
+                          ensure_ascii=False, separators=(',', ':'))
+    with transaction() as conn:
+        conn.execute('''
+            UPDATE drafts SET snapshot = ?, question_count = ?, question_keys = ?, updated_at = ?
+            WHERE id = ?
+        ''', (snapshot, len(question_keys), json.dumps(question_keys), _now(), draft_id))
+        conn.execute("DELETE FROM draft_journal WHERE draft_id = ?", (draft_id,))
+
+
+def delete_draft(draft_id):
+    """Удалить черновик вместе с журналом"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
@@ -1,20 +1,16 @@
 import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, NamedStyle
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.worksheet.worksheet import Worksheet
 from datetime import datetime
 import os
+import re
+from metrics import timed, measure, file_size
 
-def create_excel_report(report_name, form_name, month, year, answers):
-    """Создает Excel документ с отчетом"""
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Отчет"
-
-    title_font = Font(name='Arial', size=14, bold=True)
-    question_font = Font(name='Arial', size=11, bold=True)
-    answer_font = Font(name='Arial', size=12, bold=True)
-    comment_font = Font(name='Arial', size=10, italic=True)
 
+def _add_report_styles(wb):
+    """Зарегистрировать именованные стили отчета в книге (один раз на книгу)"""
     thin_border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
@@ -22,61 +18,216 @@ def create_excel_report(report_name, form_name, month, year, answers):
         bottom=Side(style='thin')
     )
 
-    ws.merge_cells('A1:B1')
-    ws['A1'] = report_name
-    ws['A1'].font = title_font
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-
-    current_row = 3
-
+    styles = [
+        NamedStyle(
+            name='report_title',
+            font=Font(name='Arial', size=14, bold=True),
+            alignment=Alignment(horizontal='center', vertical='center')
+        ),
+        NamedStyle(
+            name='report_question',
+            font=Font(name='Arial', size=11, bold=True),
+            alignment=Alignment(horizontal='left', vertical='center', wrap_text=True),
+            border=thin_border
+        ),
+        NamedStyle(
+            name='report_answer',
+            font=Font(name='Arial', size=12, bold=True),
+            alignment=Alignment(horizontal='center', vertical='center'),
+            border=thin_border
+        ),
+        NamedStyle(
+            name='report_comment',
+            font=Font(name='Arial', size=10, italic=True),
+            alignment=Alignment(horizontal='left', vertical='center', wrap_text=True),
+            border=thin_border
+        ),
+        NamedStyle(
+            name='report_footer',
+            font=Font(name='Arial', size=11),
+            alignment=Alignment(horizontal='left', vertical='center')
+        )
+    ]
+
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _styled_cell(ws, value, style):
+    """Ячейка потокового листа с именованным стилем"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _write_report_sheet(ws, report_name, answers):
+    """Записать отчет построчно в потоковый лист"""
     ws.column_dimensions['A'].width = 65
     ws.column_dimensions['B'].width = 10
 
-    for answer in answers:
-        ws[f'A{current_row}'] = answer['question_text']
-        ws[f'A{current_row}'].font = question_font
-        ws[f'A{current_row}'].alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-        ws[f'A{current_row}'].border = thin_border
+    # Объединения копятся в списке: MultiCellRange.add проверяет пересечения за O(n)
+    merged = [CellRange('A1:B1')]
 
-        ws[f'B{current_row}'] = answer['answer_yes_no']
-        ws[f'B{current_row}'].font = answer_font
-        ws[f'B{current_row}'].alignment = Alignment(horizontal='center', vertical='center')
-        ws[f'B{current_row}'].border = thin_border
+    ws.append([_styled_cell(ws, report_name, 'report_title')])
+    ws.append([])
+
+    current_row = 3
 
+    for answer in answers:
+        ws.append([
+            _styled_cell(ws, answer['question_text'], 'report_question'),
+            _styled_cell(ws, answer['answer_yes_no'], 'report_answer')
+        ])
         current_row += 1
 
         if answer['comment']:
-            ws.merge_cells(f'A{current_row}:B{current_row}')
-            ws[f'A{current_row}'] = answer['comment']
-            ws[f'A{current_row}'].font = comment_font
-            ws[f'A{current_row}'].alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-            ws[f'A{current_row}'].border = thin_border
+            ws.append([_styled_cell(ws, answer['comment'], 'report_comment')])
+            merged.append(CellRange(f'A{current_row}:B{current_row}'))
             current_row += 1
 
+    ws.append([])
     current_row += 1
-    ws.merge_cells(f'A{current_row}:B{current_row}')
-    ws[f'A{current_row}'] = f"Дата создания отчета: {datetime.now().strftime('%d.%m.%Y')}"
-    ws[f'A{current_row}'].font = Font(name='Arial', size=11)
-    ws[f'A{current_row}'].alignment = Alignment(horizontal='left', vertical='center')
+    ws.append([_styled_cell(ws, f"Дата создания отчета: {datetime.now().strftime('%d.%m.%Y')}", 'report_footer')])
+    merged.append(CellRange(f'A{current_row}:B{current_row}'))
 
+    ws.append([])
     current_row += 2
-    ws.merge_cells(f'A{current_row}:B{current_row}')
-    ws[f'A{current_row}'] = "Подпись: _________________________"
-    ws[f'A{current_row}'].font = Font(name='Arial', size=11)
-    ws[f'A{current_row}'].alignment = Alignment(horizontal='left', vertical='center')
+    ws.append([_styled_cell(ws, "Подпись: _________________________", 'report_footer')])
+    merged.append(CellRange(f'A{current_row}:B{current_row}'))
+
+    ws.merged_cells = MultiCellRange(merged)
 
-    ws.page_setup.paperSize = ws.PAPERSIZE_A4
+    ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
     ws.page_margins.left = 0.2
     ws.page_margins.right = 0.2
     ws.page_margins.top = 0.75
     ws.page_margins.bottom = 0.75
     ws.print_options.horizontalCentered = True
 
-    if not os.path.exists("отчеты"):
-        os.makedirs("отчеты")
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"отчеты/{report_name}_{timestamp}.xlsx"
+def create_excel_report(report_name, form_name, month, year, answers, filename=None):
+    """
+    Создает Excel документ с отчетом (потоковая запись).
+    filename - путь к файлу; по умолчанию имя с отметкой времени в папке 'отчеты/'.
+    """
+    with measure("export_excel.create_excel_report") as m:
+        wb = openpyxl.Workbook(write_only=True)
+        _add_report_styles(wb)
+
+        ws = wb.create_sheet("Отчет")
+        _write_report_sheet(ws, report_name, answers)
+
+        if filename is None:
+            if not os.path.exists("отчеты"):
+                os.makedirs("отчеты")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"отчеты/{report_name}_{timestamp}.xlsx"
+
+        _save_workbook(wb, filename)
+        m.rows = len(answers)
+        m.bytes = file_size(filename)
+    return filename
+
 
+@timed(name="export_excel.save", size=file_size)
+def _save_workbook(wb, filename):
+    """Запись книги на диск (отдельный замер: файл может быть на сетевом диске)"""
     wb.save(filename)
-    return filename
\ No newline at end of file
+    return filename
+
+
+def _sheet_title(report_data, used):
+    """Уникальное название листа (не длиннее 31 символа, без запрещенных знаков)"""
+    base = re.sub(r'[\[\]:*?/\\]', '_', f"{report_data['id']} {report_data['form_name']}")[:31]
+    title = base
+    suffix = 1
+    while title.lower() in used:
+        suffix += 1
+        title = f"{base[:31 - len(str(suffix)) - 1]}~{suffix}"
+    used.add(title.lower())
+    return title
+
+
+CONSOLIDATED_HEADERS = ["ID", "Форма", "Месяц", "Год", "Вопросов", "Да", "Нет", "Комментариев", "Доля \"Нет\", %", "Лист"]
+
+
+@timed(size=file_size)
+def create_consolidated_report(title, reports_meta, reports, filename):
+    """
+    Сводная книга за период (потоковая запись): лист "Сводка" и по листу на отчет.
+    reports_meta - список отчетов без ответов (со сводными счетчиками из БД),
+    reports - итератор отчетов с ответами в том же порядке; отчеты читаются
+    и записываются по одному, поэтому память не растет с их числом.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    _add_report_styles(wb)
+    wb.add_named_style(NamedStyle(
+        name='consolidated_header',
+        font=Font(name='Arial', size=11, bold=True),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=Border(bottom=Side(style='thin'))
+    ))
+
+    used_titles = {"сводка"}
+    sheet_titles = {report['id']: _sheet_title(report, used_titles) for report in reports_meta}
+
+    summary = wb.create_sheet("Сводка")
+    summary.column_dimensions['B'].width = 40
+    summary.column_dimensions['J'].width = 35
+    summary.freeze_panes = 'A3'
+    summary.append([_styled_cell(summary, title, 'report_title')])
+    summary.append([_styled_cell(summary, header, 'consolidated_header') for header in CONSOLIDATED_HEADERS])
+
+    totals = [0, 0, 0, 0]
+    for report in reports_meta:
+        counts = [report['question_count'], report['yes_count'], report['no_count'], report['comment_count']]
+        totals = [total + count for total, count in zip(totals, counts)]
+        no_rate = round(100.0 * report['no_count'] / report['question_count'], 1) if report['question_count'] else 0.0
+        summary.append([report['id'], report['form_name'], report['month'], report['year'],
+                        *counts, no_rate, sheet_titles[report['id']]])
+
+    total_rate = round(100.0 * totals[2] / totals[0], 1) if totals[0] else 0.0
+    summary.append([])
+    summary.append([_styled_cell(summary, f"Итого отчетов: {len(reports_meta)}", 'report_footer'), None, None, None,
+                    *totals, total_rate])
+    summary.close()
+
+    for report_data in reports:
+        ws = wb.create_sheet(sheet_titles[report_data['id']])
+        report_name = f"Отчет: {report_data['form_name']} {report_data['month']} {report_data['year']}"
+        _write_report_sheet(ws, report_name, report_data['answers'])
+        # Дописать лист во временный файл сразу: иначе каждый лист держит
+        # открытый файл и генератор XML до сохранения книги
+        ws.close()
+
+    _save_workbook(wb, filename)
+    return filename
+
+
+@timed(size=file_size)
+def create_analytics_workbook(filename, sheets):
+    """
+    Сводка аналитики: по листу на таблицу (потоковая запись).
+    sheets - список (название листа, заголовки, строки).
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    wb.add_named_style(NamedStyle(
+        name='analytics_header',
+        font=Font(name='Arial', size=11, bold=True),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=Border(bottom=Side(style='thin'))
+    ))
+
+    for title, headers, rows in sheets:
+        ws = wb.create_sheet(title[:31])
+        for index, header in enumerate(headers):
+            letter = chr(ord('A') + index)
+            ws.column_dimensions[letter].width = 60 if header == "Вопрос" else 16
+        ws.freeze_panes = 'A2'
+        ws.append([_styled_cell(ws, header, 'analytics_header') for header in headers])
+        for row in rows:
+            ws.append(row)
+
+    _save_workbook(wb, filename)
+    return filename
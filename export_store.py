@@ -0,0 +1,213 @@
+"""
+Хранилище выгруженных отчетов Excel
+Книга определяется хешем содержимого отчета: повторная выгрузка неизмененного
+отчета возвращает уже записанный файл вместо новой книги с отметкой времени.
+Соответствие хешей и файлов хранится в таблице export_files (манифест).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from connection import connection, transaction
+from database import TIMESTAMP_FORMAT
+from metrics import measure
+
+
+# Увеличивается при изменении оформления книги, чтобы старые файлы не выдавались из хранилища
+EXPORT_LAYOUT_VERSION = 1
+
+# Имена файлов по умолчанию: "<отчет>_ГГГГММДД_ччммсс.xlsx", при совпадении - с номером "_2", "_3"...
+GENERATED_NAME = re.compile(r"^Отчет.*_\d{8}_\d{6}(_\d+)?\.xlsx$")
+
+# Файлы моложе этого возраста (секунды) сборка мусора не трогает: книга уже выгружена
+# или зарезервирована (reserve_file_name), но отчет с ней еще не записан в БД
+GC_MIN_AGE = 3600
+
+
+def _path_key(file_path):
+    """Путь для сравнения: абсолютный и в регистре файловой системы"""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def content_hash(report_name, answers):
+    """
+    SHA-256 содержимого отчета: заголовок, вопросы, ответы и комментарии.
+    Дата в подвале книги не учитывается: в файле остается дата его первой выгрузки.
+    """
+    payload = json.dumps(
+        [EXPORT_LAYOUT_VERSION, report_name,
+         [[answer['question_text'], answer['answer_yes_no'], answer['comment'] or ""] for answer in answers]],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def reserve_file_name(directory, base, extension=".xlsx"):
+    """
+    Создать пустой файл base.xlsx в папке directory (при совпадении - base_2.xlsx, base_3.xlsx...)
+    и вернуть его путь. Создание с O_EXCL: параллельные процессы не получат одно имя.
+    """
+    os.makedirs(directory, exist_ok=True)
+    number = 1
+    while True:
+        suffix = f"_{number}" if number > 1 else ""
+        file_path = os.path.join(directory, f"{base}{suffix}{extension}")
+        try:
+            os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return file_path
+        except FileExistsError:
+            number += 1
+
+
+class ExportStore:
+    """Выгрузка отчетов в Excel с повторным использованием файлов по хешу содержимого"""
+
+    def __init__(self, directory="отчеты"):
+        self.directory = directory
+
+    def _new_file_name(self, report_name):
+        """Имя нового файла в папке выгрузок; файл с тем же именем не перезаписывается"""
+        return reserve_file_name(self.directory, f"{report_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    def lookup(self, digest):
+        """Путь к файлу с этим содержимым или None; файл должен существовать и иметь записанный размер"""
+        try:
+            with connection() as conn:
+                row = conn.execute(
+                    "SELECT file_path, size FROM export_files WHERE content_hash = ?", (digest,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+
+        try:
+            if os.path.getsize(row['file_path']) != row['size']:
+                return None
+        except OSError:
+            return None
+        return row['file_path']
+
+    def register(self, digest, file_path):
+        """
+        Записать файл в манифест; ошибка сообщается, но сохранение отчета не прерывает.
+        Возвращает True, если запись сделана.
+        """
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        try:
+            with transaction() as conn:
+                # Перезаписанный файл больше не соответствует прежнему хешу
+                conn.execute("DELETE FROM export_files WHERE file_path = ?", (file_path,))
+                conn.execute('''
+                    INSERT OR REPLACE INTO export_files (content_hash, file_path, size, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (digest, file_path, os.path.getsize(file_path), now))
+        except (sqlite3.Error, OSError) as e:
+            print(f"Не удалось записать файл в манифест выгрузок: {e}")
+            return False
+        return True
+
+    def render(self, report_name, form_name, month, year, answers, filename=None):
+        """
+        Выгрузить отчет в Excel (аргументы как у create_excel_report) без записи в БД.
+        Без filename при неизмененном содержимом возвращается уже записанный файл;
+        с filename файл из хранилища копируется, книга заново не формируется.
+        Возвращает (путь, хеш для register) - хеш None, если новой книги нет.
+        """
+        digest = content_hash(report_name, answers)
+        cached = self.lookup(digest)
+
+        if cached and (filename is None or _path_key(filename) == _path_key(cached)):
+            with measure("export_store.hit") as m:
+                m.rows = len(answers)
+            return cached, None
+
+        if cached:
+            with measure("export_store.copy") as m:
+                shutil.copyfile(cached, filename)
+                m.rows = len(answers)
+            return filename, None
+
+        from export_excel import create_excel_report
+
+        reserved = filename is None
+        file_path = filename or self._new_file_name(report_name)
+        try:
+            create_excel_report(report_name, form_name, month, year, answers, filename=file_path)
+        except Exception:
+            if reserved:
+                os.remove(file_path)
+            raise
+        return file_path, digest
+
+    def export(self, report_name, form_name, month, year, answers, filename=None):
+        """Выгрузить отчет (см. render) и записать новую книгу в манифест, вернуть путь к файлу"""
+        file_path, digest = self.render(report_name, form_name, month, year, answers, filename)
+        if digest:
+            self.register(digest, file_path)
+        return file_path
+
+    def discard(self, file_path):
+        """
+        Удалить файл несохраненного отчета (отмена, ошибка записи в БД).
+        Файл, на который ссылается сохраненный отчет, остается на месте.
+        """
+        with transaction() as conn:
+            if conn.execute("SELECT 1 FROM reports WHERE file_path = ? LIMIT 1", (file_path,)).fetchone():
+                return False
+            conn.execute("DELETE FROM export_files WHERE file_path = ?", (file_path,))
+
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def collect_garbage(self, dry_run=False, min_age=GC_MIN_AGE):
+        """
+        Удалить из папки выгрузок файлы с именами по умолчанию, на которые не ссылается
+        ни один отчет в БД, и записи манифеста о файлах без отчетов или отсутствующих на диске.
+        Файлы, измененные меньше min_age секунд назад, и их записи остаются.
+        Возвращает {'files': [...], 'bytes', 'stale_entries'}.
+        """
+        cutoff = time.time() - min_age
+
+        def settled(path):
+            try:
+                return os.path.getmtime(path) <= cutoff
+            except OSError:
+                return True
+
+        with connection() as conn:
+            referenced = {_path_key(row[0]) for row in conn.execute("SELECT DISTINCT file_path FROM reports")}
+            entries = conn.execute("SELECT content_hash, file_path FROM export_files").fetchall()
+
+        stale = [row['content_hash'] for row in entries
+                 if not os.path.exists(row['file_path'])
+                 or (_path_key(row['file_path']) not in referenced and settled(row['file_path']))]
+
+        orphans = []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if (GENERATED_NAME.match(name) and os.path.isfile(path)
+                        and _path_key(path) not in referenced and settled(path)):
+                    orphans.append(path)
+
+        freed = sum(os.path.getsize(path) for path in orphans)
+        if not dry_run:
+            if stale:
+                with transaction() as conn:
+                    conn.executemany("DELETE FROM export_files WHERE content_hash = ?", [(digest,) for digest in stale])
+            for path in orphans:
+                os.remove(path)
+
+        return {'files': orphans, 'bytes': freed, 'stale_entries': len(stale)}
+
+
+export_store = ExportStore()
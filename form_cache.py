@@ -0,0 +1,120 @@
+"""
+Кэш разобранных форм вопросов
+Форма повторно разбирается только после изменения файла
+или версии разбора (form_reader.FORMAT_VERSION)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from connection import connection, transaction
+from form_reader import FORMAT_VERSION
+from records import QuestionDef
+
+
+MAX_CACHED_FORMS = 16
+
+
+class FormCache:
+    """LRU-кэш вопросов форм в памяти с копией в таблице form_cache"""
+
+    def __init__(self, max_entries=MAX_CACHED_FORMS, persist=True):
+        self.max_entries = max_entries
+        # False - только чтение таблицы form_cache (дочерние процессы пакетной обработки)
+        self.persist = persist
+        self._entries = OrderedDict()
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_key(file_path):
+        """Ключ файла: путь, время изменения и размер"""
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+    def get_questions(self, file_path, loader):
+        """
+        Вопросы формы (список QuestionDef) из кэша. При промахе вызывается
+        loader(file_path), результат сохраняется в памяти и, если persist, на диске.
+        """
+        key = self._file_key(file_path)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        questions = self._load_from_disk(key)
+        if questions is None:
+            questions = loader(file_path)
+            if questions and self.persist:
+                self._save_to_disk(key, questions)
+
+        if questions:
+            self._remember(key, questions)
+        return questions
+
+    def _remember(self, key, questions):
+        """Положить форму в память, вытеснив самую давно использованную"""
+        with self._lock:
+            # Старые версии того же файла больше не нужны
+            for old_key in [k for k in self._entries if k[0] == key[0] and k != key]:
+                del self._entries[old_key]
+            self._entries[key] = questions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_from_disk(self, key):
+        """Прочитать форму из таблицы form_cache"""
+        path, mtime_ns, size = key
+        try:
+            with connection() as conn:
+                row = conn.execute('''
+                    SELECT questions FROM form_cache
+                    WHERE path = ? AND mtime_ns = ? AND size = ? AND format_version = ?
+                ''', (path, mtime_ns, size, FORMAT_VERSION)).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+        return [QuestionDef.from_dict(question) for question in json.loads(row['questions'])]
+
+    def _save_to_disk(self, key, questions):
+        """Записать форму в таблицу form_cache"""
+        path, mtime_ns, size = key
+        payload = json.dumps([question.to_dict() for question in questions], ensure_ascii=False, separators=(',', ':'))
+        try:
+            with transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO form_cache (path, mtime_ns, size, questions, format_version)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (path, mtime_ns, size, payload, FORMAT_VERSION))
+        except sqlite3.Error as e:
+            print(f"Не удалось сохранить форму в кэш: {e}")
+
+    def list_forms(self, forms_dir, extensions):
+        """Список файлов форм; папка перечитывается только после ее изменения"""
+        if not os.path.exists(forms_dir):
+            return []
+
+        mtime_ns = os.stat(forms_dir).st_mtime_ns
+        cache_key = (os.path.abspath(forms_dir), extensions)
+        cached = self._listings.get(cache_key)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        files = sorted(f for f in os.listdir(forms_dir) if f.endswith(extensions))
+        self._listings[cache_key] = (mtime_ns, files)
+        return files
+
+    def clear(self):
+        """Очистить кэш в памяти"""
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+
+
+form_cache = FormCache()
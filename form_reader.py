@@ -0,0 +1,119 @@
+"""
+Потоковое чтение файлов форм (.xlsx, .xls, .csv)
+Вопросы выдаются по одному, без построения полной модели книги
+"""
+
+import csv
+import os
+
+
+FORM_EXTENSIONS = ('.xlsx', '.xlsm', '.xls', '.csv')
+FORM_COLUMNS = 4
+
+# Версия результата разбора: увеличивается при любом изменении текста вопросов,
+# который выдает модуль, чтобы кэш form_cache не отдавал формы, разобранные по-старому.
+# 1 - числовые ячейки приводятся к тексту (_cell_text)
+FORMAT_VERSION = 1
+
+
+class ExcelSemicolon(csv.excel):
+    """CSV из русской версии Excel: разделитель - точка с запятой"""
+    delimiter = ';'
+
+
+def sniff_csv_dialect(f):
+    """Диалект открытого CSV-файла (; , или табуляция); позиция чтения возвращается в начало"""
+    sample = f.read(64 * 1024)
+    f.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        return ExcelSemicolon
+
+
+def _cell_text(value):
+    """Значение ячейки как текст; числа (пункт ГОСТ 7.1, номер 12) тоже приводятся к строке"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _row_to_question(row):
+    """Строка формы в словарь вопроса; None для пустой строки"""
+    cells = [_cell_text(value) for value in row[:FORM_COLUMNS]] if row else []
+    if not cells or not cells[0]:
+        return None
+    cells += [""] * (FORM_COLUMNS - len(cells))
+    return {
+        'question': cells[0],
+        'gost': cells[1],
+        'quality': cells[2],
+        'documents': cells[3]
+    }
+
+
+def _iter_xlsx_rows(file_path):
+    """Строки первого листа .xlsx в режиме только для чтения"""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        yield from ws.iter_rows(min_row=2, max_col=FORM_COLUMNS, values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_xls_rows(file_path):
+    """Строки первого листа .xls (нужен пакет xlrd)"""
+    try:
+        import xlrd
+    except ImportError:
+        raise ImportError("Для форм в формате .xls установите пакет xlrd") from None
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for row_index in range(1, sheet.nrows):
+            yield sheet.row_values(row_index, 0, min(FORM_COLUMNS, sheet.ncols))
+    finally:
+        book.release_resources()
+
+
+def _iter_csv_rows(file_path):
+    """Строки .csv; разделитель (; , или табуляция) определяется автоматически"""
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f, sniff_csv_dialect(f))
+        next(reader, None)
+        for row in reader:
+            yield [value.strip() for value in row[:FORM_COLUMNS]]
+
+
+def iter_questions(file_path):
+    """Лениво выдавать вопросы формы из .xlsx, .xls или .csv"""
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in ('.xlsx', '.xlsm'):
+        rows = _iter_xlsx_rows(file_path)
+    elif extension == '.xls':
+        rows = _iter_xls_rows(file_path)
+    elif extension == '.csv':
+        rows = _iter_csv_rows(file_path)
+    else:
+        raise ValueError(f"Неподдерживаемый формат формы: {extension}")
+
+    for row in rows:
+        question = _row_to_question(row)
+        if question:
+            yield question
+
+
+def find_form_file(form_name, forms_dir="формы"):
+    """Путь к файлу формы с любым поддерживаемым расширением"""
+    for extension in FORM_EXTENSIONS:
+        file_path = os.path.join(forms_dir, form_name + extension)
+        if os.path.exists(file_path):
+            return file_path
+    return None
@@ -3,13 +3,160 @@ GUI модуль для системы автоматизации отчетов
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 from datetime import datetime
 from logic import ReportLogic
-import subprocess
+from database import MONTHS
+from jobs import JobRunner
+from question_view import QuestionView
+import metrics
 import os
 
 
+class PagedReportsTree:
+    """Таблица отчетов с подгрузкой страниц при прокрутке"""
+
+    PAGE_SIZE = 100
+    SORT_COLUMNS = {
+        "ID": 'id',
+        "Форма": 'form_name',
+        "Месяц": 'period',
+        "Год": 'period',
+        "Дата создания": 'created_at',
+        "Да / Нет": 'no_count'
+    }
+    # Сортировки, для которых первым щелчком включается порядок по убыванию
+    DESCENDING_FIRST = ('created_at', 'no_count')
+
+    COLUMN_VALUES = {
+        "ID": lambda r: r['id'],
+        "Форма": lambda r: r['form_name'],
+        "Месяц": lambda r: r['month'],
+        "Год": lambda r: r['year'],
+        "Да / Нет": lambda r: f"{r['yes_count']} / {r['no_count']}",
+        "Комментарии": lambda r: r['comment_count'],
+        "Вопросов": lambda r: r['question_count'],
+        "Дата создания": lambda r: r['created_at'],
+        "Файл": lambda r: r['file_path']
+    }
+
+    def __init__(self, parent, logic, jobs, columns, widths=None):
+        self.logic = logic
+        self.columns = columns
+        self.jobs = jobs
+        self.generation = 0
+        self.sort = 'created_at'
+        self.descending = True
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.filter_job = None
+
+        filter_frame = tk.Frame(parent)
+        filter_frame.pack(padx=20, fill=tk.X)
+        tk.Label(filter_frame, text="Фильтр по форме:", font=("Arial", 12)).pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_var = tk.StringVar()
+        filter_entry = tk.Entry(filter_frame, textvariable=self.filter_var, font=("Arial", 12), width=30)
+        filter_entry.pack(side=tk.LEFT)
+        filter_entry.bind('<KeyRelease>', self.on_filter_changed)
+
+        tree_frame = tk.Frame(parent)
+        tree_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+
+        self.scrollbar = tk.Scrollbar(tree_frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", yscrollcommand=self.on_scroll)
+        self.scrollbar.config(command=self.tree.yview)
+
+        for i, col in enumerate(columns):
+            if col in self.SORT_COLUMNS:
+                self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            else:
+                self.tree.heading(col, text=col)
+            self.tree.column(col, width=widths[i] if widths else 150)
+
+        self.tree.tag_configure("has_no", foreground="darkred")
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.reload()
+
+    def reload(self):
+        """Очистить таблицу и загрузить первую страницу"""
+        self.generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Загрузить следующую страницу отчетов в фоновом потоке"""
+        if self.loading or self.exhausted:
+            return
+
+        self.loading = True
+        self.jobs.submit(
+            self.logic.get_reports_page_from_db,
+            limit=self.PAGE_SIZE,
+            after=self.cursor,
+            sort=self.sort,
+            descending=self.descending,
+            form_filter=self.filter_var.get().strip(),
+            on_done=lambda page, generation=self.generation: self.show_page(page, generation),
+            on_error=lambda e, generation=self.generation: self.show_page_error(e, generation)
+        )
+
+    def show_page_error(self, error, generation):
+        """Ошибка загрузки страницы: следующая прокрутка повторит запрос"""
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+        self.loading = False
+        messagebox.showerror("Ошибка", f"Не удалось загрузить отчеты:\n{error}")
+
+    def show_page(self, page, generation):
+        """Добавить загруженную страницу в таблицу"""
+        # Страница устарела (сменились сортировка/фильтр) или экран закрыт
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+
+        reports, self.cursor = page
+        self.exhausted = self.cursor is None
+        self.loading = False
+
+        for report in reports:
+            values = [self.COLUMN_VALUES[col](report) for col in self.columns]
+            # Отчеты с ответами "Нет" выделяются цветом
+            tags = ("has_no",) if report['no_count'] else ()
+            self.tree.insert("", tk.END, values=values, tags=tags)
+
+    def on_scroll(self, first, last):
+        """Подгрузка при прокрутке к концу таблицы"""
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and not self.exhausted:
+            self.tree.after_idle(self.load_next_page)
+
+    def sort_by(self, column):
+        """Сортировка по колонке, повторный щелчок меняет направление"""
+        sort = self.SORT_COLUMNS[column]
+        if sort == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = sort
+            self.descending = sort in self.DESCENDING_FIRST
+        self.reload()
+
+    def on_filter_changed(self, event=None):
+        """Перезагрузка по фильтру с задержкой после ввода"""
+        if self.filter_job:
+            self.tree.after_cancel(self.filter_job)
+        self.filter_job = self.tree.after(300, self.apply_filter)
+
+    def apply_filter(self):
+        """Применить фильтр"""
+        self.filter_job = None
+        self.reload()
+
+
 class ReportApp:
     """Главный класс приложения с GUI"""
 
@@ -19,20 +166,82 @@ class ReportApp:
         self.root.geometry("1200x800")
 
         self.logic = ReportLogic()
-        self.current_block_widgets = {}
+        self.question_view = None
+        self.jobs = JobRunner(self.root)
+        self.visible_jobs = []
+        self.screen_id = 0
+
+        self.create_status_bar()
 
         self.main_frame = tk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
         os.makedirs("шаблоны", exist_ok=True)
 
+        # Скрытое окно диагностики
+        self.root.bind("<Control-Shift-D>", lambda e: self.show_diagnostics())
+
         self.show_main_menu()
 
     def clear_frame(self):
         """Очистка главного контейнера"""
+        self.screen_id += 1
         for widget in self.main_frame.winfo_children():
             widget.destroy()
 
+    def create_status_bar(self):
+        """Строка состояния с индикатором фоновой операции"""
+        self.status_frame = tk.Frame(self.root, bd=1, relief=tk.SUNKEN)
+        self.status_label = tk.Label(self.status_frame, text="", font=("Arial", 11))
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        self.status_progress = ttk.Progressbar(self.status_frame, mode="indeterminate", length=200)
+        self.status_progress.pack(side=tk.LEFT, padx=10, pady=3)
+        self.status_cancel = tk.Button(self.status_frame, text="Отмена", font=("Arial", 11), command=self.cancel_jobs)
+        self.status_cancel.pack(side=tk.LEFT, padx=10)
+
+    def run_job(self, message, func, *args, on_done=None, on_error=None, modal=True, cancel_kwarg=None, **kwargs):
+        """
+        Выполнить операцию в фоновом потоке с индикатором в строке состояния.
+        modal - на время операции доступна только кнопка "Отмена".
+        """
+        job = self.jobs.submit(
+            func, *args,
+            on_done=on_done,
+            on_error=on_error or (lambda e: messagebox.showerror("Ошибка", str(e))),
+            on_finally=lambda: self.job_finished(job),
+            cancel_kwarg=cancel_kwarg,
+            **kwargs
+        )
+        self.visible_jobs.append(job)
+
+        self.status_label.config(text=message)
+        if not self.status_frame.winfo_ismapped():
+            self.status_frame.pack(side=tk.BOTTOM, fill=tk.X, before=self.main_frame)
+            self.status_progress.start(15)
+        if modal:
+            self.status_frame.grab_set()
+        return job
+
+    def job_finished(self, job):
+        """Скрыть индикатор после завершения последней операции"""
+        if job in self.visible_jobs:
+            self.visible_jobs.remove(job)
+        if not self.visible_jobs:
+            self.status_progress.stop()
+            self.status_frame.grab_release()
+            self.status_frame.pack_forget()
+
+    def cancel_jobs(self):
+        """
+        Отменить текущие фоновые операции. Задачи с записью (сохранение, удаление, экспорт)
+        отменяются только до своей точки checkpoint; начатая запись завершается и сообщает результат.
+        """
+        for job in list(self.visible_jobs):
+            if job.cancel():
+                self.job_finished(job)
+            else:
+                self.status_label.config(text="Операция уже записывает данные, дождитесь завершения...")
+
     def show_main_menu(self):
         """Показать главное меню"""
         self.clear_frame()
@@ -43,10 +252,87 @@ class ReportApp:
         btn_frame.pack(pady=20)
 
         tk.Button(btn_frame, text="Создать новый отчет", font=("Arial", 16), width=30, height=2, command=self.show_report_creation).pack(pady=10)
+        if self.logic.has_drafts_in_db():
+            tk.Button(btn_frame, text="Продолжить черновик", font=("Arial", 16), width=30, height=2, command=self.show_drafts).pack(pady=10)
         tk.Button(btn_frame, text="Открыть сохраненный отчет", font=("Arial", 16), width=30, height=2, command=self.show_saved_reports).pack(pady=10)
         tk.Button(btn_frame, text="Просмотр всех отчетов", font=("Arial", 16), width=30, height=2, command=self.show_all_reports_list).pack(pady=10)
+        tk.Button(btn_frame, text="Поиск по отчетам", font=("Arial", 16), width=30, height=2, command=self.show_search_screen).pack(pady=10)
+        tk.Button(btn_frame, text="Аналитика", font=("Arial", 16), width=30, height=2, command=self.show_analytics_screen).pack(pady=10)
         tk.Button(btn_frame, text="Выход", font=("Arial", 16), width=30, height=2, command=self.root.quit).pack(pady=10)
 
+    def offer_draft_resume(self):
+        """При запуске предложить продолжить последний незавершенный отчет"""
+        drafts = self.logic.list_drafts_from_db()
+        if not drafts:
+            return
+
+        draft = drafts[0]
+        if messagebox.askyesno("Незавершенный отчет",
+                               f"Найден незавершенный отчет:\n{draft['form_name']} {draft['month']} {draft['year']}\n"
+                               f"Изменен: {draft['updated_at']}\n\nПродолжить заполнение?"):
+            self.resume_draft(draft['id'])
+
+    def show_drafts(self):
+        """Список незавершенных черновиков"""
+        self.clear_frame()
+
+        tk.Label(self.main_frame, text="Незавершенные отчеты", font=("Arial", 18, "bold")).pack(pady=20)
+
+        tree_frame = tk.Frame(self.main_frame)
+        tree_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+
+        columns = ["ID", "Форма", "Месяц", "Год", "Изменен"]
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
+        for col, width in zip(columns, [50, 250, 100, 80, 150]):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for draft in self.logic.list_drafts_from_db():
+            tree.insert("", tk.END, values=[draft['id'], draft['form_name'], draft['month'], draft['year'], draft['updated_at']])
+
+        def selected_draft():
+            selected = tree.selection()
+            if not selected:
+                messagebox.showwarning("Внимание", "Выберите черновик")
+                return None
+            return tree.item(selected[0])['values'][0]
+
+        def resume():
+            draft_id = selected_draft()
+            if draft_id is not None:
+                self.resume_draft(draft_id)
+
+        def delete():
+            draft_id = selected_draft()
+            if draft_id is not None and messagebox.askyesno("Подтверждение", "Удалить черновик?"):
+                self.logic.delete_draft_from_db(draft_id)
+                if self.logic.has_drafts_in_db():
+                    self.show_drafts()
+                else:
+                    self.show_main_menu()
+
+        tree.bind("<Double-1>", lambda e: resume())
+
+        btn_frame = tk.Frame(self.main_frame)
+        btn_frame.pack(pady=20)
+        tk.Button(btn_frame, text="Продолжить", font=("Arial", 12), width=20, command=resume).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Удалить черновик", font=("Arial", 12), width=20, command=delete).pack(side=tk.LEFT, padx=10)
+
+        tk.Button(self.main_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(pady=10)
+
+    def resume_draft(self, draft_id):
+        """Открыть черновик на экране заполнения вопросов"""
+        success, message = self.logic.resume_draft(draft_id)
+        if success:
+            self.show_questions_screen()
+        else:
+            messagebox.showerror("Ошибка", message)
+
     def show_report_creation(self):
         """Экран выбора формы и параметров отчета"""
         self.clear_frame()
@@ -69,8 +355,7 @@ class ReportApp:
 
         tk.Label(form_frame, text="Месяц:", font=("Arial", 16)).grid(row=1, column=0, sticky="w", pady=10)
         self.month_var = tk.StringVar()
-        months = ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь", "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"]
-        ttk.Combobox(form_frame, textvariable=self.month_var, values=months, font=("Arial", 16), width=30, state="readonly").grid(row=1, column=1, pady=10, padx=10)
+        ttk.Combobox(form_frame, textvariable=self.month_var, values=MONTHS, font=("Arial", 16), width=30, state="readonly").grid(row=1, column=1, pady=10, padx=10)
 
         tk.Label(form_frame, text="Год:", font=("Arial", 16)).grid(row=2, column=0, sticky="w", pady=10)
         self.year_var = tk.StringVar(value=str(datetime.now().year))
@@ -96,145 +381,76 @@ class ReportApp:
             messagebox.showerror("Ошибка", "Заполните все поля!")
             return
 
-        excel_file = f"формы/{form_name}.xlsx"
-        if not self.logic.load_questions_from_excel(excel_file):
-            messagebox.showerror("Ошибка", f"Не удалось загрузить вопросы из файла {excel_file}")
+        form_file = self.logic.get_form_path(form_name)
+        if not form_file or not self.logic.load_questions_from_excel(form_file):
+            messagebox.showerror("Ошибка", f"Не удалось загрузить вопросы формы {form_name}")
             return
 
         self.logic.init_report(form_name, month, year, report_date)
         self.show_questions_screen()
 
     def show_questions_screen(self):
-        """Экран заполнения вопросов блоками"""
+        """Экран заполнения вопросов: непрерывный список с пулом виджетов"""
         self.clear_frame()
 
-        start, end = self.logic.get_current_block_questions()
-        total = len(self.logic.questions_list)
-
         header = f"Отчет: {self.logic.current_report_data['form_name']} {self.logic.current_report_data['month']} {self.logic.current_report_data['year']}"
         tk.Label(self.main_frame, text=header, font=("Arial", 16, "bold")).pack(pady=5)
-        tk.Label(self.main_frame, text=f"Вопросы {start + 1}-{end} из {total}", font=("Arial", 14)).pack(pady=2)
-
-        canvas_frame = tk.Frame(self.main_frame)
-        canvas_frame.pack(pady=5, fill=tk.BOTH, expand=True)
-
-        canvas = tk.Canvas(canvas_frame)
-        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas)
-
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        self.current_block_widgets = {}
-        for i in range(start, end):
-            self.create_question_widget(scrollable_frame, i)
+        info_frame = tk.Frame(self.main_frame)
+        info_frame.pack(pady=2)
+        self.range_label = tk.Label(info_frame, text="", font=("Arial", 14))
+        self.range_label.pack(side=tk.LEFT, padx=10)
+        self.progress_label = tk.Label(info_frame, text="", font=("Arial", 14, "bold"))
+        self.progress_label.pack(side=tk.LEFT, padx=10)
+        tk.Button(info_frame, text="К неотвеченному ↓", font=("Arial", 12), command=self.on_next_unanswered).pack(side=tk.LEFT, padx=10)
 
         btn_frame = tk.Frame(self.main_frame)
-        btn_frame.pack(pady=10)
+        btn_frame.pack(side=tk.BOTTOM, pady=10)
 
-        btn_prev = tk.Button(btn_frame, text="← Назад", font=("Arial", 18), width=15, command=self.on_prev_block)
-        btn_prev.pack(side=tk.LEFT, padx=5)
-        if start == 0:
-            btn_prev.config(state=tk.DISABLED)
+        self.btn_prev = tk.Button(btn_frame, text="← Назад", font=("Arial", 18), width=15, command=self.on_prev_block)
+        self.btn_prev.pack(side=tk.LEFT, padx=5)
 
-        btn_next = tk.Button(btn_frame, text="Далее →" if end < total else "Завершить", font=("Arial", 18), width=15, command=self.on_next_block)
-        btn_next.pack(side=tk.LEFT, padx=5)
+        self.btn_next = tk.Button(btn_frame, text="Далее →", font=("Arial", 18), width=15, command=self.on_next_block)
+        self.btn_next.pack(side=tk.LEFT, padx=5)
 
         tk.Button(btn_frame, text="Сохранить", font=("Arial", 18), width=15, command=self.on_save_report).pack(side=tk.LEFT, padx=5)
 
-    def create_question_widget(self, parent, question_index):
-        """Создать виджет для одного вопроса"""
-        question = self.logic.questions_list[question_index]
-        answer_data = self.logic.answers_list[question_index]
-
-        q_frame = tk.LabelFrame(parent, text=f"Вопрос {question_index + 1}", font=("Arial", 16, "bold"), padx=10, pady=5)
-        q_frame.pack(pady=5, padx=20, fill=tk.X)
-
-        top_frame = tk.Frame(q_frame)
-        top_frame.pack(fill=tk.X, pady=2)
-
-        answer_frame = tk.Frame(top_frame)
-        answer_frame.pack(side=tk.LEFT, padx=(0, 15))
-
-        current_answer = answer_data['answer_yes_no']
-
-        btn_yes = tk.Button(
-            answer_frame, text="ДА", font=("Arial", 18, "bold"), width=5,
-            bg="green" if current_answer == "Да" else "lightgray",
-            fg="white" if current_answer == "Да" else "darkgreen",
-            activebackground="darkgreen",
-            activeforeground="white",
-            relief=tk.SUNKEN if current_answer == "Да" else tk.RAISED,
-            highlightthickness=2,
-            highlightbackground="green" if current_answer == "Да" else "gray",
-            command=lambda idx=question_index: self.set_answer(idx, "Да")
-        )
-        btn_yes.pack(side=tk.LEFT, padx=3)
-
-        btn_no = tk.Button(
-            answer_frame, text="НЕТ", font=("Arial", 18, "bold"), width=5,
-            bg="red" if current_answer == "Нет" else "lightgray",
-            fg="white" if current_answer == "Нет" else "darkred",
-            activebackground="darkred",
-            activeforeground="white",
-            relief=tk.SUNKEN if current_answer == "Нет" else tk.RAISED,
-            highlightthickness=2,
-            highlightbackground="red" if current_answer == "Нет" else "gray",
-            command=lambda idx=question_index: self.set_answer(idx, "Нет")
+        self.question_view = QuestionView(
+            self.main_frame, self.logic,
+            on_help=self.show_help,
+            on_documents=self.show_documents,
+            on_scroll=self.on_questions_scrolled,
+            on_answer=lambda index: self.update_progress()
         )
-        btn_no.pack(side=tk.LEFT, padx=3)
-
-        tk.Label(top_frame, text=question['question'], font=("Arial", 18), wraplength=800, justify=tk.LEFT, anchor='w').pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-        buttons_frame = tk.Frame(top_frame)
-        buttons_frame.pack(side=tk.RIGHT, padx=5)
-
-        tk.Button(buttons_frame, text="?", font=("Arial", 16, "bold"), width=3,
-                  command=lambda: self.show_help(question)).pack(side=tk.LEFT, padx=2)
+        self.question_view.pack(pady=5, fill=tk.BOTH, expand=True)
+        self.question_view.scroll_to(self.logic.current_question_index)
+        self.update_progress()
 
-        if question.get('documents'):
-            tk.Button(buttons_frame, text="📄", font=("Arial", 16, "bold"), width=3,
-                      command=lambda: self.show_documents(question)).pack(side=tk.LEFT, padx=2)
+    def update_progress(self):
+        """Счетчик отвеченных вопросов в заголовке"""
+        answered, total = self.logic.get_progress()
+        self.progress_label.config(text=f"Отвечено: {answered} из {total}", fg="darkgreen" if answered == total else "black")
 
-        comment_frame = tk.Frame(q_frame)
-        comment_frame.pack(fill=tk.X, pady=2)
-        tk.Label(comment_frame, text="Комментарий:", font=("Arial", 18)).pack(side=tk.LEFT, padx=(0, 5))
-
-        comment_text = tk.Text(comment_frame, height=2, font=("Arial", 18), wrap=tk.WORD)
-        comment_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        if answer_data['comment']:
-            comment_text.insert(1.0, answer_data['comment'])
-
-        def adjust_height(event=None):
-            lines = comment_text.get("1.0", tk.END).count('\n')
-            comment_text.config(height=max(2, min(6, lines + 1)))
-
-        comment_text.bind('<KeyRelease>', adjust_height)
-        adjust_height()
+    def on_next_unanswered(self):
+        """Прокрутить к следующему вопросу без ответа"""
+        self.save_current_block()
+        first, last = self.question_view.visible
+        index = self.logic.next_unanswered(first)
+        if index is None:
+            messagebox.showinfo("Информация", "Все вопросы отвечены")
+        else:
+            self.question_view.scroll_to(index)
 
-        self.current_block_widgets[question_index] = {'btn_yes': btn_yes, 'btn_no': btn_no, 'comment': comment_text}
+    def on_questions_scrolled(self, first, last):
+        """Обновить счетчик и кнопки при прокрутке списка вопросов"""
+        total = len(self.logic.questions_list)
+        self.logic.current_question_index = first
+        self.range_label.config(text=f"Вопросы {first + 1}-{last} из {total}")
+        self.btn_prev.config(state=tk.DISABLED if first == 0 else tk.NORMAL)
+        self.btn_next.config(text="Далее →" if last < total else "Завершить")
 
     def set_answer(self, question_index, answer):
         """Установить ответ с инверсией цвета кнопок"""
-        widgets = self.current_block_widgets[question_index]
-
-        if answer == "Да":
-            widgets['btn_yes'].config(bg="green", fg="white", relief=tk.SUNKEN, highlightbackground="green", highlightthickness=2)
-            widgets['btn_no'].config(bg="lightgray", fg="darkred", relief=tk.RAISED, highlightbackground="gray", highlightthickness=2)
-        else:
-            widgets['btn_yes'].config(bg="lightgray", fg="darkgreen", relief=tk.RAISED, highlightbackground="gray", highlightthickness=2)
-            widgets['btn_no'].config(bg="red", fg="white", relief=tk.SUNKEN, highlightbackground="red", highlightthickness=2)
-
-        widgets['btn_yes'].update()
-        widgets['btn_no'].update()
-
-        comment = widgets['comment'].get(1.0, tk.END).strip()
-        self.logic.save_answer(question_index, answer, comment)
+        self.question_view.set_answer(question_index, answer)
 
     def show_help(self, question):
         """Показать справку"""
@@ -295,37 +511,99 @@ class ReportApp:
             if os.name == 'nt':
                 os.startfile(templates_path)
             elif os.name == 'posix':
+                import subprocess
                 subprocess.Popen(['xdg-open', templates_path])
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось открыть папку:\n{e}")
 
+    def show_diagnostics(self):
+        """Окно диагностики: замеры времени операций (Ctrl+Shift+D)"""
+        window = tk.Toplevel(self.root)
+        window.title("Диагностика")
+        window.geometry("1100x500")
+
+        state_label = tk.Label(window, font=("Arial", 12))
+        state_label.pack(pady=10)
+
+        columns = ["Операция", "Вызовов", "Ошибок", "Всего, с", "Сред., мс", "Макс., мс", "Строк", "Байт"]
+        frame = tk.Frame(window)
+        frame.pack(padx=10, fill=tk.BOTH, expand=True)
+        scrollbar = tk.Scrollbar(frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree = ttk.Treeview(frame, columns=columns, show="headings", yscrollcommand=scrollbar.set)
+        scrollbar.config(command=tree.yview)
+        for col, width in zip(columns, [380, 80, 70, 90, 90, 90, 100, 110]):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor=tk.W if col == "Операция" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True)
+
+        def refresh():
+            state_label.config(text=f"Замеры {'включены' if metrics.is_enabled() else 'выключены'}, "
+                                    f"с {metrics.registry.started:%d.%m.%Y %H:%M:%S}")
+            toggle_button.config(text="Выключить замеры" if metrics.is_enabled() else "Включить замеры")
+            tree.delete(*tree.get_children())
+            for op in metrics.registry.snapshot():
+                tree.insert("", tk.END, values=[op['name'], op['calls'], op['errors'], f"{op['total']:.3f}",
+                                                f"{op['mean'] * 1000:.1f}", f"{op['max'] * 1000:.1f}",
+                                                op['rows'], op['bytes']])
+
+        def toggle():
+            if metrics.is_enabled():
+                metrics.disable()
+            else:
+                metrics.enable()
+            refresh()
+
+        def reset():
+            metrics.registry.reset()
+            refresh()
+
+        def save():
+            file_path = filedialog.asksaveasfilename(
+                parent=window, title="Сохранить замеры", defaultextension=".json",
+                filetypes=[("JSON", "*.json"), ("Журнал", "*.log")]
+            )
+            if file_path:
+                try:
+                    metrics.registry.dump(file_path)
+                except OSError as e:
+                    messagebox.showerror("Ошибка", f"Не удалось сохранить замеры:\n{e}", parent=window)
+
+        btn_frame = tk.Frame(window)
+        btn_frame.pack(pady=10)
+        toggle_button = tk.Button(btn_frame, font=("Arial", 12), width=20, command=toggle)
+        toggle_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Обновить", font=("Arial", 12), width=12, command=refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Сбросить", font=("Arial", 12), width=12, command=reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Сохранить...", font=("Arial", 12), width=12, command=save).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Закрыть", font=("Arial", 12), width=12, command=window.destroy).pack(side=tk.LEFT, padx=5)
+
+        refresh()
+
     def save_current_block(self):
-        """Сохранить ответы текущего блока"""
-        for idx, widgets in self.current_block_widgets.items():
-            comment = widgets['comment'].get(1.0, tk.END).strip()
-            current_answer = self.logic.answers_list[idx]['answer_yes_no']
-            if current_answer:
-                self.logic.save_answer(idx, current_answer, comment)
+        """Сохранить комментарии видимых вопросов"""
+        self.question_view.commit()
 
     def on_prev_block(self):
-        """Обработка кнопки Назад"""
+        """Обработка кнопки Назад: прокрутка на экран вверх"""
         self.save_current_block()
-        self.logic.prev_block()
-        self.show_questions_screen()
+        first, last = self.question_view.visible
+        self.question_view.scroll_to(max(0, first - (last - first)))
 
     def on_next_block(self):
         """Обработка кнопки Далее/Завершить"""
-        for idx in self.current_block_widgets.keys():
-            if not self.logic.answers_list[idx]['answer_yes_no']:
-                messagebox.showwarning("Внимание", f"Пожалуйста, ответьте на вопрос {idx + 1}")
-                return
+        first, last = self.question_view.visible
+        idx = self.logic.first_unanswered_in(first, last)
+        if idx is not None:
+            messagebox.showwarning("Внимание", f"Пожалуйста, ответьте на вопрос {idx + 1}")
+            return
 
         self.save_current_block()
 
-        if not self.logic.next_block():
+        if last >= len(self.logic.questions_list):
             self.save_report()
         else:
-            self.show_questions_screen()
+            self.question_view.scroll_to(last)
 
     def on_save_report(self):
         """Обработка кнопки Сохранить"""
@@ -340,72 +618,256 @@ class ReportApp:
             self.save_report()
 
     def save_report(self):
-        """Сохранить отчет"""
-        success, result = self.logic.save_report()
-        if success:
-            messagebox.showinfo("Успех", f"Отчет сохранен!\n\nФайл: {result}\nПапка: отчеты/")
-            self.show_main_menu()
-        else:
-            messagebox.showerror("Ошибка", f"Ошибка при сохранении:\n{result}")
+        """Сохранить отчет (в фоновом потоке)"""
+        def on_done(outcome):
+            success, result = outcome
+            if success:
+                messagebox.showinfo("Успех", f"Отчет сохранен!\n\nФайл: {result}\nПапка: отчеты/")
+                self.show_main_menu()
+            else:
+                messagebox.showerror("Ошибка", f"Ошибка при сохранении:\n{result}")
+
+        self.run_job("Сохранение отчета...", self.logic.save_report, on_done=on_done, cancel_kwarg="should_cancel")
 
     def show_saved_reports(self):
         """Список сохраненных отчетов"""
         self.clear_frame()
         tk.Label(self.main_frame, text="Сохраненные отчеты", font=("Arial", 18, "bold")).pack(pady=20)
 
-        reports = self.logic.get_all_reports_from_db()
-        if not reports:
-            tk.Label(self.main_frame, text="Нет сохраненных отчетов", font=("Arial", 12)).pack(pady=20)
-        else:
-            tree = self.create_reports_tree(reports, ["ID", "Форма", "Месяц", "Год", "Дата создания"])
+        content = tk.Frame(self.main_frame)
+        content.pack(fill=tk.BOTH, expand=True)
+        tk.Button(self.main_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(pady=10)
 
-            btn_frame = tk.Frame(self.main_frame)
+        def build(has_reports):
+            if not has_reports:
+                tk.Label(content, text="Нет сохраненных отчетов", font=("Arial", 12)).pack(pady=20)
+                return
+
+            tree = self.create_reports_tree(content, ["ID", "Форма", "Месяц", "Год", "Да / Нет", "Комментарии", "Дата создания"],
+                                            [50, 250, 100, 80, 100, 110, 150])
+
+            btn_frame = tk.Frame(content)
             btn_frame.pack(pady=20)
             tk.Button(btn_frame, text="Открыть отчет", font=("Arial", 12), width=20, command=lambda: self.open_report(tree)).pack(side=tk.LEFT, padx=10)
             tk.Button(btn_frame, text="Экспортировать в Excel", font=("Arial", 12), width=20, command=lambda: self.export_report(tree)).pack(side=tk.LEFT, padx=10)
 
-        tk.Button(self.main_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(pady=10)
+        self.load_screen_data("Загрузка списка отчетов...", self.logic.has_reports_in_db, build)
 
     def show_all_reports_list(self):
         """Список всех отчетов с удалением"""
         self.clear_frame()
         tk.Label(self.main_frame, text="Все отчеты", font=("Arial", 18, "bold")).pack(pady=20)
 
-        reports = self.logic.get_all_reports_from_db()
-        if not reports:
-            tk.Label(self.main_frame, text="Нет сохраненных отчетов", font=("Arial", 12)).pack(pady=20)
-        else:
-            tree = self.create_reports_tree(reports, ["ID", "Форма", "Месяц", "Год", "Дата создания", "Файл"], [50, 200, 100, 80, 150, 300])
+        content = tk.Frame(self.main_frame)
+        content.pack(fill=tk.BOTH, expand=True)
+        tk.Button(self.main_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(pady=10)
+
+        def build(has_reports):
+            if not has_reports:
+                tk.Label(content, text="Нет сохраненных отчетов", font=("Arial", 12)).pack(pady=20)
+                return
 
-            btn_frame = tk.Frame(self.main_frame)
+            tree = self.create_reports_tree(content, ["ID", "Форма", "Месяц", "Год", "Да / Нет", "Комментарии", "Дата создания", "Файл"],
+                                            [50, 200, 100, 80, 100, 110, 150, 300])
+
+            btn_frame = tk.Frame(content)
             btn_frame.pack(pady=20)
             tk.Button(btn_frame, text="Удалить отчет", font=("Arial", 12), width=20, command=lambda: self.delete_report(tree)).pack(side=tk.LEFT, padx=10)
 
-        tk.Button(self.main_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(pady=10)
+        self.load_screen_data("Загрузка списка отчетов...", self.logic.has_reports_in_db, build)
+
+    def load_screen_data(self, message, func, build):
+        """Загрузить данные экрана в фоне; build вызывается, только если экран еще открыт"""
+        screen_id = self.screen_id
+
+        def on_done(result):
+            if screen_id == self.screen_id:
+                build(result)
+
+        self.run_job(message, func, on_done=on_done, modal=False)
+
+    def create_reports_tree(self, parent, columns, widths=None):
+        """Создать таблицу отчетов с постраничной загрузкой"""
+        return PagedReportsTree(parent, self.logic, self.jobs, columns, widths).tree
+
+    def show_search_screen(self):
+        """Полнотекстовый поиск по комментариям и вопросам"""
+        self.clear_frame()
+        tk.Label(self.main_frame, text="Поиск по отчетам", font=("Arial", 18, "bold")).pack(pady=20)
+
+        query_frame = tk.Frame(self.main_frame)
+        query_frame.pack(pady=5)
+
+        tk.Label(query_frame, text="Запрос:", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=5)
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(query_frame, textvariable=query_var, font=("Arial", 12), width=40)
+        query_entry.grid(row=0, column=1, padx=5)
+
+        tk.Label(query_frame, text="Форма:", font=("Arial", 12)).grid(row=0, column=2, sticky="w", padx=5)
+        form_var = tk.StringVar()
+        ttk.Combobox(query_frame, textvariable=form_var, values=[""] + self.logic.load_forms_list(), font=("Arial", 12), width=20, state="readonly").grid(row=0, column=3, padx=5)
+
+        tk.Label(query_frame, text="Год:", font=("Arial", 12)).grid(row=0, column=4, sticky="w", padx=5)
+        year_var = tk.StringVar()
+        tk.Entry(query_frame, textvariable=year_var, font=("Arial", 12), width=6).grid(row=0, column=5, padx=5)
+
+        status_label = tk.Label(self.main_frame, text="", font=("Arial", 11))
+        status_label.pack(pady=2)
 
-    def create_reports_tree(self, reports, columns, widths=None):
-        """Создать таблицу отчетов"""
         tree_frame = tk.Frame(self.main_frame)
         tree_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
 
         scrollbar = tk.Scrollbar(tree_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        columns = ["ID", "Форма", "Период", "Ответ", "Найдено"]
+        widths = [50, 180, 140, 60, 650]
         tree = ttk.Treeview(tree_frame, columns=columns, show="headings", yscrollcommand=scrollbar.set)
         scrollbar.config(command=tree.yview)
-
-        for i, col in enumerate(columns):
+        for col, width in zip(columns, widths):
             tree.heading(col, text=col)
-            tree.column(col, width=widths[i] if widths else 150)
+            tree.column(col, width=width)
+        tree.pack(fill=tk.BOTH, expand=True)
 
-        for report in reports:
-            values = [report['id'], report['form_name'], report['month'], report['year'], report['created_at']]
-            if 'file_path' in report:
-                values.append(report['file_path'])
-            tree.insert("", tk.END, values=values)
+        search_state = {'generation': 0}
 
-        tree.pack(fill=tk.BOTH, expand=True)
-        return tree
+        def show_hits(hits, generation, position=0, chunk=20):
+            # Результаты добавляются порциями, не блокируя окно
+            if generation != search_state['generation'] or not tree.winfo_exists():
+                return
+            for hit in hits[position:position + chunk]:
+                where = "Комментарий" if hit['matched'] == 'comment' else "Вопрос"
+                tree.insert("", tk.END, values=[
+                    hit['report_id'], hit['form_name'], f"{hit['month']} {hit['year']}",
+                    hit['answer_yes_no'], f"{where}: {hit['snippet']}"
+                ])
+            if position + chunk < len(hits):
+                self.root.after(1, show_hits, hits, generation, position + chunk, chunk)
+
+        def run_search(event=None):
+            search_state['generation'] += 1
+            tree.delete(*tree.get_children())
+
+            year = year_var.get().strip()
+            if year and not year.isdigit():
+                messagebox.showerror("Ошибка", "Год должен быть числом")
+                return
+
+            generation = search_state['generation']
+
+            def on_done(hits):
+                # Результаты устаревшего запроса или закрытого экрана отбрасываются
+                if generation != search_state['generation'] or not tree.winfo_exists():
+                    return
+                status_label.config(text=f"Найдено: {len(hits)}")
+                show_hits(hits, generation)
+
+            def on_error(error):
+                if generation == search_state['generation'] and tree.winfo_exists():
+                    status_label.config(text="")
+                messagebox.showerror("Ошибка", f"Ошибка поиска:\n{error}")
+
+            status_label.config(text="Поиск...")
+            self.run_job("Поиск...", self.logic.search_answers_in_db, query_var.get(),
+                         form=form_var.get() or None, year=year or None,
+                         on_done=on_done, on_error=on_error, modal=False)
+
+        query_entry.bind('<Return>', run_search)
+        tree.bind('<Double-1>', lambda e: self.open_report(tree))
+        query_entry.focus_set()
+
+        btn_frame = tk.Frame(self.main_frame)
+        btn_frame.pack(pady=10)
+        tk.Button(btn_frame, text="Найти", font=("Arial", 12), width=20, command=run_search).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Открыть отчет", font=("Arial", 12), width=20, command=lambda: self.open_report(tree)).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(side=tk.LEFT, padx=10)
+
+    def show_analytics_screen(self):
+        """Доля ответов "Нет" по месяцам и самые проблемные вопросы"""
+        self.clear_frame()
+        tk.Label(self.main_frame, text="Аналитика", font=("Arial", 18, "bold")).pack(pady=20)
+
+        filter_frame = tk.Frame(self.main_frame)
+        filter_frame.pack(pady=5)
+
+        tk.Label(filter_frame, text="Форма:", font=("Arial", 12)).grid(row=0, column=0, sticky="w", padx=5)
+        form_var = tk.StringVar()
+        ttk.Combobox(filter_frame, textvariable=form_var, values=[""] + self.logic.load_forms_list(), font=("Arial", 12), width=25, state="readonly").grid(row=0, column=1, padx=5)
+
+        tk.Label(filter_frame, text="Год:", font=("Arial", 12)).grid(row=0, column=2, sticky="w", padx=5)
+        year_var = tk.StringVar(value=str(datetime.now().year))
+        tk.Entry(filter_frame, textvariable=year_var, font=("Arial", 12), width=6).grid(row=0, column=3, padx=5)
+
+        def create_table(title, columns, widths, height):
+            tk.Label(self.main_frame, text=title, font=("Arial", 14, "bold")).pack(pady=(10, 2))
+            frame = tk.Frame(self.main_frame)
+            frame.pack(padx=20, fill=tk.BOTH, expand=True)
+            scrollbar = tk.Scrollbar(frame)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            tree = ttk.Treeview(frame, columns=columns, show="headings", height=height, yscrollcommand=scrollbar.set)
+            scrollbar.config(command=tree.yview)
+            for col, width in zip(columns, widths):
+                tree.heading(col, text=col)
+                tree.column(col, width=width)
+            tree.pack(fill=tk.BOTH, expand=True)
+            return tree
+
+        months_tree = create_table('Доля ответов "Нет" по месяцам',
+                                   ["Форма", "Период", "Ответов", "Нет", "Доля Нет, %"], [250, 150, 100, 100, 120], 8)
+        questions_tree = create_table('Вопросы с наибольшим числом ответов "Нет"',
+                                      ["Форма", "Вопрос", "Ответов", "Нет", "Доля Нет, %"], [200, 600, 100, 100, 120], 8)
+
+        def get_filters():
+            year = year_var.get().strip()
+            if year and not year.isdigit():
+                messagebox.showerror("Ошибка", "Год должен быть числом")
+                return None
+            return form_var.get() or None, int(year) if year else None
+
+        def show(result):
+            if not months_tree.winfo_exists():
+                return
+            rates, questions = result
+            months_tree.delete(*months_tree.get_children())
+            questions_tree.delete(*questions_tree.get_children())
+            for r in rates:
+                months_tree.insert("", tk.END, values=[r['form_name'], f"{r['month']} {r['year']}", r['answers'], r['no_count'], r['no_rate']])
+            for q in questions:
+                questions_tree.insert("", tk.END, values=[q['form_name'], q['question_text'], q['answers'], q['no_count'], q['no_rate']])
+
+        def refresh():
+            filters = get_filters()
+            if filters:
+                self.run_job("Расчет аналитики...", self.logic.get_analytics, *filters, on_done=show, modal=False)
+
+        def export():
+            filters = get_filters()
+            if not filters:
+                return
+            file_path = filedialog.asksaveasfilename(
+                title="Сохранить сводку", initialdir="отчеты", defaultextension=".xlsx",
+                filetypes=[("Книга Excel", "*.xlsx"), ("CSV", "*.csv")]
+            )
+            if not file_path:
+                return
+
+            def on_done(outcome):
+                success, result = outcome
+                if success:
+                    messagebox.showinfo("Успех", f"Сводка сохранена:\n{result}")
+                else:
+                    messagebox.showerror("Ошибка", f"Ошибка экспорта:\n{result}")
+
+            self.run_job("Экспорт сводки...", self.logic.export_analytics, file_path, *filters, on_done=on_done,
+                         cancel_kwarg="should_cancel")
+
+        btn_frame = tk.Frame(self.main_frame)
+        btn_frame.pack(pady=10)
+        tk.Button(btn_frame, text="Показать", font=("Arial", 12), width=20, command=refresh).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Экспорт в Excel/CSV", font=("Arial", 12), width=20, command=export).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Назад", font=("Arial", 12), width=20, command=self.show_main_menu).pack(side=tk.LEFT, padx=10)
+
+        refresh()
 
     def open_report(self, tree):
         """Открыть выбранный отчет"""
@@ -458,16 +920,16 @@ class ReportApp:
             return
 
         report_id = tree.item(selected[0])['values'][0]
-        report_data = self.logic.get_report_from_db(report_id)
 
-        if report_data:
-            success, result = self.logic.export_report_to_word(report_data)
+        def on_done(outcome):
+            success, result = outcome
             if success:
                 messagebox.showinfo("Успех", f"Отчет экспортирован:\n{result}")
             else:
                 messagebox.showerror("Ошибка", f"Ошибка экспорта:\n{result}")
-        else:
-            messagebox.showerror("Ошибка", "Не удалось загрузить отчет")
+
+        self.run_job("Экспорт отчета...", self.logic.export_report_by_id, report_id, on_done=on_done,
+                     cancel_kwarg="should_cancel")
 
     def delete_report(self, tree):
         """Удалить отчет"""
@@ -481,9 +943,13 @@ class ReportApp:
         report_name = f"{item['values'][1]} {item['values'][2]} {item['values'][3]}"
 
         if messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить отчет:\n{report_name}?"):
-            success, message = self.logic.delete_report_from_db(report_id)
-            if success:
-                messagebox.showinfo("Успех", message)
-                self.show_all_reports_list()
-            else:
-                messagebox.showerror("Ошибка", f"Ошибка при удалении:\n{message}")
\ No newline at end of file
+            def on_done(outcome):
+                success, message = outcome
+                if success:
+                    messagebox.showinfo("Успех", message)
+                    self.show_all_reports_list()
+                else:
+                    messagebox.showerror("Ошибка", f"Ошибка при удалении:\n{message}")
+
+            self.run_job("Удаление отчета...", self.logic.delete_report_from_db, report_id, on_done=on_done,
+                         cancel_kwarg="should_cancel")
\ No newline at end of file
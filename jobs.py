@@ -0,0 +1,127 @@
+"""
+Фоновое выполнение задач для GUI
+Задачи выполняются в рабочем потоке, результаты возвращаются в поток Tk
+через очередь, которую опрашивает root.after
+"""
+
+import queue
+import threading
+
+
+class Job:
+    """Задача в очереди фонового потока"""
+
+    def __init__(self, func, args, kwargs, on_done, on_error, on_finally):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_finally = on_finally
+        self.cancelled = False
+        self.committed = False
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """
+        Отменить задачу: не начатая не запустится, результат начатой будет отброшен.
+        После checkpoint() задача не отменяется; возвращает, удалась ли отмена.
+        """
+        with self._lock:
+            if not self.committed:
+                self.cancelled = True
+            return self.cancelled
+
+    def is_cancelled(self):
+        """Для кооперативной отмены внутри длительной задачи"""
+        return self.cancelled
+
+    def checkpoint(self):
+        """
+        Последняя точка отмены перед необратимой частью задачи (запись в БД).
+        True - задача отменена; иначе отмена больше не действует и результат будет доставлен.
+        """
+        with self._lock:
+            if not self.cancelled:
+                self.committed = True
+            return self.cancelled
+
+
+class JobRunner:
+    """Один рабочий поток: задачи выполняются по очереди, запись в БД не конкурирует"""
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root):
+        self.root = root
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._active = 0
+        self._polling = False
+        self._worker = threading.Thread(target=self._run, name="report-jobs", daemon=True)
+        self._worker.start()
+
+    @property
+    def busy(self):
+        """Есть ли незавершенные задачи"""
+        return self._active > 0
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_finally=None, cancel_kwarg=None, **kwargs):
+        """
+        Поставить задачу в очередь. Обработчики вызываются в потоке Tk:
+        on_done(result), on_error(exception), on_finally() - всегда, кроме отмены.
+        cancel_kwarg - имя аргумента func, в который передается Job.checkpoint:
+        задача вызывает его перед необратимым шагом (запись в БД или файл),
+        после чего отмена уже не действует. Задача с записью без этого аргумента
+        выполняется до конца и после отмены - отбрасывается только ее результат.
+        """
+        job = Job(func, args, kwargs, on_done, on_error, on_finally)
+        if cancel_kwarg:
+            kwargs[cancel_kwarg] = job.checkpoint
+        self._active += 1
+        self._tasks.put(job)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+        return job
+
+    def _run(self):
+        """Цикл рабочего потока"""
+        while True:
+            job = self._tasks.get()
+            if job.cancelled:
+                self._results.put((job, None, None))
+                continue
+            try:
+                self._results.put((job, job.func(*job.args, **job.kwargs), None))
+            except Exception as e:
+                self._results.put((job, None, e))
+
+    def _poll(self):
+        """Доставка результатов в поток Tk"""
+        while True:
+            try:
+                job, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._active -= 1
+            if job.cancelled:
+                continue
+
+            try:
+                if error is not None:
+                    if job.on_error:
+                        job.on_error(error)
+                    else:
+                        print(f"Ошибка фоновой задачи: {error}")
+                elif job.on_done:
+                    job.on_done(result)
+            finally:
+                if job.on_finally:
+                    job.on_finally()
+
+        if self._active > 0:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
@@ -3,9 +3,32 @@
 """
 
 import os
-import openpyxl
-from database import save_report_to_db, get_all_reports, get_report_by_id, delete_report
-from export_excel import create_excel_report
+from database import question_hash, save_report_to_db, get_all_reports, get_reports_page, has_reports, get_report_by_id, delete_report, search_answers
+from form_cache import form_cache
+from form_reader import FORM_EXTENSIONS, find_form_file, iter_questions
+from records import QuestionDef, AnswerRecord
+from analytics import no_rate_by_month, top_failing_questions, export_summary
+from drafts import DraftJournal, list_drafts, has_drafts, load_draft, delete_draft, rebase_draft
+from metrics import timed
+
+
+def _match_answers(old_keys, new_keys, answers):
+    """
+    Перенести ответы {индекс: значение} со старого порядка вопросов на новый по ключам вопросов.
+    Одинаковые вопросы сопоставляются по порядку появления в форме.
+    """
+    positions = {}
+    for index, key in enumerate(new_keys):
+        positions.setdefault(key, []).append(index)
+
+    matched = {}
+    for index, key in enumerate(old_keys):
+        free = positions.get(key)
+        if free:
+            new_index = free.pop(0)
+            if index in answers:
+                matched[new_index] = answers[index]
+    return matched
 
 
 class ReportLogic:
@@ -17,39 +40,39 @@ class ReportLogic:
         self.answers_list = []
         self.current_question_index = 0
         self.questions_per_page = 5
+        self.drafts = DraftJournal()
+        # Учет заполнения: 1 - вопрос без ответа
+        self.unanswered = bytearray()
+        self.answered_count = 0
+        self.first_unanswered_hint = 0
 
     def load_forms_list(self):
         """Загрузка списка форм из папки 'формы/'"""
-        forms_dir = "формы"
-        if not os.path.exists(forms_dir):
-            return []
-        files = os.listdir(forms_dir)
-        excel_files = [f for f in files if f.endswith(('.xlsx', '.xls'))]
-        return [os.path.splitext(f)[0] for f in excel_files]
+        form_files = form_cache.list_forms("формы", FORM_EXTENSIONS)
+        return sorted({os.path.splitext(f)[0] for f in form_files})
+
+    def get_form_path(self, form_name):
+        """Путь к файлу формы по ее названию"""
+        return find_form_file(form_name, "формы")
+
+    @staticmethod
+    @timed(rows=len)
+    def read_questions_from_excel(file_path):
+        """Разбор файла формы в список вопросов"""
+        return [QuestionDef.from_dict(question) for question in iter_questions(file_path)]
 
+    @timed()
     def load_questions_from_excel(self, file_path):
-        """Загрузка вопросов из Excel файла"""
+        """Загрузка вопросов из файла формы .xlsx/.xls/.csv (через кэш форм)"""
         try:
-            wb = openpyxl.load_workbook(file_path)
-            ws = wb.active
-            self.questions_list = []
-
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0]:
-                    self.questions_list.append({
-                        'question': row[0] if row[0] else "",
-                        'gost': row[1] if len(row) > 1 and row[1] else "",
-                        'quality': row[2] if len(row) > 2 and row[2] else "",
-                        'documents': row[3] if len(row) > 3 and row[3] else ""
-                    })
-
-            wb.close()
+            self.questions_list = list(form_cache.get_questions(file_path, self.read_questions_from_excel))
             return len(self.questions_list) > 0
 
         except Exception as e:
             print(f"Ошибка при загрузке Excel: {e}")
             return False
 
+    @timed()
     def init_report(self, form_name, month, year, report_date):
         """Инициализация нового отчета"""
         self.current_report_data = {
@@ -59,17 +82,147 @@ class ReportLogic:
             'report_date': report_date
         }
 
-        self.answers_list = [{
-            'question_text': q['question'],
-            'answer_yes_no': '',
-            'comment': '',
-            'gost_text': q['gost'],
-            'quality_text': q['quality'],
-            'documents_text': q['documents']
-        } for q in self.questions_list]
+        self._init_answers()
+        self.drafts.start(self.current_report_data, self._question_keys())
+        return True
+
+    def fill_report(self, form_name, month, year, report_date, answers):
+        """
+        Отчет с готовыми ответами без черновика (пакетная генерация).
+        answers - словарь {индекс вопроса: (ответ, комментарий)}.
+        """
+        self.current_report_data = {
+            'form_name': form_name,
+            'month': month,
+            'year': year,
+            'report_date': report_date
+        }
+
+        self._init_answers()
+        for index, (answer_yes_no, comment) in answers.items():
+            self.answers_list[index]['answer_yes_no'] = answer_yes_no
+            self.answers_list[index]['comment'] = comment
+        self._reset_completion()
+
+    def _init_answers(self):
+        """Пустые ответы по списку вопросов (тексты вопросов не копируются)"""
+        self.answers_list = [AnswerRecord(question) for question in self.questions_list]
 
         self.current_question_index = 0
-        return True
+        self._reset_completion()
+
+    def _reset_completion(self):
+        """Пересчитать учет заполнения по answers_list (после создания или восстановления)"""
+        self.unanswered = bytearray(0 if answer['answer_yes_no'] else 1 for answer in self.answers_list)
+        self.answered_count = len(self.unanswered) - self.unanswered.count(1)
+        self.first_unanswered_hint = 0
+
+    def _mark_answered(self, question_index, answered):
+        """Обновить учет заполнения для одного вопроса за O(1)"""
+        was_unanswered = self.unanswered[question_index]
+        if answered and was_unanswered:
+            self.unanswered[question_index] = 0
+            self.answered_count += 1
+        elif not answered and not was_unanswered:
+            self.unanswered[question_index] = 1
+            self.answered_count -= 1
+            self.first_unanswered_hint = min(self.first_unanswered_hint, question_index)
+
+    def first_unanswered(self):
+        """
+        Индекс первого вопроса без ответа или None.
+        Указатель только сдвигается вперед, поэтому за время заполнения
+        отчета суммарная стоимость вызовов - O(числа вопросов).
+        """
+        hint = self.first_unanswered_hint
+        total = len(self.unanswered)
+        while hint < total and not self.unanswered[hint]:
+            hint += 1
+        self.first_unanswered_hint = hint
+        return hint if hint < total else None
+
+    def next_unanswered(self, after=-1):
+        """Первый вопрос без ответа после индекса after (по кругу) или None"""
+        if self.answered_count == len(self.unanswered):
+            return None
+        index = self.unanswered.find(1, after + 1)
+        if index < 0:
+            index = self.first_unanswered()
+        return index
+
+    def first_unanswered_in(self, start, end):
+        """Первый вопрос без ответа в диапазоне [start, end) или None"""
+        index = self.unanswered.find(1, start, end)
+        return index if index >= 0 else None
+
+    def get_progress(self):
+        """Количество отвеченных вопросов и всего вопросов"""
+        return self.answered_count, len(self.answers_list)
+
+    def list_drafts_from_db(self):
+        """Незавершенные черновики отчетов"""
+        return list_drafts()
+
+    def has_drafts_in_db(self):
+        """Есть ли незавершенные черновики"""
+        return has_drafts()
+
+    def delete_draft_from_db(self, draft_id):
+        """Удалить черновик"""
+        delete_draft(draft_id)
+
+    def _question_keys(self):
+        """Ключи вопросов текущей формы по порядку (как в каталоге вопросов)"""
+        form_name = self.current_report_data['form_name']
+        return [question_hash(form_name, q.question, q.gost, q.quality, q.documents) for q in self.questions_list]
+
+    @timed()
+    def resume_draft(self, draft_id):
+        """
+        Восстановить отчет из черновика и продолжить запись в него.
+        Если форма изменилась, ответы переносятся на те же вопросы по их ключам;
+        ответы на удаленные из формы вопросы отбрасываются.
+        """
+        # Несохраненные изменения текущего черновика попадают в БД до чтения
+        self.drafts.close()
+        draft = load_draft(draft_id)
+        if not draft:
+            return False, "Черновик не найден"
+
+        form_file = self.get_form_path(draft['form_name'])
+        if not form_file or not self.load_questions_from_excel(form_file):
+            return False, f"Не удалось загрузить вопросы формы {draft['form_name']}"
+
+        self.current_report_data = {
+            'form_name': draft['form_name'],
+            'month': draft['month'],
+            'year': draft['year'],
+            'report_date': draft['report_date']
+        }
+
+        answers = draft['answers']
+        question_keys = self._question_keys()
+        if draft['question_keys'] is None:
+            # Черновик ранней версии без ключей: сопоставить можно только ту же форму по номерам
+            if len(question_keys) != draft['question_count']:
+                return False, (f"Форма {draft['form_name']} изменилась после создания черновика, "
+                               f"ответы нельзя сопоставить с вопросами")
+        elif draft['question_keys'] != question_keys:
+            answers = _match_answers(draft['question_keys'], question_keys, answers)
+            rebase_draft(draft_id, answers, question_keys)
+
+        self._init_answers()
+
+        for index, (answer_yes_no, comment) in answers.items():
+            if 0 <= index < len(self.answers_list):
+                self.answers_list[index]['answer_yes_no'] = answer_yes_no
+                self.answers_list[index]['comment'] = comment
+
+        self._reset_completion()
+        first = self.first_unanswered()
+        self.current_question_index = first if first is not None else 0
+        self.drafts.attach(draft_id)
+        return True, None
 
     def get_current_block_questions(self):
         """Получить вопросы текущего блока"""
@@ -82,14 +235,24 @@ class ReportLogic:
         if 0 <= question_index < len(self.answers_list):
             self.answers_list[question_index]['answer_yes_no'] = answer_yes_no
             self.answers_list[question_index]['comment'] = comment
+            self._mark_answered(question_index, bool(answer_yes_no))
+            self.drafts.record(question_index, answer_yes_no, comment)
+            return True
+        return False
+
+    def save_comment(self, question_index, comment):
+        """Сохранить комментарий к вопросу, не меняя ответ"""
+        if 0 <= question_index < len(self.answers_list):
+            self.answers_list[question_index]['comment'] = comment
+            self.drafts.record(question_index, self.answers_list[question_index]['answer_yes_no'], comment)
             return True
         return False
 
     def check_all_answered(self):
         """Проверить что все вопросы отвечены"""
-        for i, answer in enumerate(self.answers_list):
-            if not answer['answer_yes_no']:
-                return False, i + 1
+        first = self.first_unanswered()
+        if first is not None:
+            return False, first + 1
         return True, None
 
     def next_block(self):
@@ -108,54 +271,149 @@ class ReportLogic:
         self.current_question_index = prev_start
         return True
 
-    def save_report(self):
-        """Сохранение отчета в БД и экспорт в Excel"""
+    @timed()
+    def save_report(self, should_cancel=None):
+        """
+        Сохранение отчета в БД и экспорт в Excel.
+        should_cancel() вызывается один раз перед записью в БД (см. Job.checkpoint);
+        при отмене файл удаляется, после этой точки сохранение не отменяется.
+        """
         try:
-            report_name = f"Отчет: {self.current_report_data['form_name']} {self.current_report_data['month']} {self.current_report_data['year']}"
-
-            file_path = create_excel_report(
-                report_name=report_name,
-                form_name=self.current_report_data['form_name'],
-                month=self.current_report_data['month'],
-                year=self.current_report_data['year'],
-                answers=self.answers_list
-            )
+            file_path, digest = self.export_current_report()
 
-            report_id = save_report_to_db(self.current_report_data, self.answers_list, file_path)
+            if should_cancel and should_cancel():
+                self.discard_export(file_path)
+                return False, "Сохранение отменено"
 
+            self.store_current_report(file_path, digest)
             return True, os.path.basename(file_path)
 
         except Exception as e:
             return False, str(e)
 
+    def export_current_report(self, filename=None):
+        """
+        Записать текущий отчет в Excel без записи в БД (неизмененный отчет берется из хранилища).
+        Возвращает (путь к файлу, хеш новой книги для store_current_report или None).
+        """
+        return self.render_report(self.current_report_data, self.answers_list, filename)
+
+    def render_report(self, report_data, answers, filename=None):
+        """Книга отчета через хранилище выгрузок: (путь к файлу, хеш новой книги или None)"""
+        from export_store import export_store
+
+        report_name = f"Отчет: {report_data['form_name']} {report_data['month']} {report_data['year']}"
+
+        return export_store.render(
+            report_name=report_name,
+            form_name=report_data['form_name'],
+            month=report_data['month'],
+            year=report_data['year'],
+            answers=answers,
+            filename=filename
+        )
+
+    def discard_export(self, file_path):
+        """Удалить файл несохраненного отчета, если на него не ссылаются сохраненные отчеты"""
+        from export_store import export_store
+
+        return export_store.discard(file_path)
+
+    def store_current_report(self, file_path, content_hash=None):
+        """
+        Сохранить текущий отчет в БД и удалить его черновик, вернуть ID отчета.
+        content_hash - хеш новой книги из export_current_report для манифеста выгрузок.
+        """
+        if content_hash:
+            from export_store import export_store
+
+            export_store.register(content_hash, file_path)
+        report_id = save_report_to_db(self.current_report_data, self.answers_list, file_path)
+        self.drafts.discard()
+        return report_id
+
     def get_all_reports_from_db(self):
         """Получить все отчеты из БД"""
         return get_all_reports()
 
+    def get_reports_page_from_db(self, limit=100, after=None, sort='created_at', descending=True, form_filter=None):
+        """Получить страницу списка отчетов из БД"""
+        return get_reports_page(limit, after, sort, descending, form_filter)
+
+    def has_reports_in_db(self):
+        """Есть ли сохраненные отчеты"""
+        return has_reports()
+
     def get_report_from_db(self, report_id):
         """Получить конкретный отчет из БД"""
         return get_report_by_id(report_id)
 
-    def delete_report_from_db(self, report_id):
-        """Удалить отчет из БД"""
+    def search_answers_in_db(self, query, form=None, year=None, limit=200):
+        """Полнотекстовый поиск по комментариям и вопросам"""
+        return search_answers(query, form=form, year=year, limit=limit)
+
+    @timed()
+    def get_analytics(self, form_name=None, year=None, limit=20):
+        """Доля ответов "Нет" по месяцам и самые проблемные вопросы"""
+        return no_rate_by_month(form_name, year), top_failing_questions(form_name, year, limit=limit)
+
+    @timed()
+    def export_analytics(self, file_path, form_name=None, year=None, limit=20, should_cancel=None):
+        """Выгрузить сводку аналитики в .xlsx или .csv; should_cancel - как в save_report"""
+        if should_cancel and should_cancel():
+            return False, "Экспорт отменен"
+        try:
+            return True, export_summary(file_path, form_name, year, limit=limit)
+        except Exception as e:
+            return False, str(e)
+
+    @timed()
+    def export_period_report(self, form_name=None, year=None, month_from=1, month_to=12, filename=None):
+        """Сводная книга за период: лист сводки и по листу на каждый отчет"""
+        from batch_export import export_consolidated
+
+        try:
+            file_path, count = export_consolidated(form_name, year, month_from, month_to, filename)
+            return True, file_path
+        except Exception as e:
+            return False, str(e)
+
+    @timed()
+    def delete_report_from_db(self, report_id, should_cancel=None):
+        """Удалить отчет из БД; should_cancel - как в save_report"""
+        if should_cancel and should_cancel():
+            return False, "Удаление отменено"
         try:
             delete_report(report_id)
             return True, "Отчет удален"
         except Exception as e:
             return False, str(e)
 
-    def export_report_to_word(self, report_data):
-        """Экспортировать отчет в Excel заново"""
+    @timed()
+    def export_report_by_id(self, report_id, should_cancel=None):
+        """Загрузить отчет из БД и экспортировать его в Excel заново; should_cancel - как в save_report"""
+        report_data = get_report_by_id(report_id)
+        if not report_data:
+            return False, "Не удалось загрузить отчет"
+        return self.export_report_to_word(report_data, should_cancel)
+
+    @timed()
+    def export_report_to_word(self, report_data, should_cancel=None):
+        """
+        Экспортировать отчет в Excel заново; файл неизмененного отчета не создается повторно.
+        should_cancel() вызывается перед записью в манифест: при отмене новая книга удаляется.
+        """
+        from export_store import export_store
+
         try:
-            report_name = f"Отчет: {report_data['form_name']} {report_data['month']} {report_data['year']}"
-
-            file_path = create_excel_report(
-                report_name=report_name,
-                form_name=report_data['form_name'],
-                month=report_data['month'],
-                year=report_data['year'],
-                answers=report_data['answers']
-            )
+            file_path, digest = self.render_report(report_data, report_data['answers'])
+            if should_cancel and should_cancel():
+                if digest:
+                    self.discard_export(file_path)
+                return False, "Экспорт отменен"
+
+            if digest:
+                export_store.register(digest, file_path)
 
             return True, os.path.basename(file_path)
         except Exception as e:
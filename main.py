@@ -1,15 +1,71 @@
 """
 Система автоматизации составления отчетов
 Главный файл запуска приложения
+
+python main.py --profile-startup - вывести время запуска по этапам и модулям и выйти
 """
 
-import tkinter as tk
-from gui import ReportApp
-from database import init_database
+import importlib
 import os
+import sys
+import time
+
+# Модули, загружаемые при запуске, в порядке зависимостей (для --profile-startup)
+STARTUP_MODULES = [
+    "tkinter", "tkinter.ttk", "tkinter.messagebox", "tkinter.scrolledtext", "tkinter.filedialog",
+    "connection", "metrics", "records", "database", "migrations", "form_reader", "form_cache",
+    "analytics", "drafts", "logic", "jobs", "question_view", "gui"
+]
+
+# Тяжелые модули, которые должны загружаться только при первом использовании
+LAZY_MODULES = ["openpyxl", "export_excel", "batch_export", "xlrd"]
+
+
+def profile_imports():
+    """Импортировать модули запуска по одному; время каждого - вместе с еще не загруженными зависимостями"""
+    timings = []
+    for name in STARTUP_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def print_startup_profile(stages, imports):
+    """Таблица времени запуска"""
+    print("Импорт модулей:")
+    for name, seconds in imports:
+        print(f"  {name:<28} {seconds * 1000:>8.1f} мс")
+
+    print("Этапы запуска:")
+    previous = 0.0
+    for name, moment in stages:
+        print(f"  {name:<28} {(moment - previous) * 1000:>8.1f} мс")
+        previous = moment
+    print(f"  {'Всего':<28} {previous * 1000:>8.1f} мс")
+
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    if loaded:
+        print(f"Загружены при запуске, хотя нужны позже: {', '.join(loaded)}")
+
 
 def main():
     """Главная функция запуска приложения"""
+    profile = "--profile-startup" in sys.argv[1:]
+    started = time.perf_counter()
+    stages = []
+
+    def stage(name):
+        stages.append((name, time.perf_counter() - started))
+
+    imports = profile_imports() if profile else []
+
+    import tkinter as tk
+    import metrics
+    from gui import ReportApp
+    from database import init_database
+    from connection import close_pool
+    stage("Импорт модулей")
 
     # Создаем необходимые папки, если их нет
     os.makedirs("формы", exist_ok=True)
@@ -18,13 +74,35 @@ def main():
 
     # Инициализируем базу данных
     init_database()
+    stage("init_database")
 
     # Создаем главное окно приложения
     root = tk.Tk()
     app = ReportApp(root)
+    stage("Главное окно")
+
+    if profile:
+        def finish():
+            root.update()
+            stage("Первая отрисовка")
+            print_startup_profile(stages, imports)
+            root.quit()
+
+        root.after_idle(finish)
+    else:
+        # Предлагаем продолжить незавершенный отчет
+        root.after(100, app.offer_draft_resume)
 
     # Запускаем главный цикл
     root.mainloop()
 
+    # Дописываем черновик и закрываем соединения с БД
+    app.logic.drafts.close()
+    close_pool()
+
+    # Замеры за сеанс дописываются в журнал (REPORTS_METRICS_LOG, по умолчанию metrics.log)
+    if metrics.is_enabled() and metrics.registry.snapshot():
+        metrics.registry.dump(os.environ.get("REPORTS_METRICS_LOG", "metrics.log"))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
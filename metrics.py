@@ -0,0 +1,230 @@
+"""
+Замеры времени основных операций
+Декоратор timed и контекстный менеджер measure записывают длительность,
+число строк и объем записанных данных в реестр метрик процесса.
+Пока замеры выключены, обертка только проверяет флаг и вызывает функцию.
+Включение: enable() или переменная окружения REPORTS_METRICS=1
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+
+# Сколько последних замеров каждой операции хранить для просмотра
+MAX_SAMPLES = 100
+
+_enabled = os.environ.get("REPORTS_METRICS", "") not in ("", "0")
+
+
+def enable():
+    """Включить замеры"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Выключить замеры (накопленные данные сохраняются)"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+class OperationStats:
+    """Накопленные замеры одной операции"""
+
+    __slots__ = ('name', 'calls', 'errors', 'total', 'min', 'max', 'rows', 'bytes', 'samples')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds, rows=None, size=None, failed=False):
+        self.calls += 1
+        self.errors += failed
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.rows += rows or 0
+        self.bytes += size or 0
+        self.samples.append((time.time(), seconds, rows, size, failed))
+
+    def to_dict(self, samples=False):
+        data = {
+            'name': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total': self.total,
+            'mean': self.total / self.calls if self.calls else 0.0,
+            'min': self.min or 0.0,
+            'max': self.max,
+            'rows': self.rows,
+            'bytes': self.bytes
+        }
+        if samples:
+            data['samples'] = [{
+                'time': datetime.fromtimestamp(at).isoformat(timespec='milliseconds'),
+                'seconds': seconds,
+                'rows': rows,
+                'bytes': size,
+                'failed': failed
+            } for at, seconds, rows, size, failed in self.samples]
+        return data
+
+
+class MetricsRegistry:
+    """Реестр замеров процесса; запись возможна из любого потока"""
+
+    def __init__(self):
+        self._operations = {}
+        self._lock = threading.Lock()
+        self.started = datetime.now()
+
+    def record(self, name, seconds, rows=None, size=None, failed=False):
+        with self._lock:
+            stats = self._operations.get(name)
+            if stats is None:
+                stats = self._operations[name] = OperationStats(name)
+            stats.add(seconds, rows, size, failed)
+
+    def snapshot(self, samples=False):
+        """Список операций (словари), самые затратные по суммарному времени - первыми"""
+        with self._lock:
+            operations = [stats.to_dict(samples) for stats in self._operations.values()]
+        return sorted(operations, key=lambda op: op['total'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self.started = datetime.now()
+
+    def format_table(self):
+        """Текстовая таблица для журнала"""
+        lines = [f"{'Операция':<50} {'Вызовов':>8} {'Ошибок':>7} {'Всего, с':>10} "
+                 f"{'Сред., мс':>10} {'Макс., мс':>10} {'Строк':>10} {'Байт':>12}"]
+        for op in self.snapshot():
+            lines.append(f"{op['name']:<50} {op['calls']:>8} {op['errors']:>7} {op['total']:>10.3f} "
+                         f"{op['mean'] * 1000:>10.1f} {op['max'] * 1000:>10.1f} {op['rows']:>10} {op['bytes']:>12}")
+        return "\n".join(lines)
+
+    def dump(self, file_path):
+        """
+        Выгрузить замеры: в JSON (.json, вместе с последними замерами каждой операции)
+        или дописать текстовую таблицу в журнал (любое другое расширение).
+        """
+        if file_path.lower().endswith(".json"):
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    'started': self.started.isoformat(timespec='seconds'),
+                    'dumped': datetime.now().isoformat(timespec='seconds'),
+                    'operations': self.snapshot(samples=True)
+                }, f, ensure_ascii=False, indent=2)
+        else:
+            with open(file_path, "a", encoding="utf-8") as f:
+                f.write(f"=== {datetime.now():%d.%m.%Y %H:%M:%S} "
+                        f"(с {self.started:%d.%m.%Y %H:%M:%S}) ===\n")
+                f.write(self.format_table() + "\n\n")
+        return file_path
+
+
+registry = MetricsRegistry()
+
+
+class Measurement:
+    """Замер блока кода; rows и bytes можно задать внутри блока"""
+
+    __slots__ = ('name', 'rows', 'bytes', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.bytes = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        registry.record(self.name, time.perf_counter() - self.started, self.rows, self.bytes, exc_type is not None)
+        return False
+
+
+class _DisabledMeasurement:
+    """Замер при выключенных метриках: присвоения rows и bytes игнорируются"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_DISABLED = _DisabledMeasurement()
+
+
+def measure(name):
+    """
+    Контекстный менеджер замера:
+        with measure("export.sheet") as m:
+            ...
+            m.rows = len(rows)
+    """
+    return Measurement(name) if _enabled else _DISABLED
+
+
+def file_size(path):
+    """Размер записанного файла (для параметра size у timed)"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+def timed(name=None, rows=None, size=None):
+    """
+    Декоратор замера функции. name - имя операции (по умолчанию модуль.функция),
+    rows(result) и size(result) - число строк и байт по результату вызова.
+    """
+    def decorator(func):
+        operation = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                registry.record(operation, time.perf_counter() - started, failed=True)
+                raise
+            elapsed = time.perf_counter() - started
+            registry.record(
+                operation, elapsed,
+                rows(result) if rows else None,
+                size(result) if size else None
+            )
+            return result
+
+        return wrapper
+    return decorator
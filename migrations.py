@@ -0,0 +1,593 @@
+"""
+Миграции схемы reports.db
+Версия схемы хранится в PRAGMA user_version. Шаги MIGRATIONS выполняются
+по порядку, каждый - в своей транзакции вместе с записью нового номера версии.
+Перед изменением существующей базы создается резервная копия (backup API SQLite).
+При текущей схеме запуск стоит одного чтения PRAGMA user_version.
+
+Новое изменение схемы - новый шаг в конце MIGRATIONS; выполненные шаги не меняются.
+"""
+
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime
+from connection import connection, get_pool
+from database import DISPLAY_TIMESTAMP_FORMAT, TIMESTAMP_FORMAT, month_number, question_hash
+
+
+# Строк исходной таблицы на один оператор INSERT ... SELECT при копировании
+COPY_BATCH_SIZE = 50000
+# Сколько резервных копий одной базы хранить
+MAX_BACKUPS = 3
+
+
+def copy_in_batches(conn, table, sql, batch_size=COPY_BATCH_SIZE):
+    """
+    Выполнить INSERT ... SELECT порциями по диапазонам rowid таблицы table;
+    параметры :low и :high в sql ограничивают rowid исходных строк.
+    Строки не читаются в Python, каждый оператор обрабатывает не больше batch_size строк.
+    """
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return 0
+
+    copied = 0
+    for start in range(low, high + 1, batch_size):
+        copied += conn.execute(sql, {'low': start, 'high': start + batch_size - 1}).rowcount
+        if high - low >= batch_size:
+            print(f"  {table}: обработано до id {min(start + batch_size - 1, high)} из {high}")
+    return copied
+
+
+def _create_core_tables(conn):
+    """Отчеты, каталог вопросов, ответы и индексы; перевод баз ранних версий"""
+    # Таблица отчетов: месяц хранится номером, created_at - в ISO-8601;
+    # сводные счетчики ответов поддерживаются триггерами (_init_report_summary)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            form_name TEXT NOT NULL,
+            month INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            report_date TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            question_count INTEGER NOT NULL DEFAULT 0,
+            yes_count INTEGER NOT NULL DEFAULT 0,
+            no_count INTEGER NOT NULL DEFAULT 0,
+            comment_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    rebuilt = _migrate_reports_period(conn)
+
+    # Каталог вопросов: справочные тексты хранятся один раз на версию формы
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_hash TEXT NOT NULL UNIQUE,
+            form_name TEXT NOT NULL,
+            question_text TEXT NOT NULL,
+            gost_text TEXT,
+            quality_text TEXT,
+            documents_text TEXT
+        )
+    ''')
+
+    rebuilt = _migrate_answers_to_catalog(conn) or rebuilt
+
+    # Таблица ответов
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer_yes_no TEXT NOT NULL,
+            comment TEXT,
+            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE,
+            FOREIGN KEY (question_id) REFERENCES questions (id)
+        )
+    ''')
+
+    # Индексы
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_answers_report_id
+        ON answers(report_id)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_created_at
+        ON reports(created_at)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_form_period
+        ON reports(form_name, year, month)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_period
+        ON reports(year, month)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_form_name
+        ON reports(form_name)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_answers_question_id
+        ON answers(question_id)
+    ''')
+
+    return rebuilt
+
+
+def _create_cache_and_draft_tables(conn):
+    """Кэш разобранных форм (form_cache.py) и черновики (drafts.py)"""
+    # Кэш разобранных форм (см. form_cache.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS form_cache (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            questions TEXT NOT NULL
+        )
+    ''')
+
+    # Черновики незавершенных отчетов (см. drafts.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS drafts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            form_name TEXT NOT NULL,
+            month TEXT NOT NULL,
+            year TEXT NOT NULL,
+            report_date TEXT,
+            question_count INTEGER NOT NULL,
+            snapshot TEXT NOT NULL DEFAULT '{}',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS draft_journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            draft_id INTEGER NOT NULL,
+            question_index INTEGER NOT NULL,
+            answer_yes_no TEXT,
+            comment TEXT,
+            FOREIGN KEY (draft_id) REFERENCES drafts (id) ON DELETE CASCADE
+        )
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_draft_journal_draft_id
+        ON draft_journal(draft_id, id)
+    ''')
+
+
+def _init_search_index(conn):
+    """Полнотекстовые индексы FTS5 по комментариям и тексту вопросов"""
+    existing = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'answers_fts'"
+    ).fetchone()
+    if existing:
+        return
+
+    # Индексы ссылаются на answers и questions и не хранят копию текста
+    conn.execute('''
+        CREATE VIRTUAL TABLE answers_fts USING fts5(
+            comment, content='answers', content_rowid='id', tokenize='unicode61'
+        )
+    ''')
+    conn.execute('''
+        CREATE VIRTUAL TABLE questions_fts USING fts5(
+            question_text, content='questions', content_rowid='id', tokenize='unicode61'
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER answers_fts_insert AFTER INSERT ON answers
+        WHEN NEW.comment <> ''
+        BEGIN
+            INSERT INTO answers_fts (rowid, comment) VALUES (NEW.id, NEW.comment);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER answers_fts_delete AFTER DELETE ON answers
+        WHEN OLD.comment <> ''
+        BEGIN
+            INSERT INTO answers_fts (answers_fts, rowid, comment) VALUES ('delete', OLD.id, OLD.comment);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER answers_fts_update AFTER UPDATE OF comment ON answers
+        BEGIN
+            INSERT INTO answers_fts (answers_fts, rowid, comment)
+            SELECT 'delete', OLD.id, OLD.comment WHERE OLD.comment <> '';
+            INSERT INTO answers_fts (rowid, comment)
+            SELECT NEW.id, NEW.comment WHERE NEW.comment <> '';
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER questions_fts_insert AFTER INSERT ON questions
+        BEGIN
+            INSERT INTO questions_fts (rowid, question_text) VALUES (NEW.id, NEW.question_text);
+        END
+    ''')
+
+    conn.execute("INSERT INTO answers_fts (rowid, comment) SELECT id, comment FROM answers WHERE comment <> ''")
+    conn.execute("INSERT INTO questions_fts (rowid, question_text) SELECT id, question_text FROM questions")
+
+
+def _init_answer_stats(conn):
+    """
+    Сводная таблица answer_stats для аналитики (см. analytics.py):
+    число ответов и ответов "Нет" по форме, периоду и вопросу.
+    Поддерживается триггерами в той же транзакции, что и запись ответов.
+    """
+    existing = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'answer_stats'"
+    ).fetchone()
+    if existing:
+        return
+
+    conn.execute('''
+        CREATE TABLE answer_stats (
+            form_name TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer_count INTEGER NOT NULL,
+            no_count INTEGER NOT NULL,
+            PRIMARY KEY (form_name, year, month, question_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX idx_answer_stats_period ON answer_stats(year, month)
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER answer_stats_insert AFTER INSERT ON answers
+        BEGIN
+            INSERT INTO answer_stats (form_name, year, month, question_id, answer_count, no_count)
+            SELECT form_name, year, month, NEW.question_id, 1, NEW.answer_yes_no = 'Нет'
+            FROM reports WHERE id = NEW.report_id
+            ON CONFLICT (form_name, year, month, question_id) DO UPDATE
+            SET answer_count = answer_count + 1, no_count = no_count + excluded.no_count;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER answer_stats_delete AFTER DELETE ON answers
+        BEGIN
+            UPDATE answer_stats
+            SET answer_count = answer_count - 1, no_count = no_count - (OLD.answer_yes_no = 'Нет')
+            WHERE question_id = OLD.question_id
+              AND (form_name, year, month) = (SELECT form_name, year, month FROM reports WHERE id = OLD.report_id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER answer_stats_update AFTER UPDATE OF answer_yes_no ON answers
+        BEGIN
+            UPDATE answer_stats
+            SET no_count = no_count + (NEW.answer_yes_no = 'Нет') - (OLD.answer_yes_no = 'Нет')
+            WHERE question_id = NEW.question_id
+              AND (form_name, year, month) = (SELECT form_name, year, month FROM reports WHERE id = NEW.report_id);
+        END
+    ''')
+    # Ответы удаляются до строки отчета: при каскадном удалении отчет
+    # уже не виден триггеру answer_stats_delete
+    conn.execute('''
+        CREATE TRIGGER reports_delete_answers BEFORE DELETE ON reports
+        BEGIN
+            DELETE FROM answers WHERE report_id = OLD.id;
+        END
+    ''')
+
+    conn.execute('''
+        INSERT INTO answer_stats (form_name, year, month, question_id, answer_count, no_count)
+        SELECT r.form_name, r.year, r.month, a.question_id, COUNT(*), SUM(a.answer_yes_no = 'Нет')
+        FROM answers a
+        JOIN reports r ON r.id = a.report_id
+        GROUP BY r.form_name, r.year, r.month, a.question_id
+    ''')
+
+
+SUMMARY_COLUMNS = ('question_count', 'yes_count', 'no_count', 'comment_count')
+
+
+def _init_report_summary(conn):
+    """
+    Сводные колонки reports: число вопросов, ответов "Да" и "Нет", комментариев.
+    Обновляются триггерами на answers, поэтому списки отчетов не читают ответы.
+    """
+    existing = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'reports_summary_insert'"
+    ).fetchone()
+    if existing:
+        return
+
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(reports)")}
+    for column in SUMMARY_COLUMNS:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE reports ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    conn.execute('''
+        CREATE TRIGGER reports_summary_insert AFTER INSERT ON answers
+        BEGIN
+            UPDATE reports SET
+                question_count = question_count + 1,
+                yes_count = yes_count + (NEW.answer_yes_no = 'Да'),
+                no_count = no_count + (NEW.answer_yes_no = 'Нет'),
+                comment_count = comment_count + (COALESCE(NEW.comment, '') <> '')
+            WHERE id = NEW.report_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER reports_summary_delete AFTER DELETE ON answers
+        BEGIN
+            UPDATE reports SET
+                question_count = question_count - 1,
+                yes_count = yes_count - (OLD.answer_yes_no = 'Да'),
+                no_count = no_count - (OLD.answer_yes_no = 'Нет'),
+                comment_count = comment_count - (COALESCE(OLD.comment, '') <> '')
+            WHERE id = OLD.report_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER reports_summary_update AFTER UPDATE OF answer_yes_no, comment ON answers
+        BEGIN
+            UPDATE reports SET
+                yes_count = yes_count + (NEW.answer_yes_no = 'Да') - (OLD.answer_yes_no = 'Да'),
+                no_count = no_count + (NEW.answer_yes_no = 'Нет') - (OLD.answer_yes_no = 'Нет'),
+                comment_count = comment_count + (COALESCE(NEW.comment, '') <> '') - (COALESCE(OLD.comment, '') <> '')
+            WHERE id = NEW.report_id;
+        END
+    ''')
+
+    conn.execute('''
+        UPDATE reports SET
+            question_count = s.question_count,
+            yes_count = s.yes_count,
+            no_count = s.no_count,
+            comment_count = s.comment_count
+        FROM (
+            SELECT report_id,
+                   COUNT(*) AS question_count,
+                   SUM(answer_yes_no = 'Да') AS yes_count,
+                   SUM(answer_yes_no = 'Нет') AS no_count,
+                   SUM(COALESCE(comment, '') <> '') AS comment_count
+            FROM answers
+            GROUP BY report_id
+        ) AS s
+        WHERE reports.id = s.report_id
+    ''')
+
+
+def _iso_timestamp(value):
+    """Перевести отметку времени из формата "дд.мм.гггг чч:мм:сс" в ISO-8601"""
+    try:
+        return datetime.strptime(value, DISPLAY_TIMESTAMP_FORMAT).strftime(TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return value
+
+
+def _migrate_reports_period(conn):
+    """Перестроение таблицы reports: номер месяца и ISO-отметки времени"""
+    columns = {row['name']: row['type'] for row in conn.execute("PRAGMA table_info(reports)")}
+    if columns.get('month') != 'TEXT':
+        return False
+
+    print("Миграция отчетов на числовые месяцы и ISO-даты...")
+    conn.create_function("month_number", 1, month_number, deterministic=True)
+    conn.create_function("iso_timestamp", 1, _iso_timestamp, deterministic=True)
+
+    conn.execute('''
+        CREATE TABLE reports_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            form_name TEXT NOT NULL,
+            month INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            report_date TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            file_path TEXT NOT NULL
+        )
+    ''')
+    copy_in_batches(conn, "reports", '''
+        INSERT INTO reports_new (id, form_name, month, year, report_date, created_at, file_path)
+        SELECT id, form_name, month_number(month), year, report_date, iso_timestamp(created_at), file_path
+        FROM reports
+        WHERE id BETWEEN :low AND :high
+    ''')
+    # Внешние ключи на время миграции выключены (_apply_step): ответы не удаляются каскадом
+    conn.execute("DROP TABLE reports")
+    conn.execute("ALTER TABLE reports_new RENAME TO reports")
+    return True
+
+
+def _migrate_answers_to_catalog(conn):
+    """Перенос справочных текстов из старой таблицы answers в каталог questions"""
+    columns = [row['name'] for row in conn.execute("PRAGMA table_info(answers)")]
+    if 'gost_text' not in columns:
+        return False
+
+    print("Миграция ответов в каталог вопросов...")
+    conn.create_function("question_hash", 5, question_hash, deterministic=True)
+
+    copy_in_batches(conn, "answers", '''
+        INSERT OR IGNORE INTO questions (question_hash, form_name, question_text, gost_text, quality_text, documents_text)
+        SELECT question_hash(r.form_name, a.question_text, a.gost_text, a.quality_text, a.documents_text),
+               r.form_name, a.question_text,
+               COALESCE(a.gost_text, ''), COALESCE(a.quality_text, ''), COALESCE(a.documents_text, '')
+        FROM answers a
+        JOIN reports r ON r.id = a.report_id
+        WHERE a.id BETWEEN :low AND :high
+        ORDER BY a.id
+    ''')
+
+    conn.execute('''
+        CREATE TABLE answers_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer_yes_no TEXT NOT NULL,
+            comment TEXT,
+            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE,
+            FOREIGN KEY (question_id) REFERENCES questions (id)
+        )
+    ''')
+
+    copy_in_batches(conn, "answers", '''
+        INSERT INTO answers_new (id, report_id, question_id, answer_yes_no, comment)
+        SELECT a.id, a.report_id, q.id, a.answer_yes_no, a.comment
+        FROM answers a
+        JOIN reports r ON r.id = a.report_id
+        JOIN questions q
+          ON q.question_hash = question_hash(r.form_name, a.question_text, a.gost_text, a.quality_text, a.documents_text)
+        WHERE a.id BETWEEN :low AND :high
+    ''')
+
+    conn.execute("DROP TABLE answers")
+    conn.execute("ALTER TABLE answers_new RENAME TO answers")
+    return True
+
+
+def _create_export_manifest(conn):
+    """Манифест выгрузок Excel по хешу содержимого отчета (см. export_store.py)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_files (
+            content_hash TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_export_files_path
+        ON export_files(file_path)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_file_path
+        ON reports(file_path)
+    ''')
+
+
+def _add_draft_question_keys(conn):
+    """Ключи вопросов формы в черновиках: ответы восстанавливаются и после изменения формы"""
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(drafts)")}
+    if 'question_keys' not in columns:
+        conn.execute("ALTER TABLE drafts ADD COLUMN question_keys TEXT")
+
+
+def _add_form_cache_version(conn):
+    """Версия разбора форм в кэше: строки, записанные прежним разбором (версия 0), не используются"""
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(form_cache)")}
+    if 'format_version' not in columns:
+        conn.execute("ALTER TABLE form_cache ADD COLUMN format_version INTEGER NOT NULL DEFAULT 0")
+
+
+# (версия, описание, функция шага). Функция получает соединение внутри транзакции
+# и возвращает True, если таблицы перестроены и после миграции нужен VACUUM.
+# Шаги 1-5 повторяют прежнюю инициализацию и проверяют, что уже создано:
+# база без номера версии доводится до текущей схемы из любого прежнего состояния.
+MIGRATIONS = [
+    (1, "Отчеты, каталог вопросов и ответы", _create_core_tables),
+    (2, "Полнотекстовый поиск", _init_search_index),
+    (3, "Сводная таблица аналитики", _init_answer_stats),
+    (4, "Сводные колонки отчетов", _init_report_summary),
+    (5, "Кэш форм и черновики", _create_cache_and_draft_tables),
+    (6, "Манифест выгрузок Excel", _create_export_manifest),
+    (7, "Ключи вопросов в черновиках", _add_draft_question_keys),
+    (8, "Версия разбора в кэше форм", _add_form_cache_version),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _has_tables(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' LIMIT 1"
+    ).fetchone() is not None
+
+
+def backup_database(conn, db_path, version):
+    """Резервная копия базы через backup API SQLite; старые копии сверх MAX_BACKUPS удаляются"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_path = f"{db_path}.v{version}_{timestamp}.bak"
+    target = sqlite3.connect(backup_path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+
+    backups = sorted(glob.glob(f"{glob.escape(db_path)}.v*.bak"), key=os.path.getmtime)
+    for old_backup in backups[:-MAX_BACKUPS]:
+        os.remove(old_backup)
+    return backup_path
+
+
+def _apply_step(conn, version, step):
+    """
+    Выполнить шаг в одной транзакции с записью версии.
+    Возвращает (выполнен ли шаг, нужен ли VACUUM); шаг, уже выполненный
+    другим процессом, пропускается.
+    """
+    # Перестроение таблиц (DROP + RENAME) не должно вызывать каскадных удалений;
+    # PRAGMA foreign_keys меняется только вне транзакции
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                return False, False
+            rebuilt = step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return True, bool(rebuilt)
+
+
+def migrate(backup=True):
+    """
+    Довести схему базы до SCHEMA_VERSION.
+    backup - сделать резервную копию существующей базы перед первым шагом.
+    Возвращает номер версии до обновления.
+    """
+    with connection() as conn:
+        version = schema_version(conn)
+        if version >= SCHEMA_VERSION:
+            return version
+
+        db_path = get_pool().path
+        if backup and db_path != ":memory:" and (version > 0 or _has_tables(conn)):
+            print(f"Резервная копия БД: {backup_database(conn, db_path, version)}")
+
+        print(f"Обновление схемы БД: версия {version} -> {SCHEMA_VERSION}")
+        vacuum = False
+        for step_version, description, step in MIGRATIONS:
+            if step_version <= version:
+                continue
+            started = time.perf_counter()
+            applied, rebuilt = _apply_step(conn, step_version, step)
+            vacuum = vacuum or rebuilt
+            if applied:
+                print(f"  {step_version}. {description}: {time.perf_counter() - started:.2f} с")
+
+        if vacuum:
+            # Освобождаем место после перестроения таблиц
+            conn.execute("VACUUM")
+
+    print("База данных инициализирована")
+    return version
@@ -0,0 +1,344 @@
+"""
+Виртуализированный список вопросов для экрана заполнения отчета
+Создается только столько виджетов, сколько помещается на экране;
+при прокрутке они привязываются к другим вопросам, а не пересоздаются.
+Высота строки измеряется при первом показе вопроса, до этого берется оценка ROW_HEIGHT
+"""
+
+import tkinter as tk
+from bisect import bisect_right
+from itertools import accumulate
+
+
+# Оценка высоты еще не показанного вопроса и промежуток между вопросами
+ROW_HEIGHT = 240
+ROW_GAP = 10
+OVERSCAN_ROWS = 1
+SCROLL_STEP = 20
+
+
+class QuestionSlot:
+    """Виджеты одного вопроса, которые переиспользуются для разных индексов"""
+
+    def __init__(self, view):
+        self.view = view
+        self.index = None
+        self.comment_saved = ""
+
+        self.frame = tk.LabelFrame(view.canvas, font=("Arial", 16, "bold"), padx=10, pady=5)
+
+        top_frame = tk.Frame(self.frame)
+        top_frame.pack(fill=tk.X, pady=2)
+
+        answer_frame = tk.Frame(top_frame)
+        answer_frame.pack(side=tk.LEFT, padx=(0, 15))
+
+        self.btn_yes = tk.Button(
+            answer_frame, text="ДА", font=("Arial", 18, "bold"), width=5,
+            activebackground="darkgreen", activeforeground="white", highlightthickness=2,
+            command=lambda: self.view.set_answer(self.index, "Да")
+        )
+        self.btn_yes.pack(side=tk.LEFT, padx=3)
+
+        self.btn_no = tk.Button(
+            answer_frame, text="НЕТ", font=("Arial", 18, "bold"), width=5,
+            activebackground="darkred", activeforeground="white", highlightthickness=2,
+            command=lambda: self.view.set_answer(self.index, "Нет")
+        )
+        self.btn_no.pack(side=tk.LEFT, padx=3)
+
+        buttons_frame = tk.Frame(top_frame)
+        buttons_frame.pack(side=tk.RIGHT, padx=5)
+
+        tk.Button(buttons_frame, text="?", font=("Arial", 16, "bold"), width=3,
+                  command=lambda: self.view.on_help(self.question)).pack(side=tk.LEFT, padx=2)
+
+        self.btn_documents = tk.Button(buttons_frame, text="📄", font=("Arial", 16, "bold"), width=3,
+                                       command=lambda: self.view.on_documents(self.question))
+
+        self.question_label = tk.Label(top_frame, font=("Arial", 18), wraplength=800, justify=tk.LEFT, anchor='w')
+        self.question_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        comment_frame = tk.Frame(self.frame)
+        comment_frame.pack(fill=tk.X, pady=2)
+        tk.Label(comment_frame, text="Комментарий:", font=("Arial", 18)).pack(side=tk.LEFT, padx=(0, 5))
+
+        self.comment = tk.Text(comment_frame, height=2, font=("Arial", 18), wrap=tk.WORD)
+        self.comment.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Комментарий попадает в черновик по мере ввода; запись в БД отложенная
+        self.comment.bind('<KeyRelease>', lambda e: self.commit())
+
+        self.item = view.canvas.create_window(0, 0, window=self.frame, anchor="nw", state="hidden")
+        view.bind_wheel(self.frame)
+
+    @property
+    def question(self):
+        return self.view.logic.questions_list[self.index]
+
+    def bind(self, index):
+        """Показать в слоте вопрос с индексом index"""
+        self.commit()
+        self.index = index
+
+        question = self.question
+        answer_data = self.view.logic.answers_list[index]
+
+        self.frame.config(text=f"Вопрос {index + 1}")
+        self.question_label.config(text=question['question'])
+
+        if question.get('documents'):
+            self.btn_documents.pack(side=tk.LEFT, padx=2)
+        else:
+            self.btn_documents.pack_forget()
+
+        self.show_answer(answer_data['answer_yes_no'])
+
+        self.comment_saved = answer_data['comment'] or ""
+        self.comment.delete(1.0, tk.END)
+        if self.comment_saved:
+            self.comment.insert(1.0, self.comment_saved)
+        self.comment.edit_reset()
+
+    def show_answer(self, answer):
+        """Раскрасить кнопки ДА/НЕТ по ответу"""
+        if answer == "Да":
+            self.btn_yes.config(bg="green", fg="white", relief=tk.SUNKEN, highlightbackground="green")
+        else:
+            self.btn_yes.config(bg="lightgray", fg="darkgreen", relief=tk.RAISED, highlightbackground="gray")
+
+        if answer == "Нет":
+            self.btn_no.config(bg="red", fg="white", relief=tk.SUNKEN, highlightbackground="red")
+        else:
+            self.btn_no.config(bg="lightgray", fg="darkred", relief=tk.RAISED, highlightbackground="gray")
+
+    def get_comment(self):
+        return self.comment.get(1.0, tk.END).strip()
+
+    def commit(self):
+        """Сохранить комментарий слота в логику, если он изменился"""
+        if self.index is None:
+            return
+        comment = self.get_comment()
+        if comment != self.comment_saved:
+            self.view.logic.save_comment(self.index, comment)
+            self.comment_saved = comment
+
+    def required_height(self):
+        """Высота, при которой текст вопроса и поле комментария видны целиком"""
+        return self.frame.winfo_reqheight()
+
+    def place(self, y, width, height):
+        """Разместить слот на холсте"""
+        self.view.canvas.coords(self.item, 0, y)
+        self.view.canvas.itemconfigure(self.item, width=width, height=height, state="normal")
+
+    def hide(self):
+        """Убрать слот с экрана (виджеты сохраняются в пуле)"""
+        self.commit()
+        self.index = None
+        self.view.canvas.itemconfigure(self.item, state="hidden")
+
+
+class QuestionView:
+    """
+    Непрерывный список всех вопросов отчета с пулом виджетов.
+    on_help/on_documents(question) - обработчики кнопок "?" и "📄",
+    on_scroll(first, last) - вызывается при смене видимого диапазона вопросов,
+    on_answer(index) - после изменения ответа.
+    """
+
+    def __init__(self, parent, logic, on_help, on_documents, on_scroll=None, on_answer=None, row_height=ROW_HEIGHT):
+        self.logic = logic
+        self.on_help = on_help
+        self.on_documents = on_documents
+        self.on_scroll = on_scroll
+        self.on_answer = on_answer
+        self.row_height = row_height
+        # Высоты строк (с промежутком) и смещения их начала; offsets[i + 1] - конец строки i
+        self.heights = []
+        self.offsets = [0]
+
+        self.slots = []
+        self.bound = {}
+        self.visible = (0, 0)
+        self.refresh_pending = False
+        self.scroll_region = None
+
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, highlightthickness=0, yscrollincrement=SCROLL_STEP)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.on_canvas_scrolled)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.bind_wheel(self.canvas)
+        self.update_layout()
+        self.update_scroll_region()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def bind_wheel(self, widget):
+        """Прокрутка колесом мыши над виджетом и его потомками"""
+        widget.bind("<MouseWheel>", self.on_mouse_wheel, add="+")
+        widget.bind("<Button-4>", self.on_mouse_wheel, add="+")
+        widget.bind("<Button-5>", self.on_mouse_wheel, add="+")
+        for child in widget.winfo_children():
+            # В поле комментария колесо прокручивает сам текст
+            if not isinstance(child, tk.Text):
+                self.bind_wheel(child)
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-3, "units")
+        else:
+            self.canvas.yview_scroll(3, "units")
+        return "break"
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+
+    def on_canvas_scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """Перепривязка слотов не чаще одного раза за цикл событий"""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def update_layout(self):
+        """Пересчитать смещения строк; высоты новых вопросов - по оценке"""
+        total = len(self.logic.answers_list)
+        if len(self.heights) != total:
+            self.heights = self.heights[:total] + [self.row_height] * (total - len(self.heights))
+        self.offsets = [0] + list(accumulate(self.heights))
+
+    def row_at(self, y):
+        """Индекс строки, на которую приходится координата y холста"""
+        return min(max(0, bisect_right(self.offsets, y) - 1), max(0, len(self.heights) - 1))
+
+    def update_scroll_region(self):
+        region = (0, 0, self.canvas.winfo_width(), self.offsets[-1])
+        # Повторная настройка вызывает yscrollcommand и новую перепривязку
+        if region != self.scroll_region:
+            self.scroll_region = region
+            self.canvas.configure(scrollregion=region)
+
+    def measure(self, slots):
+        """
+        Измерить высоты только что привязанных слотов. Возвращает True, если высоты изменились;
+        строка у верхнего края экрана при этом остается на месте.
+        """
+        self.canvas.update_idletasks()
+        changed = False
+        for slot in slots:
+            height = slot.required_height() + ROW_GAP
+            if height != self.heights[slot.index]:
+                self.heights[slot.index] = height
+                changed = True
+        if not changed:
+            return False
+
+        top = self.canvas.canvasy(0)
+        anchor = self.row_at(top)
+        shift = top - self.offsets[anchor]
+        self.offsets = [0] + list(accumulate(self.heights))
+        self.update_scroll_region()
+        if self.offsets[-1]:
+            self.canvas.yview_moveto((self.offsets[anchor] + shift) / self.offsets[-1])
+        return True
+
+    def refresh(self):
+        """Привязать слоты пула к вопросам, попадающим в видимую область"""
+        self.refresh_pending = False
+        if not self.canvas.winfo_exists():
+            return
+
+        if len(self.heights) != len(self.logic.answers_list):
+            self.update_layout()
+
+        total = len(self.logic.answers_list)
+        width = self.canvas.winfo_width()
+        height = max(self.canvas.winfo_height(), self.row_height)
+        top = self.canvas.canvasy(0)
+
+        first = max(0, self.row_at(top) - OVERSCAN_ROWS) if total else 0
+        last = min(total, self.row_at(top + height) + 1 + OVERSCAN_ROWS)
+        wanted = range(first, last)
+
+        # Слоты, ушедшие из видимой области, возвращаются в пул
+        free = []
+        for index in list(self.bound):
+            if index not in wanted:
+                slot = self.bound.pop(index)
+                slot.hide()
+                free.append(slot)
+        free.extend(slot for slot in self.slots if slot.index is None and slot not in free)
+
+        new_slots = []
+        for index in wanted:
+            slot = self.bound.get(index)
+            if slot is None:
+                slot = free.pop() if free else self.new_slot()
+                slot.bind(index)
+                self.bound[index] = slot
+                new_slots.append(slot)
+
+        # После измерения видимая область могла сдвинуться - повторная перепривязка
+        if new_slots and self.measure(new_slots):
+            self.schedule_refresh()
+            top = self.canvas.canvasy(0)
+
+        for index in wanted:
+            self.bound[index].place(self.offsets[index], width, self.heights[index] - ROW_GAP)
+
+        self.update_scroll_region()
+
+        # Видимыми считаются вопросы, целиком помещающиеся на экране
+        visible_first = min(total, self.row_at(top))
+        visible_last = min(total, max(visible_first + 1, bisect_right(self.offsets, top + height) - 1))
+        if (visible_first, visible_last) != self.visible:
+            self.visible = (visible_first, visible_last)
+            if self.on_scroll:
+                self.on_scroll(visible_first, visible_last)
+
+    def new_slot(self):
+        slot = QuestionSlot(self)
+        self.slots.append(slot)
+        return slot
+
+    def set_answer(self, index, answer):
+        """Записать ответ и обновить кнопки слота"""
+        slot = self.bound.get(index)
+        comment = self.logic.answers_list[index]['comment']
+        if slot is not None:
+            slot.show_answer(answer)
+            comment = slot.get_comment()
+            slot.comment_saved = comment
+        self.logic.save_answer(index, answer, comment)
+        if self.on_answer:
+            self.on_answer(index)
+
+    def refresh_answer(self, index):
+        """Перерисовать слот после изменения ответа извне"""
+        slot = self.bound.get(index)
+        if slot is not None:
+            slot.bind(index)
+
+    def commit(self):
+        """Сохранить комментарии всех видимых вопросов"""
+        for slot in self.bound.values():
+            slot.commit()
+
+    def scroll_to(self, index):
+        """Прокрутить список так, чтобы вопрос index был первым"""
+        if len(self.heights) != len(self.logic.answers_list):
+            self.update_layout()
+        if self.heights:
+            self.update_scroll_region()
+            self.canvas.yview_moveto(self.offsets[min(index, len(self.heights) - 1)] / self.offsets[-1])
+        self.schedule_refresh()
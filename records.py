@@ -0,0 +1,102 @@
+"""
+Компактные записи вопросов и ответов
+Ответ ссылается на общий неизменяемый вопрос формы и не копирует его тексты;
+доступ по ключам ('question_text', 'comment', ...) работает как у словаря
+"""
+
+
+class QuestionDef:
+    """Неизменяемый вопрос формы: вопрос, ГОСТ, руководство по качеству, документы"""
+
+    __slots__ = ('question', 'gost', 'quality', 'documents')
+
+    def __init__(self, question, gost="", quality="", documents=""):
+        object.__setattr__(self, 'question', question)
+        object.__setattr__(self, 'gost', gost or "")
+        object.__setattr__(self, 'quality', quality or "")
+        object.__setattr__(self, 'documents', documents or "")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Вопрос из словаря формата form_reader"""
+        return cls(data['question'], data.get('gost'), data.get('quality'), data.get('documents'))
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QuestionDef нельзя изменять")
+
+    def __reduce__(self):
+        return QuestionDef, (self.question, self.gost, self.quality, self.documents)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        if not isinstance(other, QuestionDef):
+            return NotImplemented
+        return (self.question, self.gost, self.quality, self.documents) == \
+               (other.question, other.gost, other.quality, other.documents)
+
+    def __hash__(self):
+        return hash((self.question, self.gost, self.quality, self.documents))
+
+    def __repr__(self):
+        return f"QuestionDef({self.question!r})"
+
+
+class AnswerRecord:
+    """Ответ на вопрос: ссылка на QuestionDef, ответ Да/Нет и комментарий"""
+
+    __slots__ = ('question', 'answer_yes_no', 'comment')
+
+    # Ключи словаря ответа, которые берутся из вопроса
+    QUESTION_FIELDS = {
+        'question_text': 'question',
+        'gost_text': 'gost',
+        'quality_text': 'quality',
+        'documents_text': 'documents'
+    }
+    FIELDS = ('question_text', 'answer_yes_no', 'comment', 'gost_text', 'quality_text', 'documents_text')
+
+    def __init__(self, question, answer_yes_no='', comment=''):
+        self.question = question
+        self.answer_yes_no = answer_yes_no
+        self.comment = comment
+
+    def __getitem__(self, key):
+        field = self.QUESTION_FIELDS.get(key)
+        if field is not None:
+            return getattr(self.question, field)
+        if key in ('answer_yes_no', 'comment'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ('answer_yes_no', 'comment'):
+            raise KeyError(f"Поле {key} задается вопросом формы")
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        return {key: self[key] for key in self.FIELDS}
+
+    def __repr__(self):
+        return f"AnswerRecord({self.question.question!r}, {self.answer_yes_no!r})"
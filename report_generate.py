@@ -0,0 +1,326 @@
+"""
+Пакетное создание отчетов из файлов ответов CSV/JSON
+Ответы проверяются по вопросам формы, книги Excel формируются в пуле процессов,
+отчеты записываются в БД по одному в основном процессе.
+
+CSV (разделитель ; , или табуляция). Перед таблицей могут идти строки
+"Месяц;Март", "Год;2024", "Дата;05.03.2024", "Форма;Главный инженер".
+Таблица: заголовок с колонкой "Ответ" и колонкой "№" и/или "Вопрос",
+необязательная колонка "Комментарий":
+    №;Вопрос;Ответ;Комментарий
+    1;Мероприятия по плану выполняются?;Да;
+
+JSON:
+    {"form_name": "...", "month": "Март", "year": 2024, "report_date": "05.03.2024",
+     "answers": [{"index": 1, "answer": "Да", "comment": ""}, {"question": "...", "answer": "Нет"}]}
+
+Номера вопросов (№, index) начинаются с 1.
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from batch_export import safe_file_name
+from database import MONTHS, save_report_to_db
+from export_store import export_store, reserve_file_name
+from form_cache import form_cache
+from form_reader import sniff_csv_dialect
+from logic import ReportLogic
+
+
+ANSWER_FILE_EXTENSIONS = ('.csv', '.json')
+ANSWER_VALUES = {'да': "Да", 'нет': "Нет"}
+
+# Заголовки колонок и строк с реквизитами отчета в CSV (в нижнем регистре)
+CSV_COLUMNS = {
+    'index': ('№', 'номер', 'index'),
+    'question': ('вопрос', 'question'),
+    'answer': ('ответ', 'answer'),
+    'comment': ('комментарий', 'comment')
+}
+CSV_META = {
+    'месяц': 'month', 'month': 'month',
+    'год': 'year', 'year': 'year',
+    'дата': 'report_date', 'report_date': 'report_date',
+    'форма': 'form_name', 'form_name': 'form_name'
+}
+MAX_LISTED_ERRORS = 10
+
+
+def _read_csv_answers(file_path):
+    """Реквизиты и строки ответов (ссылка, номер, вопрос, ответ, комментарий) из CSV"""
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        dialect = sniff_csv_dialect(f)
+
+        meta = {}
+        columns = None
+        entries = []
+        for line_number, row in enumerate(csv.reader(f, dialect), start=1):
+            row = [value.strip() for value in row]
+            if not any(row):
+                continue
+
+            if columns is None:
+                header = [value.lower() for value in row]
+                if any(name in header for name in CSV_COLUMNS['answer']):
+                    columns = {key: next((header.index(name) for name in names if name in header), None)
+                               for key, names in CSV_COLUMNS.items()}
+                    if columns['index'] is None and columns['question'] is None:
+                        raise ValueError("В заголовке нет колонки \"№\" или \"Вопрос\"")
+                elif header[0] in CSV_META and len(row) > 1:
+                    meta[CSV_META[header[0]]] = row[1]
+                else:
+                    raise ValueError(f"Строка {line_number}: ожидался заголовок с колонкой \"Ответ\"")
+                continue
+
+            def cell(key):
+                index = columns[key]
+                return row[index] if index is not None and index < len(row) else ""
+
+            entries.append((f"строка {line_number}", cell('index'), cell('question'), cell('answer'), cell('comment')))
+
+    if columns is None:
+        raise ValueError("Не найден заголовок таблицы ответов")
+    return meta, entries
+
+
+def _read_json_answers(file_path):
+    """Реквизиты и строки ответов из JSON"""
+    with open(file_path, encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('answers'), list):
+        raise ValueError("Ожидался объект JSON со списком answers")
+
+    meta = {key: data[key] for key in ('form_name', 'month', 'year', 'report_date') if data.get(key) is not None}
+    entries = []
+    for number, item in enumerate(data['answers'], start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"Ответ {number}: ожидался объект")
+        entries.append((f"ответ {number}", item.get('index', ''), item.get('question', ''),
+                        item.get('answer', ''), item.get('comment') or ''))
+    return meta, entries
+
+
+def read_answers_file(file_path):
+    """Прочитать файл ответов .csv или .json: (реквизиты, строки ответов)"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        return _read_csv_answers(file_path)
+    if extension == '.json':
+        return _read_json_answers(file_path)
+    raise ValueError(f"Неподдерживаемый формат файла ответов: {extension}")
+
+
+def validate_answers(questions, entries):
+    """
+    Сопоставить строки файла с вопросами формы.
+    Возвращает ({индекс вопроса: (ответ, комментарий)}, список ошибок).
+    """
+    by_text = {}
+    for index, question in enumerate(questions):
+        by_text.setdefault(question.question.strip(), index)
+
+    answers = {}
+    errors = []
+    for ref, number, text, answer, comment in entries:
+        number = str(number).strip().rstrip('.')
+        text = str(text).strip()
+
+        if number:
+            if not number.isdigit() or not 1 <= int(number) <= len(questions):
+                errors.append(f"{ref}: нет вопроса с номером {number}")
+                continue
+            index = int(number) - 1
+            if text and text != questions[index].question.strip():
+                errors.append(f"{ref}: текст вопроса {number} не совпадает с формой")
+                continue
+        else:
+            index = by_text.get(text)
+            if index is None:
+                errors.append(f"{ref}: вопрос не найден в форме: {text[:60]}")
+                continue
+
+        value = ANSWER_VALUES.get(str(answer).strip().lower())
+        if value is None:
+            errors.append(f"{ref}: ответ должен быть \"Да\" или \"Нет\", получено \"{answer}\"")
+            continue
+        if index in answers:
+            errors.append(f"{ref}: повторный ответ на вопрос {index + 1}")
+            continue
+        answers[index] = (value, str(comment).strip())
+
+    missing = [str(index + 1) for index in range(len(questions)) if index not in answers]
+    if missing:
+        listed = ", ".join(missing[:MAX_LISTED_ERRORS]) + (" ..." if len(missing) > MAX_LISTED_ERRORS else "")
+        errors.append(f"нет ответов на вопросы ({len(missing)}): {listed}")
+    return answers, errors
+
+
+def validate_meta(meta):
+    """Реквизиты отчета (месяц, год, дата) и список ошибок"""
+    errors = []
+    month = str(meta.get('month', '')).strip().capitalize()
+    if month not in MONTHS:
+        errors.append(f"не указан месяц или неизвестный месяц: \"{meta.get('month', '')}\"")
+
+    try:
+        year = int(meta.get('year'))
+    except (TypeError, ValueError):
+        year = None
+        errors.append(f"не указан год или год не число: \"{meta.get('year', '')}\"")
+
+    report_date = str(meta.get('report_date') or datetime.now().strftime("%d.%m.%Y")).strip()
+    try:
+        datetime.strptime(report_date, "%d.%m.%Y")
+    except ValueError:
+        errors.append(f"дата отчета должна быть в формате ДД.ММ.ГГГГ: \"{report_date}\"")
+
+    return month, year, report_date, errors
+
+
+def _reserve_output_file(output_dir, report_data, answers_path):
+    """
+    Путь к книге: реквизиты отчета и имя файла ответов; одинаковые имена файлов ответов
+    из разных папок получают номер (_2, _3...), файл резервируется сразу.
+    """
+    base = f"{report_data['form_name']} {report_data['month']} {report_data['year']}"
+    stem = os.path.splitext(os.path.basename(answers_path))[0]
+    return reserve_file_name(output_dir, f"{safe_file_name(base)}_{safe_file_name(stem)}")
+
+
+def _init_worker():
+    """Дочерний процесс читает кэш форм, но не пишет в БД: все записи - в основном процессе"""
+    form_cache.persist = False
+
+
+def _warm_form_cache(form_name):
+    """Разобрать общую форму в основном процессе, чтобы дочерние процессы взяли ее из кэша"""
+    logic = ReportLogic()
+    form_path = logic.get_form_path(form_name)
+    if form_path:
+        logic.load_questions_from_excel(form_path)
+
+
+def prepare_report(answers_path, form_name=None, defaults=None, output_dir="отчеты", dry_run=False):
+    """
+    Проверить файл ответов и сформировать книгу Excel (выполняется в дочернем процессе).
+    defaults - реквизиты для файлов, где они не указаны (month, year, report_date).
+    Возвращает {'file', 'ok', 'errors'} и при успехе 'report_data', 'answers', 'output', 'content_hash'.
+    """
+    result = {'file': answers_path, 'ok': False, 'errors': []}
+    try:
+        meta, entries = read_answers_file(answers_path)
+        meta = {**(defaults or {}), **meta}
+        form_name = meta.get('form_name') or form_name
+        if not form_name:
+            result['errors'].append("не указана форма")
+            return result
+
+        month, year, report_date, errors = validate_meta(meta)
+
+        logic = ReportLogic()
+        form_path = logic.get_form_path(form_name)
+        if not form_path or not logic.load_questions_from_excel(form_path):
+            result['errors'] = errors + [f"не удалось загрузить вопросы формы {form_name}"]
+            return result
+
+        answers, answer_errors = validate_answers(logic.questions_list, entries)
+        result['errors'] = errors + answer_errors
+        if result['errors'] or dry_run:
+            result['ok'] = not result['errors']
+            return result
+
+        logic.fill_report(form_name, month, year, report_date, answers)
+        filename = _reserve_output_file(output_dir, logic.current_report_data, answers_path)
+        try:
+            # Запись в манифест выгрузок - в основном процессе вместе с отчетом (generate_reports)
+            result['output'], result['content_hash'] = logic.export_current_report(filename)
+        except Exception:
+            os.remove(filename)
+            raise
+        result['report_data'] = logic.current_report_data
+        result['answers'] = logic.answers_list
+        result['ok'] = True
+    except Exception as e:
+        result['errors'].append(str(e))
+    return result
+
+
+def iter_answer_files(paths):
+    """Файлы ответов: указанные файлы и файлы .csv/.json из указанных папок"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(ANSWER_FILE_EXTENSIONS) and not name.startswith('~$'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def generate_reports(paths, form_name=None, defaults=None, output_dir="отчеты", workers=None,
+                     dry_run=False, progress=None):
+    """
+    Создать отчеты из файлов ответов.
+    Проверка и выгрузка в Excel идут параллельно в workers процессах, запись
+    в БД - в этом процессе по мере готовности, поэтому процессы не блокируют БД.
+    progress(done, total, result) вызывается после каждого файла.
+    Возвращает список результатов {'file', 'ok', 'errors', 'report_id', 'output'}.
+    """
+    files = list(iter_answer_files(paths))
+    total = len(files)
+    results = []
+    if not total:
+        return results
+
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    started = time.perf_counter()
+
+    def store(result):
+        """Записать отчет в БД; при ошибке книга удаляется"""
+        if result['ok'] and not dry_run:
+            try:
+                content_hash = result.pop('content_hash')
+                if content_hash:
+                    export_store.register(content_hash, result['output'])
+                result['report_id'] = save_report_to_db(result.pop('report_data'), result.pop('answers'), result['output'])
+            except Exception as e:
+                export_store.discard(result['output'])
+                result.update(ok=False, output=None, errors=[f"ошибка записи в БД: {e}"])
+        results.append(result)
+        if progress:
+            progress(len(results), total, result)
+
+    def collect(futures):
+        for future in futures:
+            answers_path = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'file': answers_path, 'ok': False, 'errors': [str(e)]}
+            store(result)
+
+    if form_name:
+        _warm_form_cache(form_name)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = {}
+        for answers_path in files:
+            while len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[pool.submit(prepare_report, answers_path, form_name, defaults, output_dir, dry_run)] = answers_path
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for result in results if not result['ok'])
+    action = "Проверено файлов" if dry_run else "Создано отчетов"
+    print(f"{action}: {total - failed} из {total}, ошибок: {failed}, время: {elapsed:.1f} с")
+    return results
@@ -0,0 +1,142 @@
+"""
+Импорт ранее выгруженных отчетов Excel в базу данных
+В книге нет даты отчета: дата создания берется из подвала "Дата создания отчета"
+(день выгрузки), дата отчета - первое число отчетного месяца из заголовка.
+Файлы, уже записанные в БД как файлы отчетов, повторно не импортируются.
+"""
+
+import os
+import openpyxl
+from datetime import datetime
+from database import get_report_file_paths, month_number, save_reports_bulk, TIMESTAMP_FORMAT
+from logic import ReportLogic
+from form_reader import find_form_file
+
+
+TITLE_PREFIX = "Отчет: "
+DATE_PREFIX = "Дата создания отчета: "
+SIGNATURE_PREFIX = "Подпись:"
+
+
+def load_form_references(form_name, forms_dir="формы"):
+    """Справочные тексты вопросов формы: вопрос -> словарь вопроса"""
+    file_path = find_form_file(form_name, forms_dir)
+    if not file_path:
+        return {}
+
+    logic = ReportLogic()
+    if not logic.load_questions_from_excel(file_path):
+        return {}
+    return {q['question']: q for q in logic.questions_list}
+
+
+def read_report_file(file_path, form_references=None):
+    """
+    Прочитать отчет, созданный create_excel_report.
+    form_references - кэш справочных текстов по имени формы.
+    Возвращает кортеж (report_data, answers_list, file_path) или None.
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        rows = wb.active.iter_rows(min_col=1, max_col=2, values_only=True)
+
+        title = next(rows, (None,))[0]
+        if not title or not str(title).startswith(TITLE_PREFIX):
+            return None
+
+        parts = str(title)[len(TITLE_PREFIX):].rsplit(" ", 2)
+        if len(parts) != 3:
+            return None
+        form_name, month, year = parts
+        number = month_number(month)
+
+        report_data = {
+            'form_name': form_name,
+            'month': month,
+            'year': int(year),
+            'report_date': f"01.{number:02d}.{int(year)}" if number else ''
+        }
+
+        if form_references is None:
+            form_references = {}
+        if form_name not in form_references:
+            form_references[form_name] = load_form_references(form_name)
+        references = form_references[form_name]
+
+        answers_list = []
+        for row in rows:
+            value_a = row[0] if row else None
+            value_b = row[1] if len(row) > 1 else None
+            if value_a is None:
+                continue
+
+            text = str(value_a)
+            if text.startswith(DATE_PREFIX):
+                # Дата выгрузки книги - это дата создания, а не отчетная дата
+                created = text[len(DATE_PREFIX):].strip()
+                report_data['created_at'] = datetime.strptime(created, "%d.%m.%Y").strftime(TIMESTAMP_FORMAT)
+            elif text.startswith(SIGNATURE_PREFIX):
+                break
+            elif value_b is not None:
+                question = references.get(text, {})
+                answers_list.append({
+                    'question_text': text,
+                    'answer_yes_no': str(value_b),
+                    'comment': '',
+                    'gost_text': question.get('gost', ''),
+                    'quality_text': question.get('quality', ''),
+                    'documents_text': question.get('documents', '')
+                })
+            elif answers_list:
+                answers_list[-1]['comment'] = text
+
+        if not answers_list:
+            return None
+        return report_data, answers_list, file_path
+
+    finally:
+        wb.close()
+
+
+def _path_key(file_path):
+    """Путь для сравнения: абсолютный и в регистре файловой системы"""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def iter_report_files(directory):
+    """
+    Последовательно читать отчеты из папки, пропуская нераспознанные файлы
+    и файлы, на которые уже ссылаются отчеты в БД.
+    """
+    form_references = {}
+    known = {_path_key(path) for path in get_report_file_paths()}
+    skipped = 0
+
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.xlsx') or name.startswith('~$'):
+            continue
+
+        file_path = os.path.join(directory, name)
+        if _path_key(file_path) in known:
+            skipped += 1
+            continue
+
+        try:
+            parsed = read_report_file(file_path, form_references)
+        except Exception as e:
+            print(f"Пропущен файл {name}: {e}")
+            continue
+
+        if parsed is None:
+            print(f"Пропущен файл {name}: не похож на отчет")
+            continue
+
+        yield parsed
+
+    if skipped:
+        print(f"Пропущено файлов, уже записанных в БД: {skipped}")
+
+
+def import_reports_from_directory(directory, batch_size=500):
+    """Импортировать все отчеты из папки одной транзакцией"""
+    return save_reports_bulk(iter_report_files(directory), batch_size=batch_size)
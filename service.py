@@ -0,0 +1,483 @@
+"""
+Сервис отчетов: локальный HTTP/JSON сервер поверх ReportLogic и database.py
+Несколько инспекторов и пакетные задания работают с одной reports.db
+через один процесс. Чтение выполняется параллельно в пуле потоков,
+все записи в БД проходят через одну очередь и выполняются по очереди
+в единственном потоке записи, поэтому клиенты не получают "database is locked".
+
+python service.py --port 8765
+
+Запросы и ответы - JSON в UTF-8:
+    GET    /forms                          список форм
+    GET    /forms/<форма>                  вопросы формы
+    GET    /drafts                         незавершенные черновики
+    POST   /drafts                         начать отчет: {"form_name", "month", "year", "report_date"}
+    POST   /drafts/<id>/resume             продолжить черновик (409, если он открыт в другом сеансе)
+    GET    /sessions/<сеанс>               ход заполнения
+    POST   /sessions/<сеанс>/answers       ответы: {"answers": [{"index", "answer", "comment"}]}
+    POST   /sessions/<сеанс>/save          сохранить отчет в БД и Excel
+    DELETE /sessions/<сеанс>               закрыть сеанс (черновик сохраняется)
+    GET    /reports?limit=&sort=&descending=&form=&after=   страница списка отчетов
+    GET    /reports/<id>                   отчет с ответами
+    POST   /reports/<id>/export            выгрузить отчет в Excel заново
+    GET    /metrics                        замеры времени операций
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import metrics
+from connection import POOL_SIZE, configure_pool, close_pool
+from database import MONTHS, REPORT_SORT_KEYS, init_database, get_reports_page, get_report_by_id
+from drafts import DraftJournal, list_drafts
+from export_store import export_store
+from logic import ReportLogic
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Сеанс без запросов дольше SESSION_TIMEOUT секунд закрывается, черновик остается в БД
+SESSION_TIMEOUT = 3600
+# Ожидающих записей больше WRITE_QUEUE_SIZE - новые запросы ждут места в очереди
+WRITE_QUEUE_SIZE = 1000
+MAX_BODY_SIZE = 16 * 1024 * 1024
+MAX_PAGE_SIZE = 1000
+
+
+class HTTPError(Exception):
+    """Ошибка запроса с кодом ответа HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Session:
+    """Заполняемый отчет одного клиента"""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.logic = ReportLogic()
+        # Черновик записывается только из потока записи, без таймера
+        self.logic.drafts = DraftJournal(flush_delay=None)
+        self.saving = False
+        self.touched = time.monotonic()
+
+    def status(self):
+        answered, total = self.logic.get_progress()
+        return {
+            'session': self.id,
+            'draft_id': self.logic.drafts.draft_id,
+            'report': self.logic.current_report_data,
+            'answered': answered,
+            'total': total,
+            'first_unanswered': self.logic.first_unanswered()
+        }
+
+
+def _json_default(value):
+    """Записи ответов и вопросов (records.py) сериализуются как словари"""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def _int_param(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Параметр {name} должен быть числом")
+
+
+class ReportService:
+    """Маршруты HTTP, сеансы заполнения и очередь записи"""
+
+    def __init__(self, read_workers=POOL_SIZE, session_timeout=SESSION_TIMEOUT):
+        self.sessions = {}
+        # Черновик -> сеанс, который в него пишет: один черновик открыт только в одном сеансе
+        self.draft_sessions = {}
+        self.session_timeout = session_timeout
+        self.reader = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="service-read")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service-write")
+        self.write_queue = None
+        self.routes = [
+            ("GET", r"/forms", self.list_forms),
+            ("GET", r"/forms/(?P<name>[^/]+)", self.get_form),
+            ("GET", r"/drafts", self.list_drafts),
+            ("POST", r"/drafts", self.start_draft),
+            ("POST", r"/drafts/(?P<draft_id>\d+)/resume", self.resume_draft),
+            ("GET", r"/sessions/(?P<session_id>\w+)", self.get_session),
+            ("POST", r"/sessions/(?P<session_id>\w+)/answers", self.post_answers),
+            ("POST", r"/sessions/(?P<session_id>\w+)/save", self.save_session),
+            ("DELETE", r"/sessions/(?P<session_id>\w+)", self.close_session),
+            ("GET", r"/reports", self.list_reports),
+            ("GET", r"/reports/(?P<report_id>\d+)", self.get_report),
+            ("POST", r"/reports/(?P<report_id>\d+)/export", self.export_report),
+            ("GET", r"/metrics", self.get_metrics),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in self.routes]
+
+    # --- Выполнение в потоках ---
+
+    async def read(self, func, *args):
+        """Выполнить чтение в пуле потоков"""
+        return await asyncio.get_running_loop().run_in_executor(self.reader, func, *args)
+
+    async def write(self, func, *args):
+        """Поставить запись в очередь и дождаться результата"""
+        future = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((func, args, future))
+        return await future
+
+    async def run_writer(self):
+        """Единственный потребитель очереди записи"""
+        loop = asyncio.get_running_loop()
+        while True:
+            func, args, future = await self.write_queue.get()
+            try:
+                result = await loop.run_in_executor(self.writer, func, *args)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.write_queue.task_done()
+
+    async def expire_sessions(self):
+        """Закрывать сеансы, к которым давно не обращались"""
+        while True:
+            await asyncio.sleep(min(60, self.session_timeout))
+            deadline = time.monotonic() - self.session_timeout
+            for session in [s for s in self.sessions.values() if s.touched < deadline and not s.saving]:
+                self.drop_session(session)
+                await self.write(session.logic.drafts.close)
+
+    # --- Сеансы ---
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Сеанс не найден или закрыт")
+        session.touched = time.monotonic()
+        return session
+
+    def track_draft(self, session):
+        """Запомнить черновик сеанса; у нового отчета он появляется при первом сбросе ответов"""
+        draft_id = session.logic.drafts.draft_id
+        if draft_id is not None and session.id in self.sessions:
+            self.draft_sessions.setdefault(draft_id, session)
+
+    def drop_session(self, session):
+        """Убрать сеанс и освободить его черновик"""
+        self.sessions.pop(session.id, None)
+        for draft_id in [d for d, s in self.draft_sessions.items() if s is session]:
+            del self.draft_sessions[draft_id]
+
+    # --- Обработчики ---
+
+    async def list_forms(self, query, body):
+        return {'forms': await self.read(ReportLogic().load_forms_list)}
+
+    async def get_form(self, query, body, name):
+        def load():
+            logic = ReportLogic()
+            form_path = logic.get_form_path(name)
+            if not form_path or not logic.load_questions_from_excel(form_path):
+                return None
+            return logic.questions_list
+
+        # Разбор формы может записать ее в кэш form_cache - через очередь записи
+        questions = await self.write(load)
+        if questions is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Форма {name} не найдена")
+        return {'form_name': name, 'questions': questions}
+
+    async def list_drafts(self, query, body):
+        return {'drafts': await self.read(list_drafts)}
+
+    async def start_draft(self, query, body):
+        form_name = body.get('form_name')
+        month = body.get('month')
+        year = _int_param(body.get('year'), 'year')
+        report_date = body.get('report_date') or time.strftime("%d.%m.%Y")
+        if not form_name or month not in MONTHS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Нужны form_name, month (название месяца) и year")
+
+        session = Session(secrets.token_hex(8))
+
+        def start():
+            form_path = session.logic.get_form_path(form_name)
+            if not form_path or not session.logic.load_questions_from_excel(form_path):
+                return False
+            return session.logic.init_report(form_name, month, year, report_date)
+
+        if not await self.write(start):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Не удалось загрузить вопросы формы {form_name}")
+        self.sessions[session.id] = session
+        return HTTPStatus.CREATED, session.status()
+
+    async def resume_draft(self, query, body, draft_id):
+        draft_id = int(draft_id)
+        if draft_id in self.draft_sessions:
+            raise HTTPError(HTTPStatus.CONFLICT, f"Черновик {draft_id} уже открыт в другом сеансе")
+
+        session = Session(secrets.token_hex(8))
+        # Черновик занимается до записи: параллельный запрос на тот же черновик получит 409
+        self.draft_sessions[draft_id] = session
+        try:
+            success, message = await self.write(session.logic.resume_draft, draft_id)
+        except Exception:
+            self.drop_session(session)
+            raise
+        if not success:
+            self.drop_session(session)
+            raise HTTPError(HTTPStatus.NOT_FOUND, message)
+        self.sessions[session.id] = session
+        return HTTPStatus.CREATED, session.status()
+
+    async def get_session(self, query, body, session_id):
+        session = self.session(session_id)
+        return await self.write(session.status)
+
+    async def post_answers(self, query, body, session_id):
+        session = self.session(session_id)
+        if session.saving:
+            raise HTTPError(HTTPStatus.CONFLICT, "Отчет сохраняется")
+
+        answers = body.get('answers')
+        if not isinstance(answers, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Нужен список answers")
+        for item in answers:
+            if not isinstance(item, dict) or item.get('answer', '') not in ('', 'Да', 'Нет'):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Ответ: {\"index\", \"answer\": \"Да\"/\"Нет\", \"comment\"}")
+            _int_param(item.get('index'), 'index')
+
+        def apply():
+            rejected = [item['index'] for item in answers
+                        if not session.logic.save_answer(int(item['index']), item.get('answer', ''), item.get('comment', ''))]
+            session.logic.drafts.flush()
+            status = session.status()
+            status['rejected'] = rejected
+            return status
+
+        status = await self.write(apply)
+        self.track_draft(session)
+        return status
+
+    async def save_session(self, query, body, session_id):
+        session = self.session(session_id)
+        if session.saving:
+            raise HTTPError(HTTPStatus.CONFLICT, "Отчет уже сохраняется")
+
+        # Пока идет выгрузка в Excel, ответы сеанса не меняются; в очередь записи попадает только БД
+        session.saving = True
+        try:
+            complete, question_number = await self.write(session.logic.check_all_answered)
+            if not complete:
+                raise HTTPError(HTTPStatus.CONFLICT, f"Нет ответа на вопрос {question_number}")
+
+            # Книга формируется в пуле чтения, запись в манифест выгрузок - вместе с отчетом в потоке записи
+            file_path, digest = await self.read(session.logic.export_current_report)
+            try:
+                report_id = await self.write(session.logic.store_current_report, file_path, digest)
+            except Exception:
+                await self.write(session.logic.discard_export, file_path)
+                raise
+        finally:
+            session.saving = False
+
+        self.drop_session(session)
+        return HTTPStatus.CREATED, {'report_id': report_id, 'file': file_path}
+
+    async def close_session(self, query, body, session_id):
+        session = self.session(session_id)
+        self.drop_session(session)
+        await self.write(session.logic.drafts.close)
+        return {'closed': session.id}
+
+    async def list_reports(self, query, body):
+        limit = min(_int_param(query.get('limit', 100), 'limit'), MAX_PAGE_SIZE)
+        sort = query.get('sort', 'created_at')
+        if sort not in REPORT_SORT_KEYS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Сортировка: {', '.join(REPORT_SORT_KEYS)}")
+        descending = query.get('descending', '1') not in ('0', 'false')
+        try:
+            after = json.loads(query['after']) if 'after' in query else None
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Параметр after - курсор из next предыдущей страницы")
+
+        reports, next_cursor = await self.read(get_reports_page, limit, after, sort, descending, query.get('form'))
+        return {'reports': reports, 'next': next_cursor}
+
+    async def get_report(self, query, body, report_id):
+        report = await self.read(get_report_by_id, int(report_id))
+        if not report:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Отчет не найден")
+        return report
+
+    async def export_report(self, query, body, report_id):
+        report = await self.read(get_report_by_id, int(report_id))
+        if not report:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Отчет не найден")
+
+        file_path, digest = await self.read(ReportLogic().render_report, report, report['answers'])
+        if digest:
+            await self.write(export_store.register, digest, file_path)
+        return {'file': os.path.basename(file_path)}
+
+    async def get_metrics(self, query, body):
+        return {
+            'enabled': metrics.is_enabled(),
+            'sessions': len(self.sessions),
+            'write_queue': self.write_queue.qsize(),
+            'operations': metrics.registry.snapshot()
+        }
+
+    # --- HTTP ---
+
+    async def dispatch(self, method, target, body):
+        """Найти обработчик и вернуть (код, данные)"""
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {'error': "Тело запроса не является JSON"}
+            if not isinstance(data, dict):
+                return HTTPStatus.BAD_REQUEST, {'error': "Тело запроса должно быть объектом JSON"}
+
+            try:
+                result = await handler(query, data, **match.groupdict())
+            except HTTPError as e:
+                return e.status, {'error': e.message}
+            except Exception as e:
+                print(f"Ошибка обработки {method} {path}: {e}")
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+            if isinstance(result, tuple):
+                return result
+            return HTTPStatus.OK, result
+
+        if allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"Метод {method} не поддерживается"}
+        return HTTPStatus.NOT_FOUND, {'error': f"Нет ресурса {path}"}
+
+    async def handle_connection(self, reader, writer):
+        """Соединение HTTP/1.1 с поддержкой keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': "Слишком большой запрос"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method.upper(), target, body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """
+        Запустить сервер и работать до отмены.
+        ready(port) вызывается после открытия порта (port=0 - любой свободный).
+        """
+        self.write_queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        tasks = [asyncio.create_task(self.run_writer()), asyncio.create_task(self.expire_sessions())]
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        port = server.sockets[0].getsockname()[1]
+        print(f"Сервис отчетов: http://{host}:{port}")
+        if ready:
+            ready(port)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Несохраненные ответы открытых сеансов остаются в черновиках
+            for session in list(self.sessions.values()):
+                await self.write(session.logic.drafts.close)
+            self.sessions.clear()
+            self.draft_sessions.clear()
+            await self.write_queue.join()
+            for task in tasks:
+                task.cancel()
+            self.reader.shutdown()
+            self.writer.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервис отчетов: HTTP/JSON поверх ReportLogic")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Адрес (по умолчанию только локальный)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Порт")
+    parser.add_argument("--db", help="Файл базы данных (по умолчанию reports.db)")
+    parser.add_argument("--metrics", action="store_true", help="Включить замеры операций (GET /metrics)")
+    args = parser.parse_args(argv)
+
+    os.makedirs("формы", exist_ok=True)
+    os.makedirs("отчеты", exist_ok=True)
+    if args.db:
+        configure_pool(args.db)
+    if args.metrics:
+        metrics.enable()
+    init_database()
+
+    try:
+        asyncio.run(ReportService().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
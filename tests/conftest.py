@@ -0,0 +1,48 @@
+"""
+Общие фикстуры тестов: временная рабочая папка и отдельная база reports.db
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import configure_pool, close_pool
+from form_cache import form_cache
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Рабочая папка с подпапками формы/ и отчеты/ и пулом соединений к пустой базе"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "формы").mkdir()
+    (tmp_path / "отчеты").mkdir()
+    configure_pool(str(tmp_path / "reports.db"))
+    form_cache.clear()
+    yield tmp_path
+    close_pool()
+    form_cache.clear()
+
+
+@pytest.fixture
+def db(workdir):
+    """Рабочая папка с базой текущей схемы"""
+    from database import init_database
+
+    init_database()
+    return workdir
+
+
+def write_form(path, rows):
+    """Форма .xlsx: заголовок и строки (вопрос, ГОСТ, руководство, документы)"""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Вопрос", "ГОСТ", "Руководство по качеству", "Документы"])
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+    return str(path)
@@ -0,0 +1,22 @@
+from analytics import no_rate_by_month, top_failing_questions
+from database import save_report_to_db
+
+
+def save(month, answer):
+    report_data = {'form_name': "Форма", 'month': month, 'year': 2024, 'report_date': "01.01.2024"}
+    answers = [{'question_text': "Крыша исправна?", 'gost_text': "", 'quality_text': "", 'documents_text': "",
+                'answer_yes_no': answer, 'comment': ""}]
+    save_report_to_db(report_data, answers, f"отчеты/Отчет_{month}.xlsx")
+
+
+def test_month_range_accepts_names_and_numbers(db):
+    save("Февраль", "Да")
+    save("Март", "Нет")
+    save("Май", "Нет")
+
+    by_name = no_rate_by_month("Форма", 2024, "Март", "Апрель")
+    assert [(rate['month'], rate['no_rate']) for rate in by_name] == [("Март", 100.0)]
+    assert no_rate_by_month("Форма", 2024, 3, 4) == by_name
+
+    (question,) = top_failing_questions(year=2024, month_from="Февраль", month_to="Май")
+    assert (question['answers'], question['no_count']) == (3, 2)
@@ -0,0 +1,17 @@
+from database import get_reports_page, save_report_to_db
+
+
+def test_reports_page_cursor(db):
+    for n in range(1, 6):
+        save_report_to_db({'form_name': f"Форма {n % 2}", 'month': n, 'year': 2024, 'report_date': f"0{n}.01.2024",
+                           'created_at': "2024-01-01 10:00:00"}, [], f"отчеты/Отчет_{n}.xlsx")
+
+    first, cursor = get_reports_page(limit=2)
+    second, cursor = get_reports_page(limit=2, after=cursor)
+    third, cursor = get_reports_page(limit=2, after=cursor)
+    # Одинаковые created_at упорядочиваются по id
+    assert [report['id'] for report in first + second + third] == [5, 4, 3, 2, 1]
+    assert cursor is None
+
+    reports, cursor = get_reports_page(limit=10, sort='period', descending=False, form_filter="Форма 1")
+    assert [report['month'] for report in reports] == ["Январь", "Март", "Май"]
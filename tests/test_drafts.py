@@ -0,0 +1,111 @@
+from conftest import write_form
+from connection import connection
+from drafts import DraftJournal, load_draft, list_drafts
+import drafts
+from logic import ReportLogic
+
+QUESTIONS = [(f"Вопрос {n}", f"ГОСТ {n}", "", "") for n in range(1, 6)]
+
+
+def start_report(workdir, rows=QUESTIONS):
+    write_form(workdir / "формы" / "Форма.xlsx", rows)
+    logic = ReportLogic()
+    logic.drafts = DraftJournal(flush_delay=None)
+    assert logic.load_questions_from_excel(logic.get_form_path("Форма"))
+    logic.init_report("Форма", "Март", 2024, "01.03.2024")
+    return logic
+
+
+def resume(workdir, draft_id):
+    from form_cache import form_cache
+
+    form_cache.clear()
+    logic = ReportLogic()
+    logic.drafts = DraftJournal(flush_delay=None)
+    return logic, logic.resume_draft(draft_id)
+
+
+def test_answers_are_flushed_and_restored(db):
+    logic = start_report(db)
+    logic.save_answer(0, "Да", "")
+    logic.save_answer(2, "Нет", "замечание")
+    logic.save_answer(2, "Нет", "замечание исправлено")
+    logic.drafts.close()
+
+    (draft,) = list_drafts()
+    assert load_draft(draft['id'])['answers'] == {0: ("Да", ""), 2: ("Нет", "замечание исправлено")}
+
+
+def test_journal_is_compacted_into_snapshot(db, monkeypatch):
+    monkeypatch.setattr(drafts, "COMPACT_EVERY", 3)
+    monkeypatch.setattr(drafts, "MAX_PENDING", 1)
+    logic = start_report(db)
+    for index in range(5):
+        logic.save_answer(index, "Да", f"комментарий {index}")
+    logic.drafts.close()
+
+    draft_id = list_drafts()[0]['id']
+    with connection() as conn:
+        journal_rows = conn.execute("SELECT COUNT(*) FROM draft_journal WHERE draft_id = ?", (draft_id,)).fetchone()[0]
+    assert journal_rows < 3
+    assert load_draft(draft_id)['answers'] == {index: ("Да", f"комментарий {index}") for index in range(5)}
+
+
+def test_discard_removes_draft(db):
+    logic = start_report(db)
+    logic.save_answer(0, "Да", "")
+    logic.drafts.flush()
+    logic.drafts.discard()
+
+    assert list_drafts() == []
+
+
+def test_resume_same_form(db):
+    logic = start_report(db)
+    logic.save_answer(1, "Нет", "к")
+    logic.drafts.close()
+    draft_id = list_drafts()[0]['id']
+
+    logic, (ok, message) = resume(db, draft_id)
+
+    assert ok, message
+    assert logic.answers_list[1]['answer_yes_no'] == "Нет"
+    assert logic.answers_list[1]['comment'] == "к"
+
+
+def test_resume_after_form_change_keeps_answers_on_their_questions(db):
+    logic = start_report(db)
+    logic.save_answer(1, "Нет", "по вопросу 2")
+    logic.save_answer(3, "Да", "по вопросу 4")
+    logic.save_answer(4, "Да", "по удаленному вопросу")
+    logic.drafts.close()
+    draft_id = list_drafts()[0]['id']
+
+    # Новый вопрос в начале, вопрос 5 удален
+    write_form(db / "формы" / "Форма.xlsx", [("Новый вопрос", "", "", "")] + QUESTIONS[:4])
+    logic, (ok, message) = resume(db, draft_id)
+
+    assert ok, message
+    answers = {index: (a['answer_yes_no'], a['comment']) for index, a in enumerate(logic.answers_list) if a['answer_yes_no']}
+    assert answers == {2: ("Нет", "по вопросу 2"), 4: ("Да", "по вопросу 4")}
+
+    # Черновик переписан под новую форму, дальнейшие изменения пишутся с новыми номерами
+    logic.save_answer(0, "Да", "")
+    logic.drafts.close()
+    assert load_draft(draft_id)['answers'] == {0: ("Да", ""), 2: ("Нет", "по вопросу 2"), 4: ("Да", "по вопросу 4")}
+
+
+def test_resume_old_draft_without_keys_refuses_changed_form(db):
+    logic = start_report(db)
+    logic.save_answer(0, "Да", "")
+    logic.drafts.close()
+    draft_id = list_drafts()[0]['id']
+    with connection() as conn:
+        conn.execute("UPDATE drafts SET question_keys = NULL WHERE id = ?", (draft_id,))
+        conn.commit()
+
+    write_form(db / "формы" / "Форма.xlsx", QUESTIONS[:3])
+    _, (ok, message) = resume(db, draft_id)
+
+    assert not ok
+    assert "изменилась" in message
@@ -0,0 +1,165 @@
+import os
+
+import pytest
+
+from cli import main as cli_main
+from connection import connection
+from database import delete_report, save_report_to_db
+from export_store import ExportStore, content_hash
+from records import AnswerRecord, QuestionDef
+
+REPORT_NAME = "Отчет: Форма Март 2024"
+
+
+def make_answers(no_index=None, comment=""):
+    questions = [QuestionDef(f"Вопрос {n}", "ГОСТ 1", "Раздел 2", "Журнал") for n in range(5)]
+    return [AnswerRecord(question, "Нет" if n == no_index else "Да", comment if n == 0 else "")
+            for n, question in enumerate(questions)]
+
+
+def save(store, answers):
+    """Выгрузить и сохранить отчет, вернуть (ID, путь к файлу)"""
+    file_path = store.export(REPORT_NAME, "Форма", "Март", 2024, answers)
+    report_data = {'form_name': "Форма", 'month': "Март", 'year': 2024, 'report_date': "01.03.2024"}
+    return save_report_to_db(report_data, answers, file_path), file_path
+
+
+def manifest_paths():
+    with connection() as conn:
+        return sorted(row[0] for row in conn.execute("SELECT file_path FROM export_files"))
+
+
+@pytest.fixture
+def store(db):
+    return ExportStore(str(db / "отчеты"))
+
+
+def test_content_hash_depends_on_answers_only():
+    assert content_hash(REPORT_NAME, make_answers()) == content_hash(REPORT_NAME, make_answers())
+    assert content_hash(REPORT_NAME, make_answers()) != content_hash(REPORT_NAME, make_answers(no_index=2))
+    assert content_hash(REPORT_NAME, make_answers()) != content_hash(REPORT_NAME, make_answers(comment="замечание"))
+    assert content_hash(REPORT_NAME, make_answers()) != content_hash("Отчет: Форма Апрель 2024", make_answers())
+
+
+def test_unchanged_report_reuses_file(store, monkeypatch):
+    first = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+
+    import export_excel
+    monkeypatch.setattr(export_excel, "create_excel_report", lambda *args, **kwargs: pytest.fail("книга сформирована заново"))
+    assert store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers()) == first
+
+
+def test_changed_report_gets_new_file(store):
+    first = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+    second = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers(no_index=1))
+
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_explicit_file_name_copies_stored_file(store, tmp_path):
+    first = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+    target = str(tmp_path / "копия.xlsx")
+
+    assert store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers(), filename=target) == target
+    with open(first, "rb") as a, open(target, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_modified_file_is_not_reused(store):
+    first = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+    with open(first, "ab") as f:
+        f.write(b"x")
+
+    assert store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers()) != first
+
+
+def test_discard_keeps_file_of_saved_report(store):
+    _, file_path = save(store, make_answers())
+    assert not store.discard(file_path)
+    assert os.path.exists(file_path)
+
+    unsaved = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers(no_index=3))
+    assert store.discard(unsaved)
+    assert not os.path.exists(unsaved)
+    assert manifest_paths() == [file_path]
+
+
+def test_gc_collects_file_of_deleted_report(store):
+    kept_id, kept = save(store, make_answers())
+    deleted_id, deleted = save(store, make_answers(no_index=4))
+    user_file = os.path.join(store.directory, "мой отчет.xlsx")
+    open(user_file, "wb").close()
+
+    delete_report(deleted_id)
+    assert manifest_paths() == [kept]
+
+    preview = store.collect_garbage(dry_run=True, min_age=0)
+    assert preview['files'] == [deleted]
+    assert os.path.exists(deleted)
+
+    stats = store.collect_garbage(min_age=0)
+    assert stats['files'] == [deleted]
+    assert not os.path.exists(deleted)
+    assert os.path.exists(kept) and os.path.exists(user_file)
+
+
+def test_gc_drops_manifest_entries_without_reports(store):
+    _, kept = save(store, make_answers())
+    cached = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers(no_index=0))
+
+    stats = store.collect_garbage(min_age=0)
+
+    assert stats['stale_entries'] == 1
+    assert stats['files'] == [cached]
+    assert manifest_paths() == [kept]
+
+
+def test_gc_keeps_recent_unsaved_files(store):
+    from export_store import reserve_file_name
+
+    # Книга выгружена, но отчет еще не записан; имя зарезервировано параллельной выгрузкой
+    rendered, digest = store.render(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+    store.register(digest, rendered)
+    placeholder = reserve_file_name(store.directory, "Отчет_20240301_100000")
+
+    stats = store.collect_garbage()
+
+    assert stats == {'files': [], 'bytes': 0, 'stale_entries': 0}
+    assert os.path.exists(rendered) and os.path.exists(placeholder)
+    assert manifest_paths() == [rendered]
+
+    old = os.path.getmtime(rendered) - 7200
+    for path in (rendered, placeholder):
+        os.utime(path, (old, old))
+    assert sorted(store.collect_garbage()['files']) == sorted([rendered, placeholder])
+
+
+def test_gc_command(db, capsys):
+    store = ExportStore("отчеты")
+    report_id, file_path = save(store, make_answers())
+    delete_report(report_id)
+
+    assert cli_main(["gc", "--dry-run", "--min-age", "0"]) == 0
+    assert os.path.exists(file_path)
+    assert cli_main(["gc"]) == 0
+    assert os.path.exists(file_path)
+    assert cli_main(["gc", "--min-age", "0"]) == 0
+    assert not os.path.exists(file_path)
+    assert "Удалено файлов: 1" in capsys.readouterr().out
+
+
+def test_batch_export_does_not_register_copies(store, tmp_path):
+    from batch_export import export_reports_batch
+
+    report_id, stored = save(store, make_answers())
+    # Без файла в хранилище книга формируется заново прямо в папке пакета
+    os.remove(stored)
+    output_dir = tmp_path / "пакет"
+
+    (result,) = export_reports_batch([report_id], output_dir=str(output_dir), workers=1)
+
+    assert result['ok'] and os.path.dirname(result['file']) == str(output_dir)
+    assert manifest_paths() == [stored]
+    reexported = store.export(REPORT_NAME, "Форма", "Март", 2024, make_answers())
+    assert os.path.dirname(reexported) == store.directory
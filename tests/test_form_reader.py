@@ -0,0 +1,66 @@
+from conftest import write_form
+from database import question_hash
+from form_reader import iter_questions
+from logic import ReportLogic
+
+
+def test_numeric_cells_are_read_as_text(workdir):
+    path = write_form(workdir / "формы" / "Числа.xlsx", [
+        ("Пункт выполнен?", 7.1, 12, None),
+        (15, "ГОСТ Р 1.0", 3.0, "Журнал"),
+    ])
+
+    questions = list(iter_questions(path))
+
+    assert questions == [
+        {'question': "Пункт выполнен?", 'gost': "7.1", 'quality': "12", 'documents': ""},
+        {'question': "15", 'gost': "ГОСТ Р 1.0", 'quality': "3", 'documents': "Журнал"},
+    ]
+
+
+def test_question_hash_accepts_numbers():
+    assert question_hash("Форма", "Вопрос", 7.1, None, "") == question_hash("Форма", "Вопрос", "7.1", "", "")
+
+
+def test_report_with_numeric_cells_is_saved(db):
+    write_form(db / "формы" / "Числа.xlsx", [("Пункт выполнен?", 7.1, 12, None), (15, 2.5, None, None)])
+    logic = ReportLogic()
+    assert logic.load_questions_from_excel(logic.get_form_path("Числа"))
+
+    logic.fill_report("Числа", "Март", 2024, "01.03.2024", {0: ("Да", ""), 1: ("Нет", "замечание")})
+    ok, message = logic.save_report()
+
+    assert ok, message
+    assert logic.get_report_from_db(1)['answers'][0]['gost_text'] == "7.1"
+
+
+def test_form_cache_ignores_rows_of_other_parser_versions(db, monkeypatch):
+    import form_cache as form_cache_module
+    from connection import connection
+    from form_cache import form_cache
+    from records import QuestionDef
+
+    path = write_form(db / "формы" / "Числа.xlsx", [("Пункт выполнен?", 7.1, None, None)])
+    calls = []
+
+    def loader(file_path):
+        calls.append(file_path)
+        return [QuestionDef(**question) for question in iter_questions(file_path)]
+
+    # Строка, записанная разбором до появления версии, считается устаревшей
+    form_cache.get_questions(path, loader)
+    with connection() as conn:
+        conn.execute("UPDATE form_cache SET format_version = 0, questions = '[]'")
+        conn.commit()
+    form_cache.clear()
+    assert form_cache.get_questions(path, loader)[0].gost == "7.1"
+    assert len(calls) == 2
+
+    form_cache.clear()
+    form_cache.get_questions(path, loader)
+    assert len(calls) == 2
+
+    monkeypatch.setattr(form_cache_module, "FORMAT_VERSION", form_cache_module.FORMAT_VERSION + 1)
+    form_cache.clear()
+    form_cache.get_questions(path, loader)
+    assert len(calls) == 3
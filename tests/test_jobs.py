@@ -0,0 +1,58 @@
+import threading
+
+from jobs import Job
+
+
+def make_job():
+    return Job(lambda: None, (), {}, None, None, None)
+
+
+def test_cancel_before_checkpoint_stops_job():
+    job = make_job()
+
+    assert job.cancel()
+    assert job.checkpoint()
+
+
+def test_cancel_after_checkpoint_is_refused():
+    job = make_job()
+
+    assert not job.checkpoint()
+    assert not job.cancel()
+    assert not job.cancelled
+
+
+def test_cancel_and_checkpoint_race_has_one_winner():
+    for _ in range(200):
+        job = make_job()
+        results = {}
+        threads = [
+            threading.Thread(target=lambda: results.__setitem__('cancel', job.cancel())),
+            threading.Thread(target=lambda: results.__setitem__('stopped', job.checkpoint())),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Либо отмена удалась и задача остановилась, либо запись началась и отмена отклонена
+        assert results['cancel'] == results['stopped']
+
+
+def test_cancelled_delete_keeps_report(db):
+    from database import get_report_by_id, save_report_to_db
+    from logic import ReportLogic
+
+    report_data = {'form_name': "Форма", 'month': "Март", 'year': 2024, 'report_date': "01.03.2024"}
+    report_id = save_report_to_db(report_data, [], "отчеты/Отчет.xlsx")
+    logic = ReportLogic()
+
+    job = make_job()
+    assert job.cancel()
+    assert logic.delete_report_from_db(report_id, should_cancel=job.checkpoint) == (False, "Удаление отменено")
+    assert get_report_by_id(report_id) is not None
+
+    job = make_job()
+    assert logic.delete_report_from_db(report_id, should_cancel=job.checkpoint)[0]
+    assert not job.cancel()
+    assert get_report_by_id(report_id) is None
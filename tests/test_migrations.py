@@ -0,0 +1,153 @@
+import glob
+import sqlite3
+
+import pytest
+
+from connection import connection
+from database import get_report_by_id, save_report_to_db, search_answers
+import migrations
+
+# Схема reports.db до введения миграций: месяц названием, дата "дд.мм.гггг чч:мм:сс",
+# справочные тексты вопросов в каждой строке answers
+BASELINE_SCHEMA = '''
+    CREATE TABLE reports (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        form_name TEXT NOT NULL,
+        month TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        report_date TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        file_path TEXT NOT NULL
+    );
+    CREATE TABLE answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_id INTEGER NOT NULL,
+        question_text TEXT NOT NULL,
+        answer_yes_no TEXT NOT NULL,
+        comment TEXT,
+        gost_text TEXT,
+        quality_text TEXT,
+        documents_text TEXT,
+        FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE
+    );
+    CREATE INDEX idx_answers_report_id ON answers(report_id);
+    CREATE INDEX idx_reports_created_at ON reports(created_at);
+'''
+
+
+def create_baseline(path, reports=3, questions=4):
+    """База прежней схемы: reports отчетов формы "Форма" по questions ответов"""
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    for n in range(1, reports + 1):
+        report_id = conn.execute(
+            "INSERT INTO reports (form_name, month, year, report_date, created_at, file_path) VALUES (?, ?, ?, ?, ?, ?)",
+            ("Форма", "Март", 2024, f"0{n}.03.2024", f"0{n}.03.2024 10:00:00", f"отчеты/Отчет_{n}.xlsx")
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO answers (report_id, question_text, answer_yes_no, comment, gost_text, quality_text, documents_text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(report_id, f"Вопрос {q}", "Нет" if q == 1 else "Да", "протечка крыши" if q == 1 else "",
+              f"ГОСТ {q}", None, "") for q in range(1, questions + 1)]
+        )
+    conn.commit()
+    conn.close()
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_baseline_database_is_upgraded(workdir):
+    db_path = str(workdir / "reports.db")
+    create_baseline(db_path)
+
+    assert migrations.migrate() == 0
+    assert user_version(db_path) == migrations.SCHEMA_VERSION
+    assert len(glob.glob(f"{db_path}.v0_*.bak")) == 1
+
+    with connection() as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 12
+        assert conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0] == 4
+        drafts_columns = {row['name'] for row in conn.execute("PRAGMA table_info(drafts)")}
+        assert 'question_keys' in drafts_columns
+        form_cache_columns = {row['name'] for row in conn.execute("PRAGMA table_info(form_cache)")}
+        assert 'format_version' in form_cache_columns
+        assert conn.execute("SELECT COUNT(*) FROM export_files").fetchone()[0] == 0
+        row = conn.execute("SELECT month, created_at FROM reports WHERE id = 1").fetchone()
+        assert (row['month'], row['created_at']) == (3, "2024-03-01 10:00:00")
+
+    report = get_report_by_id(1)
+    assert report['month'] == "Март"
+    assert report['created_at'] == "01.03.2024 10:00:00"
+    assert (report['question_count'], report['yes_count'], report['no_count'], report['comment_count']) == (4, 3, 1, 1)
+    assert [answer['question_text'] for answer in report['answers']] == [f"Вопрос {q}" for q in range(1, 5)]
+    assert report['answers'][0]['gost_text'] == "ГОСТ 1"
+    assert len(search_answers("протечк")) == 3
+
+
+def test_upgrade_copies_in_batches(workdir, monkeypatch):
+    db_path = str(workdir / "reports.db")
+    create_baseline(db_path, reports=7, questions=3)
+    # Размер порции - значение по умолчанию, вычисленное при определении функции
+    monkeypatch.setattr(migrations.copy_in_batches, "__defaults__", (2,))
+
+    migrations.migrate(backup=False)
+
+    with connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0] == 7
+        assert conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 21
+        assert conn.execute("SELECT COUNT(*) FROM answers WHERE question_id NOT IN (SELECT id FROM questions)").fetchone()[0] == 0
+    assert not glob.glob(f"{db_path}.*.bak")
+
+
+def test_new_database_has_current_schema(workdir):
+    db_path = str(workdir / "reports.db")
+
+    assert migrations.migrate() == 0
+    assert user_version(db_path) == migrations.SCHEMA_VERSION
+    # Пустую базу нечего сохранять
+    assert not glob.glob(f"{db_path}.*.bak")
+
+    save_report_to_db({'form_name': "Форма", 'month': "Май", 'year': 2024, 'report_date': "01.05.2024"},
+                      [{'question_text': "Вопрос", 'gost_text': "", 'quality_text': "", 'documents_text': "",
+                        'answer_yes_no': "Нет", 'comment': ""}], "отчеты/Отчет.xlsx")
+    assert get_report_by_id(1)['no_count'] == 1
+
+
+def test_current_schema_is_not_migrated_again(workdir, monkeypatch):
+    migrations.migrate()
+
+    def fail(conn, version, step):
+        raise AssertionError("шаг миграции при текущей схеме")
+
+    monkeypatch.setattr(migrations, "_apply_step", fail)
+    assert migrations.migrate() == migrations.SCHEMA_VERSION
+
+
+def test_failed_step_is_rolled_back(workdir, monkeypatch):
+    db_path = str(workdir / "reports.db")
+    migrations.migrate()
+    version = migrations.SCHEMA_VERSION
+
+    def broken_step(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("сбой шага")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(version + 1, "Сбой", broken_step)])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", version + 1)
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate()
+
+    assert user_version(db_path) == version
+    with connection() as conn:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert len(glob.glob(f"{db_path}.v{version}_*.bak")) == 1
+
@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+from conftest import write_form
+from database import get_report_by_id
+from records import QuestionDef
+from report_generate import generate_reports, read_answers_file, validate_answers, validate_meta
+
+QUESTIONS = [QuestionDef("Мероприятия выполняются?"), QuestionDef("Журнал ведется?"), QuestionDef("Персонал обучен?")]
+
+
+def test_read_csv_with_meta_rows(tmp_path):
+    path = tmp_path / "ответы.csv"
+    path.write_text("Месяц;Март\nГод;2024\n\n№;Вопрос;Ответ;Комментарий\n1;;Да;\n2;Журнал ведется?;нет;нет подписи\n",
+                    encoding="utf-8")
+
+    meta, entries = read_answers_file(str(path))
+
+    assert meta == {'month': "Март", 'year': "2024"}
+    assert entries == [("строка 5", "1", "", "Да", ""), ("строка 6", "2", "Журнал ведется?", "нет", "нет подписи")]
+
+
+def test_read_json(tmp_path):
+    path = tmp_path / "ответы.json"
+    path.write_text(json.dumps({'form_name': "Форма", 'year': 2024, 'answers': [
+        {'index': 1, 'answer': "Да"}, {'question': "Журнал ведется?", 'answer': "Нет", 'comment': "к"}
+    ]}, ensure_ascii=False), encoding="utf-8")
+
+    meta, entries = read_answers_file(str(path))
+
+    assert meta == {'form_name': "Форма", 'year': 2024}
+    assert entries == [("ответ 1", 1, "", "Да", ""), ("ответ 2", "", "Журнал ведется?", "Нет", "к")]
+
+
+def test_csv_without_header_is_rejected(tmp_path):
+    path = tmp_path / "ответы.csv"
+    path.write_text("1;Да\n2;Нет\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        read_answers_file(str(path))
+
+
+def test_validate_answers_by_number_and_text():
+    entries = [("строка 1", "1", "", "да", ""), ("строка 2", "", "Журнал ведется?", "НЕТ", " к "),
+               ("строка 3", "3.", "Персонал обучен?", "Да", "")]
+
+    answers, errors = validate_answers(QUESTIONS, entries)
+
+    assert errors == []
+    assert answers == {0: ("Да", ""), 1: ("Нет", "к"), 2: ("Да", "")}
+
+
+@pytest.mark.parametrize("entry, message", [
+    (("строка 1", "7", "", "Да", ""), "нет вопроса с номером 7"),
+    (("строка 1", "1", "Другой вопрос", "Да", ""), "не совпадает с формой"),
+    (("строка 1", "", "Неизвестный вопрос", "Да", ""), "вопрос не найден"),
+    (("строка 1", "1", "", "Может быть", ""), "ответ должен быть"),
+])
+def test_validate_answers_reports_errors(entry, message):
+    _, errors = validate_answers(QUESTIONS, [entry])
+
+    assert any(message in error for error in errors)
+    assert any("нет ответов на вопросы" in error for error in errors)
+
+
+def test_validate_answers_rejects_duplicates():
+    entries = [("строка 1", "1", "", "Да", ""), ("строка 2", "", "Мероприятия выполняются?", "Нет", "")]
+
+    _, errors = validate_answers(QUESTIONS, entries)
+
+    assert "строка 2: повторный ответ на вопрос 1" in errors
+
+
+def test_validate_meta():
+    assert validate_meta({'month': "март", 'year': "2024", 'report_date': "05.03.2024"}) == ("Март", 2024, "05.03.2024", [])
+
+    _, year, _, errors = validate_meta({'month': "Мартобря", 'year': "двадцать", 'report_date': "2024-03-05"})
+    assert year is None
+    assert len(errors) == 3
+
+
+def test_same_answer_file_names_from_different_folders_do_not_overwrite(db):
+    write_form(db / "формы" / "Форма.xlsx", [(question.question, "", "", "") for question in QUESTIONS])
+    for folder, answer in (("цех1", "Да"), ("цех2", "Нет")):
+        os.mkdir(db / folder)
+        (db / folder / "ответы.csv").write_text(f"№;Ответ\n1;{answer}\n2;Да\n3;Да\n", encoding="utf-8")
+
+    results = generate_reports([str(db / "цех1"), str(db / "цех2")], form_name="Форма",
+                               defaults={'month': "Март", 'year': 2024}, output_dir="отчеты", workers=2)
+
+    assert all(result['ok'] for result in results), results
+    outputs = {result['output'] for result in results}
+    assert len(outputs) == 2
+    for result in results:
+        report = get_report_by_id(result['report_id'])
+        assert report['file_path'] == result['output']
+        assert os.path.getsize(result['output']) > 0
+
+
+def form_cache_rows():
+    from connection import connection
+
+    with connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM form_cache").fetchone()[0]
+
+
+def test_workers_do_not_write_form_cache(db):
+    write_form(db / "формы" / "Форма.xlsx", [(question.question, "", "", "") for question in QUESTIONS])
+    (db / "ответы.csv").write_text("Форма;Форма\nМесяц;Март\nГод;2024\n№;Ответ\n1;Да\n2;Да\n3;Нет\n", encoding="utf-8")
+
+    # Форма указана только в файле ответов: ее разбирает дочерний процесс и в БД не пишет
+    (result,) = generate_reports([str(db / "ответы.csv")], workers=1)
+    assert result['ok'], result
+    assert form_cache_rows() == 0
+
+    # Общая форма разбирается заранее в основном процессе
+    (result,) = generate_reports([str(db / "ответы.csv")], form_name="Форма", workers=1)
+    assert result['ok'], result
+    assert form_cache_rows() == 1
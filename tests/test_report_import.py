@@ -0,0 +1,39 @@
+import os
+import shutil
+
+from database import get_all_reports, save_report_to_db
+from export_store import ExportStore
+from records import AnswerRecord, QuestionDef
+from report_import import import_reports_from_directory, read_report_file
+
+
+def export_report(db, month="Март"):
+    answers = [AnswerRecord(QuestionDef(f"Вопрос {n}"), "Да" if n else "Нет", "") for n in range(3)]
+    return ExportStore(str(db / "отчеты")).export(f"Отчет: Форма {month} 2024", "Форма", month, 2024, answers), answers
+
+
+def test_dates_come_from_period_and_footer(db):
+    file_path, _ = export_report(db)
+
+    report_data, answers, _ = read_report_file(file_path)
+
+    assert report_data['report_date'] == "01.03.2024"
+    assert report_data['created_at'].endswith("00:00:00")
+    assert [answer['answer_yes_no'] for answer in answers] == ["Нет", "Да", "Да"]
+
+
+def test_imported_files_are_skipped(db):
+    saved, answers = export_report(db, "Март")
+    report_data = {'form_name': "Форма", 'month': "Март", 'year': 2024, 'report_date': "05.03.2024"}
+    save_report_to_db(report_data, answers, os.path.relpath(saved))
+
+    archive = db / "архив"
+    archive.mkdir()
+    shutil.copy(export_report(db, "Апрель")[0], archive)
+
+    # Файл сохраненного отчета в папке выгрузок не дублируется
+    assert import_reports_from_directory("отчеты")['reports'] == 1
+    assert import_reports_from_directory(str(archive))['reports'] == 1
+    assert import_reports_from_directory(str(archive))['reports'] == 0
+    assert import_reports_from_directory("отчеты")['reports'] == 0
+    assert len(get_all_reports()) == 3
@@ -0,0 +1,156 @@
+import asyncio
+import http.client
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import connection
+from conftest import write_form
+from database import MONTHS
+
+CLIENTS = 8
+REPORTS_PER_CLIENT = 3
+QUESTIONS = 30
+
+
+@pytest.fixture
+def writer_threads(monkeypatch):
+    """Имена потоков, открывавших транзакции (transaction() во всех модулях)"""
+    threads = []
+    original = connection.transaction
+
+    def tracked():
+        threads.append(threading.current_thread().name)
+        return original()
+
+    for module in list(sys.modules.values()):
+        if getattr(module, 'transaction', None) is original:
+            monkeypatch.setattr(module, 'transaction', tracked)
+    return threads
+
+
+@pytest.fixture
+def service(db, monkeypatch, writer_threads):
+    """Сервис на свободном порту; короткое ожидание блокировки, чтобы конкурирующая запись не пряталась"""
+    from service import ReportService
+
+    monkeypatch.setattr(connection, "BUSY_TIMEOUT", 0.1)
+    connection.configure_pool(str(db / "reports.db"))
+    write_form(db / "формы" / "Нагрузка.xlsx", [(f"Вопрос {n}", f"ГОСТ {n}", "", "") for n in range(QUESTIONS)])
+
+    ready = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state['loop'] = loop
+        state['task'] = loop.create_task(ReportService().serve("127.0.0.1", 0, ready=lambda port: (state.update(port=port), ready.set())))
+        try:
+            loop.run_until_complete(state['task'])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    yield state['port']
+    state['loop'].call_soon_threadsafe(state['task'].cancel)
+    thread.join(10)
+
+
+def request(conn, method, path, payload=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"} if body else {})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+
+def run_client(port, number):
+    """Заполнить и сохранить отчеты, между записями читать список и отчеты; вернуть (ID отчетов, ошибки)"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    saved, errors = [], []
+
+    def check(expected, status, data, what):
+        if status != expected:
+            errors.append(f"клиент {number}: {what} -> {status} {data}")
+        return status == expected
+
+    try:
+        for i in range(REPORTS_PER_CLIENT):
+            status, session = request(conn, "POST", "/drafts", {
+                'form_name': "Нагрузка", 'month': MONTHS[(number + i) % 12], 'year': 2000 + number, 'report_date': "01.01.2024"
+            })
+            if not check(201, status, session, "POST /drafts"):
+                continue
+            path = f"/sessions/{session['session']}"
+            for start in range(0, QUESTIONS, 10):
+                answers = [{'index': index, 'answer': "Нет" if (index + number) % 5 == 0 else "Да",
+                            'comment': f"клиент {number}" if index == start else ""}
+                           for index in range(start, start + 10)]
+                check(200, *request(conn, "POST", f"{path}/answers", {'answers': answers}), "answers")
+                check(200, *request(conn, "GET", "/reports?limit=5"), "GET /reports")
+
+            status, result = request(conn, "POST", f"{path}/save", {})
+            if check(201, status, result, "save"):
+                saved.append(result['report_id'])
+                check(200, *request(conn, "GET", f"/reports/{result['report_id']}"), "GET /reports/<id>")
+                check(200, *request(conn, "POST", f"/reports/{result['report_id']}/export"), "export")
+    finally:
+        conn.close()
+    return saved, errors
+
+
+def test_concurrent_saves_and_reads(service, writer_threads):
+    with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+        results = list(pool.map(lambda number: run_client(service, number), range(CLIENTS)))
+
+    errors = [error for _, client_errors in results for error in client_errors]
+    saved = [report_id for client_saved, _ in results for report_id in client_saved]
+    assert errors == []
+    assert len(saved) == len(set(saved)) == CLIENTS * REPORTS_PER_CLIENT
+
+    with connection.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0] == len(saved)
+        assert conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == len(saved) * QUESTIONS
+        assert conn.execute("SELECT COUNT(*) FROM reports WHERE question_count <> ?", (QUESTIONS,)).fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM drafts").fetchone()[0] == 0
+
+        file_path = conn.execute("SELECT file_path FROM reports WHERE id = ?", (saved[0],)).fetchone()[0]
+
+    # Файл удален - выгрузка формирует книгу заново и записывает ее в манифест
+    os.remove(file_path)
+    client = http.client.HTTPConnection("127.0.0.1", service, timeout=60)
+    status, result = request(client, "POST", f"/reports/{saved[0]}/export")
+    client.close()
+    assert status == 200, result
+    assert os.path.exists(os.path.join("отчеты", result['file']))
+
+    # Все транзакции сервиса выполнены единственным потоком записи
+    assert writer_threads
+    assert set(writer_threads) == {"service-write_0"}
+
+
+def test_draft_is_open_in_one_session_only(service):
+    conn = http.client.HTTPConnection("127.0.0.1", service, timeout=60)
+    try:
+        status, started = request(conn, "POST", "/drafts", {'form_name': "Нагрузка", 'month': "Март", 'year': 2024})
+        assert status == 201
+        request(conn, "POST", f"/sessions/{started['session']}/answers", {'answers': [{'index': 0, 'answer': "Да"}]})
+        draft_id = request(conn, "GET", f"/sessions/{started['session']}")[1]['draft_id']
+
+        # Черновик уже пишет сеанс, который его начал
+        assert request(conn, "POST", f"/drafts/{draft_id}/resume")[0] == 409
+
+        # После закрытия черновик можно продолжить, но только в одном сеансе
+        assert request(conn, "DELETE", f"/sessions/{started['session']}")[0] == 200
+        status, resumed = request(conn, "POST", f"/drafts/{draft_id}/resume")
+        assert status == 201 and resumed['answered'] == 1
+        assert request(conn, "POST", f"/drafts/{draft_id}/resume")[0] == 409
+    finally:
+        conn.close()